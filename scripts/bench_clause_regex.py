@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+条款标题识别基准：对比合并前的逐模式匹配（5 个正则依次 match）与当前的预筛 + 单个合并正则。
+用法：
+  PYTHONPATH=src python scripts/bench_clause_regex.py [--runs 5] [--doc gdpr=GDPR.html --doc pipl=pipl.html ...]
+--doc 传入本地 HTML/PDF/文本全文（如 eur-lex GDPR、网信办 PIPL、个人情报保护委员会 APPI 指南）；
+未传入时使用按三部法规正文结构生成的合成语料（条款标题行约占 3%，其余为正文行）。
+两种实现的识别结果必须一致，否则以退出码 1 结束。
+"""
+
+import argparse
+import random
+import re
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from minos import rulesync_convert
+
+# 合并前的实现，作为对照基准（tests/test_rulesync_convert_segment.py 也以此校验合并正则的等价性）
+_LEGACY_PATTERNS = [
+    re.compile(r"^\s*(Article|Art\.?)\s+([0-9A-Za-z\.\-º°]+)(?:\s+(.*))?$", re.IGNORECASE),
+    re.compile(r"^\s*Section\s+([0-9A-Za-z\.\-º°]+)(?:\s+(.*))?$", re.IGNORECASE),
+    re.compile(r"^\s*Art\.\s*([0-9A-Za-z\.\-º°]+)\s*[:\.]?\s*(.*)?$", re.IGNORECASE),
+    re.compile(r"^\s*第([一二三四五六七八九十百零〇\d]+)条(?=[：:、\s]|$)\s*(.*)$"),
+    re.compile(r"^\s*第?([0-9０-９]+)条(?=[：:、\s\(\)（）]|$)\s*(.*)$"),
+]
+
+
+def _legacy_extract(line: str) -> Optional[Tuple[str, str]]:
+    for pat in _LEGACY_PATTERNS:
+        m = pat.match(line)
+        if m:
+            clause_raw, title = m.groups()[-2:]
+            clause = clause_raw.strip()
+            cn_val = rulesync_convert._cn_numeral_to_int(clause)
+            return (str(cn_val) if cn_val is not None else clause), (title or "").strip()
+    return None
+
+
+_CN_DIGITS = "一二三四五六七八九"
+
+
+def _cn_number(n: int) -> str:
+    tens, ones = divmod(n, 10)
+    head = ("" if tens == 1 else _CN_DIGITS[tens - 1]) + "十" if tens else ""
+    return head + (_CN_DIGITS[ones - 1] if ones else "")
+
+
+def _synthetic(regulation: str, articles: int = 99, body_lines: int = 30) -> List[str]:
+    rnd = random.Random(regulation)
+    words = "the controller shall processing personal data subject consent purpose where necessary".split()
+    lines: List[str] = []
+    for n in range(1, articles + 1):
+        if regulation == "gdpr":
+            lines.append(f"Article {n}")
+            lines.append("Principles relating to processing of personal data")
+            body = [f"{i}. " + " ".join(rnd.choices(words, k=24)) for i in range(1, body_lines + 1)]
+        elif regulation == "pipl":
+            lines.append(f"第{_cn_number(n)}条 个人信息处理者应当对其个人信息处理活动负责")
+            body = ["个人信息处理者" + "处理个人信息应当遵循合法、正当、必要和诚信原则，" * 3 for _ in range(body_lines)]
+        else:
+            lines.append(f"第{n}条（利用目的の特定）")
+            body = ["個人情報取扱事業者は、個人情報を取り扱うに当たっては、その利用の目的をできる限り特定しなければならない。"] * body_lines
+        lines.extend(body)
+    return lines
+
+
+def _time(fn: Callable[[str], object], lines: List[str], runs: int) -> float:
+    samples = []
+    for _ in range(max(runs, 1)):
+        start = time.perf_counter()
+        for line in lines:
+            fn(line)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="每个语料运行次数（取中位数）")
+    parser.add_argument("--doc", action="append", default=[], help="name=path，本地法规全文（HTML/PDF/文本）")
+    args = parser.parse_args(argv)
+
+    corpora: Dict[str, List[str]] = {}
+    for spec in args.doc:
+        name, _, path = spec.partition("=")
+        doc = Path(path or name)
+        text = rulesync_convert.read_document(doc)[0] if doc.suffix.lower() in (".html", ".htm", ".pdf") else doc.read_text("utf-8")
+        corpora[name if path else doc.stem] = [ln.strip() for ln in text.splitlines() if ln.strip()]
+    if not corpora:
+        corpora = {reg: _synthetic(reg) for reg in ("gdpr", "pipl", "appi")}
+
+    mismatched = False
+    for name, lines in corpora.items():
+        headers = [rulesync_convert._extract_clause_title(ln) for ln in lines]
+        if headers != [_legacy_extract(ln) for ln in lines]:
+            mismatched = True
+            print(f"[bench] {name}: results differ from legacy patterns")
+        legacy = _time(_legacy_extract, lines, args.runs)
+        combined = _time(rulesync_convert._extract_clause_title, lines, args.runs)
+        print(
+            f"[bench] {name:<8} lines={len(lines):6d} headers={sum(h is not None for h in headers):4d} "
+            f"legacy={legacy:7.2f}ms combined={combined:7.2f}ms speedup={legacy / combined:4.1f}x"
+        )
+    return 1 if mismatched else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
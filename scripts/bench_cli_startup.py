@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+CLI 冷启动基准：逐子命令在全新解释器中运行，记录墙钟时间与 `python -X importtime` 的导入耗时。
+用法：
+  PYTHONPATH=src python scripts/bench_cli_startup.py [--runs 10] [--top 8] [--budget-ms 0]
+--budget-ms > 0 时，任一场景中位数超过预算即以退出码 1 结束，可接入 CI 跟踪回归。
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Tuple
+
+# (场景名, minos 参数)；后两项会进入子命令处理函数并在参数校验处提前返回，用于衡量处理函数的按需导入
+SCENARIOS: List[Tuple[str, List[str]]] = [
+    ("help", ["--help"]),
+    ("scan --help", ["scan", "--help"]),
+    ("rulesync --help", ["rulesync", "--help"]),
+    ("scan (handler)", ["scan", "--mode", "source"]),
+    ("rulesync (handler)", ["rulesync", "--from-url", "https://example.invalid/rules", "--regulation", "gdpr"]),
+]
+
+_RUNNER = "import sys; from minos.cli import main; sys.exit(main(sys.argv[1:]))"
+
+
+def _run(args: List[str], importtime: bool = False) -> Tuple[float, str]:
+    cmd = [sys.executable]
+    if importtime:
+        cmd += ["-X", "importtime"]
+    cmd += ["-c", _RUNNER, *args]
+    start = time.perf_counter()
+    proc = subprocess.run(cmd, capture_output=True, text=True, env=os.environ.copy())
+    return (time.perf_counter() - start) * 1000, proc.stderr
+
+
+def _parse_importtime(stderr: str) -> Dict[str, int]:
+    """返回 模块 → 自身导入耗时（微秒）。"""
+    self_us: Dict[str, int] = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        parts = line[len("import time:") :].split("|")
+        try:
+            self_us[parts[2].strip()] = int(parts[0])
+        except (IndexError, ValueError):
+            continue
+    return self_us
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10, help="每个场景运行次数（取中位数）")
+    parser.add_argument("--top", type=int, default=8, help="输出自身导入耗时最高的模块数")
+    parser.add_argument("--budget-ms", type=float, default=0, help="中位数预算（毫秒），0 表示不检查")
+    args = parser.parse_args(argv)
+
+    over_budget = False
+    for name, cli_args in SCENARIOS:
+        _run(cli_args)  # 预热 pyc
+        walls = [_run(cli_args)[0] for _ in range(max(args.runs, 1))]
+        _, stderr = _run(cli_args, importtime=True)
+        modules = _parse_importtime(stderr)
+        median = statistics.median(walls)
+        print(
+            f"[bench] {name:<20} median={median:7.1f}ms min={min(walls):7.1f}ms "
+            f"modules={len(modules)} import_total={sum(modules.values()) / 1000:6.1f}ms"
+        )
+        for mod, us in sorted(modules.items(), key=lambda kv: kv[1], reverse=True)[: args.top]:
+            print(f"[bench]     {us / 1000:6.1f}ms {mod}")
+        if args.budget_ms and median > args.budget_ms:
+            over_budget = True
+            print(f"[bench] {name} exceeds budget {args.budget_ms}ms")
+    return 1 if over_budget else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,122 @@
+"""
+APK 单遍扫描：一个 ApkSession 打开 APK 一次，Manifest 与 SDK/API/字符串分析器共享同一遍顺序读取，
+每个条目至多解压一次。
+- 可选扫描缓存：APK 未变化（size/mtime）时按条目复用命中结果，命中的条目不再解压
+- 多个 APK 时按 APK 分发到进程池并行扫描，结果按输入顺序返回
+"""
+
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+from minos import manifest_scanner, sdk_scanner
+from minos.archive import ApkSession
+from minos.ruleset import RuleSet, as_ruleset
+from minos.scan_cache import ScanCache, ScanCacheError
+
+
+class ApkScanError(Exception):
+    """APK 扫描异常（APK 损坏、无法读取等）。"""
+
+
+def _count_stats(findings: List[Dict[str, Any]]) -> Dict[str, Any]:
+    stats: Dict[str, Any] = {"count_by_regulation": {}, "count_by_severity": {}}
+    for f in findings:
+        reg = f.get("regulation")
+        sev = f.get("severity")
+        if reg:
+            stats["count_by_regulation"][reg] = stats["count_by_regulation"].get(reg, 0) + 1
+        if sev:
+            stats["count_by_severity"][sev] = stats["count_by_severity"].get(sev, 0) + 1
+    return stats
+
+
+def scan_apk(
+    apk_path: Path,
+    rules: Union[RuleSet, List[Dict[str, Any]]],
+    source_flags: Optional[Dict[str, str]] = None,
+    matcher: Optional[sdk_scanner.PatternMatcher] = None,
+    cache_dir: Optional[Path] = None,
+) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """
+    单遍扫描 APK，返回 (findings, stats)：Manifest 权限/组件规则 + SDK/API/字符串规则。
+    matcher 可由调用方预编译后在多个 APK 间复用；cache_dir 非空时启用扫描缓存（与源码扫描共用）。
+    """
+    source_flags = source_flags or {}
+    rules = as_ruleset(rules)
+    matcher = matcher or sdk_scanner.compile_rules(rules)
+    print(f"[apk] scanning {apk_path}")
+
+    cache: Optional[ScanCache] = None
+    if cache_dir is not None:
+        try:
+            cache = ScanCache(cache_dir, matcher.fingerprint)
+        except ScanCacheError as exc:
+            print(f"[apk] cache disabled: {exc}")
+
+    session = ApkSession(apk_path)
+    manifest = session.register(manifest_scanner.ManifestCollector())
+    sdk = session.register(sdk_scanner.SdkAnalyzer(matcher, cache=cache, apk_path=apk_path))
+    try:
+        session.run()
+    finally:
+        if cache is not None:
+            print(f"[apk] cache hits={cache.hits} misses={cache.misses}")
+            try:
+                cache.close()
+            except ScanCacheError as exc:
+                print(f"[apk] cache error: {exc}")
+
+    findings: List[Dict[str, Any]] = []
+    if manifest.contents:
+        try:
+            f, _ = manifest_scanner.scan_manifest_contents(manifest.contents, rules, source_flags, label=str(apk_path))
+            findings.extend(f)
+        except manifest_scanner.ManifestScanError as exc:
+            print(f"[apk] manifest skipped: {exc}")
+    else:
+        print(f"[apk] AndroidManifest.xml not found in {apk_path}")
+    findings.extend(sdk_scanner.build_findings(matcher, sdk.results, source_flags))
+
+    stats = _count_stats(findings)
+    print(f"[apk] scanned {apk_path}, findings={len(findings)}, entries={len(sdk.results)}")
+    return findings, stats
+
+
+def _scan_apk_job(
+    apk_path: Path, rules: RuleSet, source_flags: Dict[str, str], cache_dir: Optional[Path]
+) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    # worker 内复用 _init_worker 编译好的匹配器
+    return scan_apk(apk_path, rules, source_flags, matcher=sdk_scanner._WORKER_MATCHER, cache_dir=cache_dir)
+
+
+def scan_apks(
+    apk_paths: List[Path],
+    rules: Union[RuleSet, List[Dict[str, Any]]],
+    source_flags: Optional[Dict[str, str]] = None,
+    workers: int = 1,
+    cache_dir: Optional[Path] = None,
+) -> Iterator[Tuple[List[Dict[str, Any]], Dict[str, Any]]]:
+    """
+    按输入顺序逐个产出各 APK 的 (findings, stats)。workers > 1 且有多个 APK 时按 APK 分发到进程池
+    （单个 APK 内仍为单遍顺序读取）。任一 APK 扫描失败抛出 ApkScanError，不静默跳过。
+    """
+    source_flags = source_flags or {}
+    rules = as_ruleset(rules)
+    if workers <= 1 or len(apk_paths) < 2:
+        matcher = sdk_scanner.compile_rules(rules)
+        for apk_path in apk_paths:
+            try:
+                yield scan_apk(apk_path, rules, source_flags, matcher=matcher, cache_dir=cache_dir)
+            except Exception as exc:
+                raise ApkScanError(f"{apk_path}: {exc}") from exc
+        return
+
+    with sdk_scanner._create_executor(min(workers, len(apk_paths)), rules) as executor:
+        futures = [executor.submit(_scan_apk_job, p, rules, source_flags, cache_dir) for p in apk_paths]
+        for apk_path, future in zip(apk_paths, futures):
+            try:
+                yield future.result()
+            except Exception as exc:
+                for pending in futures:
+                    pending.cancel()
+                raise ApkScanError(f"{apk_path}: {exc}") from exc
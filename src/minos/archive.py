@@ -0,0 +1,246 @@
+"""
+归档读取：APK/AAR/JAR/XAPK/APKS 等 zip 容器的递归遍历，不把归档解压到工作目录。
+- 嵌套条目以 "!/" 连接成员链，例如 base.apk!/classes.dex
+- 内层归档为 STORED 时直接在外层文件上开窗口读取（零拷贝）；压缩存储的内层归档解压到 SpooledTemporaryFile，
+  不超过 NESTED_ARCHIVE_MEMORY_BYTES 时留在内存，更大的溢出到临时文件（总大小有上限）
+- 展开深度受 MAX_ARCHIVE_DEPTH 限制，超过深度或损坏的内层归档按普通文件处理
+"""
+
+import io
+import shutil
+import struct
+import tempfile
+import zipfile
+from pathlib import Path
+from typing import BinaryIO, Iterator, List, Optional, Tuple
+
+# 作为容器递归展开的归档后缀
+ARCHIVE_SUFFIXES = {".apk", ".apks", ".xapk", ".aar", ".jar", ".zip"}
+
+# 归档最大展开层数（顶层归档为第 1 层）
+MAX_ARCHIVE_DEPTH = 3
+
+# 压缩存储的内层归档需整体解压后才能随机访问：不超过该大小时留在内存，更大的溢出到临时文件
+NESTED_ARCHIVE_MEMORY_BYTES = 16 * 1024 * 1024
+# 超过该大小的压缩内层归档不展开
+NESTED_ARCHIVE_MAX_BYTES = 256 * 1024 * 1024
+
+NESTED_SEP = "!/"
+
+_LOCAL_HEADER_SIG = b"PK\x03\x04"
+
+
+def is_archive_name(name: str) -> bool:
+    return Path(name).suffix.lower() in ARCHIVE_SUFFIXES
+
+
+class _EntryWindow(io.RawIOBase):
+    """外层文件中某个 STORED 条目的只读窗口，支持 seek，可直接交给 zipfile 作为内层归档的文件对象。"""
+
+    def __init__(self, fp: BinaryIO, start: int, size: int):
+        super().__init__()
+        self._fp = fp
+        self._start = start
+        self._size = size
+        self._pos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            pos = offset
+        elif whence == io.SEEK_CUR:
+            pos = self._pos + offset
+        elif whence == io.SEEK_END:
+            pos = self._size + offset
+        else:
+            raise ValueError(f"invalid whence: {whence}")
+        self._pos = min(max(pos, 0), self._size)
+        return self._pos
+
+    def readinto(self, b) -> int:
+        n = min(len(b), self._size - self._pos)
+        if n <= 0:
+            return 0
+        # 外层文件可能被其它条目共享，每次读取前重新定位
+        self._fp.seek(self._start + self._pos)
+        data = self._fp.read(n)
+        b[: len(data)] = data
+        self._pos += len(data)
+        return len(data)
+
+
+def _stored_data_offset(zf: zipfile.ZipFile, info: zipfile.ZipInfo) -> int:
+    fp = zf.fp
+    if fp is None:
+        raise zipfile.BadZipFile("归档已关闭")
+    fp.seek(info.header_offset)
+    header = fp.read(30)
+    if len(header) != 30 or header[:4] != _LOCAL_HEADER_SIG:
+        raise zipfile.BadZipFile(f"本地文件头损坏: {info.filename}")
+    name_len, extra_len = struct.unpack("<HH", header[26:30])
+    return info.header_offset + 30 + name_len + extra_len
+
+
+class _SpooledZipFile(zipfile.ZipFile):
+    """解压到 SpooledTemporaryFile 的内层归档，关闭时一并释放内存或临时文件。"""
+
+    def __init__(self, spool):
+        self._spool = spool
+        try:
+            super().__init__(spool, "r")
+        except BaseException:
+            spool.close()
+            raise
+
+    def close(self) -> None:
+        try:
+            super().close()
+        finally:
+            self._spool.close()
+
+
+def open_nested_zip(zf: zipfile.ZipFile, name: str) -> zipfile.ZipFile:
+    """打开 zf 中的内层归档；无法展开时抛出 zipfile.BadZipFile。"""
+    info = zf.getinfo(name)
+    if info.compress_type == zipfile.ZIP_STORED and not info.flag_bits & 0x1:
+        fileobj: BinaryIO = _EntryWindow(zf.fp, _stored_data_offset(zf, info), info.file_size)  # type: ignore[arg-type]
+        return zipfile.ZipFile(fileobj, "r")
+    if info.file_size > NESTED_ARCHIVE_MAX_BYTES:
+        raise zipfile.BadZipFile(f"内层归档过大，不展开: {name}")
+    spool = tempfile.SpooledTemporaryFile(max_size=NESTED_ARCHIVE_MEMORY_BYTES)
+    try:
+        with zf.open(info) as src:
+            shutil.copyfileobj(src, spool, 1 << 20)
+        spool.seek(0)
+    except BaseException:
+        spool.close()
+        raise
+    return _SpooledZipFile(spool)
+
+
+def iter_archive_members(zf: zipfile.ZipFile, prefix: str = "", depth: int = 1) -> Iterator[str]:
+    """递归枚举归档内的叶子条目（成员链），内层归档展开而不作为条目输出。"""
+    for info in zf.infolist():
+        if info.is_dir():
+            continue
+        name = prefix + info.filename
+        if depth < MAX_ARCHIVE_DEPTH and is_archive_name(info.filename):
+            try:
+                inner = open_nested_zip(zf, info.filename)
+            except (zipfile.BadZipFile, OSError, ValueError) as exc:
+                print(f"[archive] treat as plain file {name}: {exc}")
+                yield name
+                continue
+            with inner:
+                yield from iter_archive_members(inner, name + NESTED_SEP, depth + 1)
+            continue
+        yield name
+
+
+class ArchiveReader:
+    """
+    按成员链打开嵌套归档中的条目。
+    缓存当前链路上已打开的各层 ZipFile，同一内层归档的相邻条目只解析一次中央目录。
+    """
+
+    def __init__(self) -> None:
+        self._path: Optional[Path] = None
+        # [(成员链前缀, ZipFile)]，下标 0 为顶层归档
+        self._chain: List[Tuple[str, zipfile.ZipFile]] = []
+
+    def open(self, path: Path, member: str) -> BinaryIO:
+        parts = member.split(NESTED_SEP)
+        containers = parts[:-1]
+        if path != self._path:
+            self.close()
+            self._chain = [("", zipfile.ZipFile(path, "r"))]
+            self._path = path
+        keep = 1
+        while (
+            keep < len(self._chain)
+            and keep <= len(containers)
+            and self._chain[keep][0] == NESTED_SEP.join(containers[:keep])
+        ):
+            keep += 1
+        for _, zf in reversed(self._chain[keep:]):
+            zf.close()
+        del self._chain[keep:]
+        for depth in range(keep, len(containers) + 1):
+            parent = self._chain[-1][1]
+            self._chain.append((NESTED_SEP.join(containers[:depth]), open_nested_zip(parent, containers[depth - 1])))
+        return self._chain[-1][1].open(parts[-1])  # type: ignore[return-value]
+
+    def close(self) -> None:
+        for _, zf in reversed(self._chain):
+            zf.close()
+        self._chain = []
+        self._path = None
+
+    def __enter__(self) -> "ArchiveReader":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class ApkSession:
+    """
+    APK 单遍读取会话：只打开一次归档、解析一次中央目录，按条目在文件中的物理顺序顺序读取，
+    每个条目至多解压一次并以数据块形式同时分发给所有需要它的分析器。
+
+    分析器约定（鸭子类型）：
+    - accepts(name) -> bool：是否需要该条目（内层归档名返回 False 时不再展开）
+    - open_entry(name) -> sink 或 None：返回接收数据块的 sink（write(chunk)/close()）
+    内层归档会递归展开，条目名为 "!/" 成员链。
+    """
+
+    def __init__(self, path: Path, chunk_size: int = 1 << 20):
+        self.path = path
+        self.chunk_size = chunk_size
+        self._analyzers: List[object] = []
+
+    def register(self, analyzer: object) -> object:
+        self._analyzers.append(analyzer)
+        return analyzer
+
+    def run(self) -> None:
+        with zipfile.ZipFile(self.path, "r") as zf:
+            self._walk(zf, "", 1)
+
+    def _walk(self, zf: zipfile.ZipFile, prefix: str, depth: int) -> None:
+        for info in sorted(zf.infolist(), key=lambda i: i.header_offset):
+            if info.is_dir():
+                continue
+            name = prefix + info.filename
+            wanted = [a for a in self._analyzers if a.accepts(name)]  # type: ignore[attr-defined]
+            if not wanted:
+                continue
+            if depth < MAX_ARCHIVE_DEPTH and is_archive_name(info.filename):
+                try:
+                    inner = open_nested_zip(zf, info.filename)
+                except (zipfile.BadZipFile, OSError, ValueError) as exc:
+                    print(f"[archive] treat as plain file {name}: {exc}")
+                else:
+                    with inner:
+                        self._walk(inner, name + NESTED_SEP, depth + 1)
+                    continue
+            sinks = [s for s in (a.open_entry(name) for a in wanted) if s is not None]  # type: ignore[attr-defined]
+            if not sinks:
+                continue
+            with zf.open(info) as f:
+                while True:
+                    chunk = f.read(self.chunk_size)
+                    if not chunk:
+                        break
+                    for sink in sinks:
+                        sink.write(chunk)
+            for sink in sinks:
+                sink.close()
@@ -0,0 +1,208 @@
+"""
+二进制 AXML 解码：APK 内的 AndroidManifest.xml 以 AXML（Android 二进制 XML）存储，无法直接交给 ET 解析。
+- 纯 Python 实现，按 chunk 顺序单遍解码，只解析字符串池、资源 ID 表与元素节点
+- 直接产出元素事件并构建 ET.Element 树（属性键与文本 XML 一致，如 {http://schemas.android.com/apk/res/android}name），
+  不生成中间 XML 文本
+- 字符串池按需解码并缓存；属性名被混淆为空串时按资源 ID 还原常用 android 属性
+"""
+
+import struct
+import xml.etree.ElementTree as ET
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# ResChunk_header.type
+_RES_STRING_POOL_TYPE = 0x0001
+_RES_XML_TYPE = 0x0003
+_RES_XML_START_ELEMENT_TYPE = 0x0102
+_RES_XML_END_ELEMENT_TYPE = 0x0103
+_RES_XML_RESOURCE_MAP_TYPE = 0x0180
+
+_UTF8_FLAG = 1 << 8
+_NO_INDEX = 0xFFFFFFFF
+
+# Res_value.dataType
+_TYPE_REFERENCE = 0x01
+_TYPE_ATTRIBUTE = 0x02
+_TYPE_STRING = 0x03
+_TYPE_FLOAT = 0x04
+_TYPE_INT_DEC = 0x10
+_TYPE_INT_HEX = 0x11
+_TYPE_INT_BOOLEAN = 0x12
+
+ANDROID_NS_URI = "http://schemas.android.com/apk/res/android"
+
+# 混淆后属性名为空时按资源 ID 还原（仅规则会用到的常用属性）
+_ANDROID_ATTR_BY_RES_ID = {
+    0x01010001: "label",
+    0x01010003: "name",
+    0x01010006: "permission",
+    0x0101000E: "enabled",
+    0x01010010: "exported",
+    0x01010018: "authorities",
+    0x01010024: "value",
+    0x01010025: "resource",
+    0x0101020C: "minSdkVersion",
+    0x01010270: "targetSdkVersion",
+}
+
+_CHUNK_HEADER = struct.Struct("<HHI")
+_START_ELEMENT_EXT = struct.Struct("<IIHHH")
+_ATTRIBUTE = struct.Struct("<IIIHBBI")
+_END_ELEMENT_EXT = struct.Struct("<II")
+
+# (事件, 标签, 属性)；end 事件的属性为空字典
+AxmlEvent = Tuple[str, str, Dict[str, str]]
+
+
+class AxmlError(Exception):
+    """AXML 格式异常。"""
+
+
+def is_axml(data: bytes) -> bool:
+    return len(data) >= 8 and struct.unpack_from("<HH", data, 0) == (_RES_XML_TYPE, 8)
+
+
+class _StringPool:
+    """ResStringPool：偏移表一次性解包，字符串在首次访问时解码。"""
+
+    def __init__(self, data: bytes, start: int, header_size: int, size: int):
+        count, _styles, flags, strings_start, _styles_start = struct.unpack_from("<IIIII", data, start + 8)
+        if start + header_size + count * 4 > start + size:
+            raise AxmlError("字符串池偏移表越界")
+        self._data = data
+        self._utf8 = bool(flags & _UTF8_FLAG)
+        self._base = start + strings_start
+        self._end = start + size
+        self._offsets = struct.unpack_from(f"<{count}I", data, start + header_size)
+        self._cache: List[Optional[str]] = [None] * count
+
+    def get(self, idx: int) -> str:
+        if idx == _NO_INDEX or idx >= len(self._cache):
+            return ""
+        cached = self._cache[idx]
+        if cached is None:
+            cached = self._decode(self._base + self._offsets[idx])
+            self._cache[idx] = cached
+        return cached
+
+    def _decode(self, pos: int) -> str:
+        data = self._data
+        if pos >= self._end:
+            raise AxmlError("字符串偏移越界")
+        if self._utf8:
+            # utf16 长度与 utf8 字节长度，各 1~2 字节（高位为扩展标记）
+            pos += 2 if data[pos] & 0x80 else 1
+            length = data[pos]
+            if length & 0x80:
+                length = ((length & 0x7F) << 8) | data[pos + 1]
+                pos += 2
+            else:
+                pos += 1
+            return data[pos : pos + length].decode("utf-8", errors="replace")
+        length = struct.unpack_from("<H", data, pos)[0]
+        if length & 0x8000:
+            length = ((length & 0x7FFF) << 16) | struct.unpack_from("<H", data, pos + 2)[0]
+            pos += 4
+        else:
+            pos += 2
+        return data[pos : pos + length * 2].decode("utf-16-le", errors="replace")
+
+
+def _format_value(pool: _StringPool, raw_idx: int, data_type: int, value: int) -> str:
+    if raw_idx != _NO_INDEX:
+        return pool.get(raw_idx)
+    if data_type == _TYPE_STRING:
+        return pool.get(value)
+    if data_type == _TYPE_INT_BOOLEAN:
+        return "true" if value else "false"
+    if data_type == _TYPE_INT_DEC:
+        return str(value - (1 << 32) if value & 0x80000000 else value)
+    if data_type == _TYPE_INT_HEX:
+        return f"0x{value:08x}"
+    if data_type == _TYPE_REFERENCE:
+        return f"@0x{value:08x}"
+    if data_type == _TYPE_ATTRIBUTE:
+        return f"?0x{value:08x}"
+    if data_type == _TYPE_FLOAT:
+        return repr(struct.unpack("<f", struct.pack("<I", value))[0])
+    return str(value)
+
+
+def iter_events(data: bytes) -> Iterator[AxmlEvent]:
+    """按文档顺序产出 ("start", tag, attrib) / ("end", tag, {}) 事件；结构损坏时抛出 AxmlError。"""
+    if not is_axml(data):
+        raise AxmlError("不是 AXML 格式")
+    total = min(struct.unpack_from("<I", data, 4)[0], len(data))
+    pool: Optional[_StringPool] = None
+    res_ids: Tuple[int, ...] = ()
+    # (命名空间下标, 属性名下标) → 属性键，同名属性在各元素间反复出现
+    keys: Dict[Tuple[int, int], str] = {}
+    unpack_attr = _ATTRIBUTE.unpack_from
+    pos = 8
+    try:
+        while pos + 8 <= total:
+            ctype, header_size, size = _CHUNK_HEADER.unpack_from(data, pos)
+            if size < 8 or pos + size > total:
+                raise AxmlError(f"chunk 越界: offset={pos}")
+            if ctype == _RES_STRING_POOL_TYPE:
+                pool = _StringPool(data, pos, header_size, size)
+            elif ctype == _RES_XML_RESOURCE_MAP_TYPE:
+                res_ids = struct.unpack_from(f"<{(size - header_size) // 4}I", data, pos + header_size)
+            elif ctype == _RES_XML_START_ELEMENT_TYPE:
+                if pool is None:
+                    raise AxmlError("缺少字符串池")
+                ext = pos + header_size
+                ns_idx, name_idx, attr_start, attr_size, attr_count = _START_ELEMENT_EXT.unpack_from(data, ext)
+                attrib: Dict[str, str] = {}
+                apos = ext + attr_start
+                for _ in range(attr_count):
+                    a_ns, a_name, a_raw, _vsize, _res0, a_type, a_data = unpack_attr(data, apos)
+                    apos += attr_size
+                    key = keys.get((a_ns, a_name))
+                    if key is None:
+                        key = keys[(a_ns, a_name)] = _attr_key(pool, res_ids, a_ns, a_name)
+                    if key:
+                        attrib[key] = _format_value(pool, a_raw, a_type, a_data)
+                yield "start", _qualify(pool, ns_idx, name_idx), attrib
+            elif ctype == _RES_XML_END_ELEMENT_TYPE:
+                if pool is None:
+                    raise AxmlError("缺少字符串池")
+                ns_idx, name_idx = _END_ELEMENT_EXT.unpack_from(data, pos + header_size)
+                yield "end", _qualify(pool, ns_idx, name_idx), {}
+            # 命名空间/CDATA 等节点不影响规则匹配，直接跳过
+            pos += size
+    except struct.error as exc:
+        raise AxmlError(f"AXML 结构损坏: {exc}") from exc
+
+
+def _attr_key(pool: _StringPool, res_ids: Tuple[int, ...], ns_idx: int, name_idx: int) -> str:
+    name = pool.get(name_idx)
+    if not name and name_idx < len(res_ids):
+        name = _ANDROID_ATTR_BY_RES_ID.get(res_ids[name_idx], "")
+    if not name:
+        return ""
+    return f"{{{pool.get(ns_idx)}}}{name}" if ns_idx != _NO_INDEX else name
+
+
+def _qualify(pool: _StringPool, ns_idx: int, name_idx: int) -> str:
+    name = pool.get(name_idx)
+    return f"{{{pool.get(ns_idx)}}}{name}" if ns_idx != _NO_INDEX else name
+
+
+def parse(data: bytes) -> ET.Element:
+    """解码 AXML 并返回根元素，元素/属性命名与 ET 解析等价的文本 XML 一致。"""
+    builder = ET.TreeBuilder()
+    depth = 0
+    for event, tag, attrib in iter_events(data):
+        if event == "start":
+            builder.start(tag, attrib)
+            depth += 1
+        elif depth:
+            builder.end(tag)
+            depth -= 1
+    if depth:
+        raise AxmlError("AXML 元素未闭合")
+    root = builder.close()
+    if root is None:
+        raise AxmlError("AXML 中没有元素")
+    return root
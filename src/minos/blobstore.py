@@ -0,0 +1,202 @@
+"""
+规则包内容寻址存储：规则包中的文件按内容 sha256 存放在缓存根目录的 .blobs/ 下，
+各版本目录中的文件是指向 blob 的硬链接。
+- 跨版本、跨法规未变化的文件只占一份磁盘空间，安装时已存在的 blob 不再写盘
+- blob 的引用计数即硬链接数：st_nlink == 1 表示已无版本引用，cleanup 后由 gc 回收
+- 文件系统不支持硬链接（跨设备等）时退回复制，复制出的文件不引用 blob，gc 照常回收
+- 写 blob/建链接持存储读锁，gc 持写锁，避免回收刚写入尚未链接的 blob
+布局：<cache_root>/.blobs/<sha256[:2]>/<sha256>
+"""
+
+import hashlib
+import os
+import shutil
+import tarfile
+import tempfile
+from pathlib import Path, PurePosixPath
+from typing import Dict, Optional
+
+from minos.filelock import FileLock
+
+STORE_DIR = ".blobs"
+
+# 小于该大小的成员直接在内存中哈希，已有 blob 时完全不写盘
+_INLINE_LIMIT = 4 * 1024 * 1024
+_BUFFER_SIZE = 1024 * 1024
+
+
+class BlobStoreError(Exception):
+    """规则包内容存储异常。"""
+
+
+def store_dir(cache_root: Path) -> Path:
+    return cache_root / STORE_DIR
+
+
+def _lock(store: Path, shared: bool) -> FileLock:
+    return FileLock(store / ".lock", shared=shared)
+
+
+def blob_path(store: Path, digest: str) -> Path:
+    return store / digest[:2] / digest
+
+
+def safe_member_path(name: str) -> Optional[PurePosixPath]:
+    """拒绝绝对路径与 .. 穿越，返回规范化后的相对路径（空路径返回 None）。"""
+    path = PurePosixPath(name)
+    if path.is_absolute() or ".." in path.parts:
+        raise BlobStoreError(f"规则包包含非法路径: {name}")
+    parts = [p for p in path.parts if p not in ("", ".")]
+    return PurePosixPath(*parts) if parts else None
+
+
+def _temp_file(directory: Path):
+    # 每次调用唯一的临时文件：同一进程内多个同步线程共享同一存储，不能只按 pid 命名
+    fd, name = tempfile.mkstemp(prefix=".incoming.", suffix=".tmp", dir=directory)
+    return Path(name), os.fdopen(fd, "wb")
+
+
+def _put_bytes(store: Path, data: bytes) -> str:
+    digest = hashlib.sha256(data).hexdigest()
+    blob = blob_path(store, digest)
+    if not blob.exists():
+        blob.parent.mkdir(parents=True, exist_ok=True)
+        tmp, out = _temp_file(blob.parent)
+        try:
+            with out:
+                out.write(data)
+            _seal(tmp, blob)
+        except BaseException:
+            tmp.unlink(missing_ok=True)
+            raise
+    return digest
+
+
+def _put_stream(store: Path, src) -> str:
+    h = hashlib.sha256()
+    buf = bytearray(_BUFFER_SIZE)
+    view = memoryview(buf)
+    tmp, out = _temp_file(store)
+    try:
+        with out:
+            while True:
+                n = src.readinto(buf)
+                if not n:
+                    break
+                h.update(view[:n])
+                out.write(view[:n])
+        digest = h.hexdigest()
+        blob = blob_path(store, digest)
+        if blob.exists():
+            tmp.unlink()
+        else:
+            blob.parent.mkdir(parents=True, exist_ok=True)
+            _seal(tmp, blob)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    return digest
+
+
+def _seal(tmp: Path, blob: Path) -> None:
+    # blob 只读：经硬链接原地改写会影响所有版本，规则文件的更新须走临时文件 + rename
+    os.chmod(tmp, 0o444)
+    os.replace(tmp, blob)
+
+
+def _link(blob: Path, dest: Path) -> bool:
+    """在 dest 建立指向 blob 的硬链接；不支持时复制并返回 False。"""
+    try:
+        os.link(blob, dest)
+        return True
+    except OSError:
+        shutil.copyfile(blob, dest)
+        return False
+
+
+def install_tar(tar_path: Path, target_dir: Path, store: Path) -> Dict[str, int]:
+    """
+    将 tar.gz 规则包安装到 target_dir：文件内容写入（或复用）store 中的 blob，再硬链接到目标路径。
+    仅安装普通文件与目录，其它成员（符号链接、设备文件等）跳过。
+    返回统计：files（文件数）、reused（复用已有 blob 数）、linked（硬链接数）。
+    """
+    stats = {"files": 0, "reused": 0, "linked": 0}
+    store.mkdir(parents=True, exist_ok=True)
+    target_dir.mkdir(parents=True, exist_ok=True)
+    with _lock(store, shared=True), tarfile.open(tar_path, "r:gz") as tar:
+        for member in tar:
+            rel = safe_member_path(member.name)
+            if rel is None:
+                continue
+            dest = target_dir.joinpath(*rel.parts)
+            if member.isdir():
+                dest.mkdir(parents=True, exist_ok=True)
+                continue
+            if not member.isfile():
+                print(f"[rulesync] skip non-regular member {member.name}")
+                continue
+            src = tar.extractfile(member)
+            if src is None:
+                continue
+            with src:
+                if member.size <= _INLINE_LIMIT:
+                    data = src.read()
+                    digest = hashlib.sha256(data).hexdigest()
+                    existed = blob_path(store, digest).exists()
+                    if not existed:
+                        _put_bytes(store, data)
+                else:
+                    existed = False
+                    digest = _put_stream(store, src)
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            if dest.exists() or dest.is_symlink():
+                dest.unlink()
+            stats["files"] += 1
+            stats["reused"] += int(existed)
+            stats["linked"] += int(_link(blob_path(store, digest), dest))
+    return stats
+
+
+def add_stream(store: Path, src, dest: Path) -> str:
+    """将文件对象 src 的全部内容存为 blob 并链接到 dest（整包入库等非 tar 成员场景），返回内容 sha256。"""
+    store.mkdir(parents=True, exist_ok=True)
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    with _lock(store, shared=True):
+        digest = _put_stream(store, src)
+        _link(blob_path(store, digest), dest)
+    return digest
+
+
+def add_file(store: Path, src_path: Path, dest: Path) -> str:
+    """同 add_stream，内容取自文件 src_path。"""
+    with src_path.open("rb") as src:
+        return add_stream(store, src, dest)
+
+
+def gc(store: Path) -> Dict[str, int]:
+    """回收不再被任何版本目录引用（硬链接数为 1）的 blob，返回 removed 数量与释放字节数 freed。"""
+    stats = {"removed": 0, "freed": 0}
+    if not store.is_dir():
+        return stats
+    with _lock(store, shared=False):
+        for bucket in store.iterdir():
+            if not bucket.is_dir():
+                continue
+            for blob in bucket.iterdir():
+                try:
+                    st = blob.stat()
+                except OSError:
+                    continue
+                if st.st_nlink > 1:
+                    continue
+                try:
+                    blob.unlink()
+                except OSError:
+                    continue
+                stats["removed"] += 1
+                stats["freed"] += st.st_size
+            try:
+                bucket.rmdir()
+            except OSError:
+                pass
+    return stats
@@ -0,0 +1,179 @@
+"""
+规则缓存回收策略：按最近使用时间与容量预算选择要淘汰的版本，取代按版本名保留最新 N 个的做法。
+- scan 解析到某版本时更新 <version>/.last_access 的 mtime（尽力而为，ACCESS_RESOLUTION 内不重复写）
+- 最近使用时间取 .last_access，没有访问记录时取安装时间（metadata.json 的 mtime）
+- 激活版本（ACTIVE）与固定版本（法规目录下 PINNED 文件，每行一个版本）永不淘汰
+- max_age：超过该时长未使用的版本淘汰；max_bytes：各版本目录的总占用（按 inode 去重，
+  多个版本硬链接的同一 blob 只计一次）超出预算时，从最久未使用的版本起淘汰直至不超预算
+本模块只做统计与选择；版本目录的移出、删除与 blob 回收由 rulesync 在法规写锁下执行。
+"""
+
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from minos import rules_index
+
+ACCESS_FILE = ".last_access"
+PINNED_FILE = "PINNED"
+
+# 访问时间精度：该时长内重复解析同一版本不再写盘
+ACCESS_RESOLUTION = 60.0
+
+
+def touch(version_dir: Path) -> None:
+    """记录版本最近一次被使用；只读缓存目录等写入失败时静默忽略。"""
+    marker = version_dir / ACCESS_FILE
+    now = time.time()
+    try:
+        if now - marker.stat().st_mtime < ACCESS_RESOLUTION:
+            return
+    except OSError:
+        pass
+    try:
+        marker.touch()
+    except OSError:
+        pass
+
+
+def last_used(version_dir: Path) -> float:
+    for candidate in (version_dir / ACCESS_FILE, version_dir / "metadata.json", version_dir):
+        try:
+            return candidate.stat().st_mtime
+        except OSError:
+            continue
+    return 0.0
+
+
+def read_pins(reg_dir: Path) -> Set[str]:
+    try:
+        text = (reg_dir / PINNED_FILE).read_text(encoding="utf-8")
+    except OSError:
+        return set()
+    return {line.strip() for line in text.splitlines() if line.strip()}
+
+
+def write_pins(reg_dir: Path, pins: Iterable[str]) -> None:
+    """原子改写固定版本列表（调用方持法规写锁）；为空时删除 PINNED。"""
+    pins = sorted(set(pins))
+    if not pins:
+        (reg_dir / PINNED_FILE).unlink(missing_ok=True)
+        return
+    rules_index._atomic_write_text(reg_dir / PINNED_FILE, "\n".join(pins) + "\n")
+
+
+def protected_versions(reg_dir: Path) -> Set[str]:
+    """激活版本与固定版本。"""
+    protected = read_pins(reg_dir)
+    active = rules_index.read_active(reg_dir)
+    if active:
+        protected.add(active)
+    return protected
+
+
+def regulation_dirs(cache_root: Path) -> List[str]:
+    """缓存根目录下由 rulesync 管理的法规目录（索引中登记或有 ACTIVE 指针），不碰其它目录。"""
+    names = set(rules_index.load_index(cache_root)["regulations"])
+    if cache_root.is_dir():
+        for sub in cache_root.iterdir():
+            if not sub.name.startswith(".") and (sub / rules_index.ACTIVE_FILE).exists():
+                names.add(sub.name)
+    return sorted(n for n in names if (cache_root / n).is_dir())
+
+
+def _files(root: Path) -> Iterable[os.stat_result]:
+    # os.scandir 递归：DirEntry 自带类型信息，目录项只 lstat 一次
+    stack = [str(root)]
+    while stack:
+        try:
+            it = os.scandir(stack.pop())
+        except OSError:
+            continue
+        with it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    else:
+                        yield entry.stat(follow_symlinks=False)
+                except OSError:
+                    continue
+
+
+def scan_versions(reg_dir: Path, versions: Iterable[str], usage: bool = False) -> List[Dict[str, Any]]:
+    """
+    统计 reg_dir 下各版本：regulation、version、last_used、protected；
+    usage=True 时额外记录 inodes（(dev, ino) → (大小, 引用该内容的版本文件数)），供容量预算计算。
+    """
+    protected = protected_versions(reg_dir)
+    records = []
+    for version in versions:
+        version_dir = reg_dir / version
+        record: Dict[str, Any] = {
+            "regulation": reg_dir.name,
+            "version": version,
+            "last_used": last_used(version_dir),
+            "protected": version in protected,
+        }
+        if usage:
+            inodes: Dict[tuple, tuple] = {}
+            for st in _files(version_dir):
+                # 硬链接数减去 blob 自身的一个链接，即引用该内容的版本文件数；复制出的文件为 1
+                inodes[(st.st_dev, st.st_ino)] = (st.st_size, max(st.st_nlink - 1, 1))
+            record["inodes"] = inodes
+        records.append(record)
+    return records
+
+
+def plan_eviction(
+    records: List[Dict[str, Any]],
+    keep: Optional[int] = None,
+    max_bytes: Optional[int] = None,
+    max_age: Optional[float] = None,
+    now: Optional[float] = None,
+) -> Dict[str, Any]:
+    """
+    选择淘汰的版本，返回 victims（记录列表，按最近使用时间从旧到新）与 freed（预计释放字节数，仅 max_bytes 时统计）。
+    - keep：只保留最近使用的 keep 个版本（受保护版本另外保留）
+    - max_age：最近使用早于 now - max_age 秒的淘汰
+    - max_bytes：总占用超出预算时按最近使用时间从旧到新继续淘汰
+    """
+    now = time.time() if now is None else now
+    ordered = sorted(records, key=lambda r: (r["last_used"], r["version"]))
+    doomed: Set[int] = set()
+    if keep is not None and keep > 0:
+        doomed.update(range(max(len(ordered) - keep, 0)))
+    if max_age is not None:
+        doomed.update(i for i, r in enumerate(ordered) if now - r["last_used"] > max_age)
+    doomed = {i for i in doomed if not ordered[i]["protected"]}
+
+    freed = 0
+    if max_bytes is not None:
+        sizes: Dict[tuple, int] = {}
+        refs: Dict[tuple, int] = {}
+        for r in ordered:
+            for key, (size, nlink) in r.get("inodes", {}).items():
+                sizes[key] = size
+                refs[key] = nlink
+        total = sum(sizes.values())
+
+        def _release(record: Dict[str, Any]) -> int:
+            # 内容的最后一个版本引用被淘汰时才真正释放（blob 随后由 gc 回收）
+            released = 0
+            for key in record.get("inodes", {}):
+                refs[key] -= 1
+                if refs[key] == 0:
+                    released += sizes[key]
+            return released
+
+        for i in sorted(doomed):
+            freed += _release(ordered[i])
+        for i, r in enumerate(ordered):
+            if total - freed <= max_bytes:
+                break
+            if i in doomed or r["protected"]:
+                continue
+            doomed.add(i)
+            freed += _release(r)
+    return {"victims": [ordered[i] for i in sorted(doomed)], "freed": freed}
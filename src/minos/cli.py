@@ -1,16 +1,25 @@
 """
 Minos CLI 入口（rulesync 子命令）。
+子命令处理函数按需导入扫描/同步模块（tarfile/urllib/xml/zipfile 等），
+`minos --help`、`minos scan --help` 等只加载 argparse，冷启动开销见 scripts/bench_cli_startup.py。
 """
 
 import argparse
 import json
-import logging
-from datetime import datetime, timezone
-from logging.handlers import RotatingFileHandler
 import sys
 from pathlib import Path
 
-from minos import manifest_scanner, rulesync, rulesync_convert, sdk_scanner
+
+_SIZE_UNITS = {"": 1, "K": 1024, "M": 1024**2, "G": 1024**3, "T": 1024**4}
+
+
+def _parse_size(text: str) -> int:
+    value = text.strip().upper().removesuffix("B").removesuffix("I")
+    unit = value[-1:] if value[-1:] in _SIZE_UNITS else ""
+    try:
+        return int(float(value[: len(value) - len(unit)]) * _SIZE_UNITS[unit])
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"无效的容量: {text}")
 
 
 def _add_rulesync_parser(subparsers: argparse._SubParsersAction) -> None:
@@ -32,7 +41,7 @@ def _add_rulesync_parser(subparsers: argparse._SubParsersAction) -> None:
         "--cache-dir",
         dest="cache_dir",
         default="~/.minos/rules",
-        help="规则缓存目录（默认 ~/.minos/rules）",
+        help="规则缓存目录（默认 ~/.minos/rules；指定 --regulation 时为缓存根目录，其下按法规分目录）",
     )
     parser.add_argument(
         "--offline",
@@ -56,6 +65,25 @@ def _add_rulesync_parser(subparsers: argparse._SubParsersAction) -> None:
         default=30,
         help="下载超时（秒，默认 30）",
     )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=4,
+        help="多法规并发同步数（默认 4，1 表示顺序同步）",
+    )
+    parser.add_argument(
+        "--per-host",
+        dest="per_host",
+        type=int,
+        default=2,
+        help="同一主机的并发下载连接上限（默认 2）",
+    )
+    parser.add_argument(
+        "--no-extract",
+        dest="no_extract",
+        action="store_true",
+        help="直读模式：不解压规则包，scan 按成员偏移直接从缓存的规则包读取（支持 tar.gz/zip）",
+    )
     parser.add_argument(
         "--rollback-to",
         dest="rollback_to",
@@ -67,6 +95,41 @@ def _add_rulesync_parser(subparsers: argparse._SubParsersAction) -> None:
         type=int,
         help="同步后保留的版本数量（清理旧版本，默认不清理）",
     )
+    parser.add_argument(
+        "--cache-max-bytes",
+        dest="cache_max_bytes",
+        type=_parse_size,
+        help=(
+            "缓存容量预算（如 500M、2G），超出时从最久未使用的版本起淘汰（激活/固定版本除外）；"
+            "只统计法规版本目录，OCI 层缓存 .oci/ 与 git 镜像 .git-mirrors/ 不计入也不回收"
+        ),
+    )
+    parser.add_argument(
+        "--cache-max-age",
+        dest="cache_max_age",
+        type=float,
+        help="淘汰超过该天数未被 scan 使用的版本（激活/固定版本除外）",
+    )
+    parser.add_argument(
+        "--gc",
+        action="store_true",
+        help="只按 --cache-max-bytes/--cache-max-age 回收缓存（--cache-dir 为缓存根目录），不同步",
+    )
+    parser.add_argument(
+        "--background",
+        action="store_true",
+        help="与 --gc 同用：在后台进程中回收，命令立即返回",
+    )
+    parser.add_argument(
+        "--pin",
+        dest="pin",
+        help="固定版本（回收时永不淘汰），配合 --regulation 使用",
+    )
+    parser.add_argument(
+        "--unpin",
+        dest="unpin",
+        help="取消固定版本，配合 --regulation 使用",
+    )
     parser.add_argument(
         "--import-yaml",
         dest="import_yaml",
@@ -138,7 +201,7 @@ def _add_scan_parser(subparsers: argparse._SubParsersAction) -> None:
     parser.add_argument("--format", choices=["html", "json", "both"], default="both", help="报告格式")
     parser.add_argument("--output-dir", dest="output_dir", default="output/reports", help="报告输出目录")
     parser.add_argument("--report-name", dest="report_name", default="scan", help="报告文件前缀")
-    parser.add_argument("--threads", type=int, default=4, help="并行度（默认4）")
+    parser.add_argument("--threads", type=int, default=4, help="并行度（默认4，源码扫描按文件批次、多个 APK 按 APK 分发到多进程）")
     parser.add_argument("--timeout", type=int, help="全局超时（秒，可选）")
     parser.add_argument("--log-level", dest="log_level", default="info", choices=["debug", "info", "warn", "error"], help="日志级别")
     parser.add_argument("--log-file", dest="log_file", help="可选日志文件路径")
@@ -147,6 +210,26 @@ def _add_scan_parser(subparsers: argparse._SubParsersAction) -> None:
     parser.add_argument("--config", dest="config", help="配置文件路径（可选）")
     parser.add_argument("--rules-dir", dest="rules_dir", help="规则加载根目录（默认 ~/.minos/rules）")
     parser.add_argument("--rules-version", dest="rules_version", help="规则版本（可选，不填则取 active 或最新）")
+    parser.add_argument(
+        "--scan-cache-dir",
+        dest="scan_cache_dir",
+        default="~/.minos/scan-cache",
+        help="扫描结果缓存目录（默认 ~/.minos/scan-cache，按文件内容哈希+规则指纹复用结果）",
+    )
+    parser.add_argument("--no-cache", dest="no_cache", action="store_true", help="禁用扫描结果缓存，强制全量扫描")
+    parser.add_argument(
+        "--exclude",
+        dest="excludes",
+        action="append",
+        help="源码扫描额外排除模式（gitignore 语法，可多次传入；默认已遵循 .gitignore/.minosignore）",
+    )
+    parser.add_argument(
+        "--max-file-size",
+        dest="max_file_size",
+        type=int,
+        default=None,
+        help="源码扫描单文件大小上限（字节，默认或 0 表示不限制；超过上限的文件跳过并打印）",
+    )
     parser.set_defaults(handler=_handle_scan)
 
 
@@ -190,7 +273,20 @@ def _write_report(output_dir: Path, report_name: str, data: dict, fmt: str) -> N
         (output_dir / f"{report_name}.html").write_text(html)
 
 
+def _merge_stats(stats_all: dict, stats: dict) -> None:
+    for reg, cnt in stats["count_by_regulation"].items():
+        stats_all["count_by_regulation"][reg] = stats_all["count_by_regulation"].get(reg, 0) + cnt
+    for sev, cnt in stats["count_by_severity"].items():
+        stats_all["count_by_severity"][sev] = stats_all["count_by_severity"].get(sev, 0) + cnt
+
+
 def _handle_scan(args: argparse.Namespace) -> int:
+    import logging
+    from logging.handlers import RotatingFileHandler
+
+    from minos import apk_scanner, cachegc, manifest_scanner, rulepack, rules_index, sdk_scanner
+    from minos.ruleset import RuleSet, compile_ruleset, load_ruleset
+
     # 日志初始化
     log_level = getattr(logging, args.log_level.upper(), logging.INFO)
     logging.basicConfig(
@@ -252,47 +348,32 @@ def _handle_scan(args: argparse.Namespace) -> int:
                 rules_dir = Path(rules_dir_arg).expanduser()
                 if not rules_dir.exists():
                     raise FileNotFoundError(f"规则目录不存在: {rules_dir}")
-                all_rules: list[dict] = []
+                rulesets: list[RuleSet] = []
                 loaded_regs: list[str] = []
 
-                def _select_version(reg_dir: Path, preferred: str | None) -> str:
-                    if preferred:
-                        cand = reg_dir / preferred
-                        if (cand / "rules.yaml").exists():
-                            return preferred
-                    active = None
-                    for sub in reg_dir.iterdir():
-                        meta = sub / "metadata.json"
-                        if meta.exists():
-                            try:
-                                data = json.loads(meta.read_text(encoding="utf-8"))
-                                if data.get("active"):
-                                    active = sub.name
-                                    break
-                            except Exception:
-                                continue
-                    if active:
-                        return active
-                    versions = sorted([p.name for p in reg_dir.iterdir() if p.is_dir()])
-                    if not versions:
-                        raise FileNotFoundError(f"未找到 {reg_dir} 下的规则版本")
-                    return versions[-1]
-
+                # 激活版本解析：一次读取缓存索引，不遍历版本目录/metadata.json
+                index = rules_index.load_index(rules_dir)
+                preferred = args.rules_version.lower() if args.rules_version else None
                 for reg in regulations:
-                    reg_dir = rules_dir / reg
-                    if not reg_dir.exists():
-                        raise FileNotFoundError(f"未找到法规 {reg} 的规则目录: {reg_dir}")
-                    version = _select_version(reg_dir, args.rules_version.lower() if args.rules_version else None)
-                    rules_path = reg_dir / version / "rules.yaml"
-                    if not rules_path.exists():
-                        raise FileNotFoundError(f"未找到规则文件: {rules_path}")
-                    loaded_regs.append(reg)
-                    all_rules.extend(manifest_scanner.load_rules_from_yaml(rules_path))
+                    if not (rules_dir / reg).is_dir():
+                        raise FileNotFoundError(f"未找到法规 {reg} 的规则目录: {rules_dir / reg}")
+                    # 读锁：并发的 rulesync 安装/清理不会在解析与加载之间删除或改写该法规的规则
+                    with rules_index.cache_lock(rules_dir / reg, shared=True):
+                        version, rules_path = rules_index.resolve_rules(index, rules_dir, reg, preferred)
+                        if not rulepack.exists(rules_path):
+                            raise FileNotFoundError(f"未找到规则文件: {rules_path}")
+                        logging.info("rules resolved regulation=%s version=%s path=%s", reg, version, rules_path)
+                        # 记录最近使用时间，供缓存回收按访问时间淘汰
+                        cachegc.touch(rules_dir / reg / version)
+                        loaded_regs.append(reg)
+                        # rules.compiled 与 YAML 内容哈希一致时跳过 YAML 解析
+                        rulesets.append(load_ruleset(rules_path))
+                all_rules = RuleSet.merge(rulesets)
                 if not all_rules:
                     raise ValueError("未加载到任何规则")
             else:
                 # 使用内置默认规则兜底
-                all_rules = manifest_scanner.load_default_rules() + sdk_scanner.load_default_rules()
+                all_rules = compile_ruleset(manifest_scanner.load_default_rules() + sdk_scanner.load_default_rules())
                 regulations = regulations or ["default"]
         except Exception as exc:
             sys.stderr.write(f"[scan] 规则加载失败: {exc}\n")
@@ -303,23 +384,41 @@ def _handle_scan(args: argparse.Namespace) -> int:
             try:
                 f, s = manifest_scanner.scan_manifest(Path(manifest_path), all_rules, {})
                 findings_all.extend(f)
-                for reg, cnt in s["count_by_regulation"].items():
-                    stats_all["count_by_regulation"][reg] = stats_all["count_by_regulation"].get(reg, 0) + cnt
-                for sev, cnt in s["count_by_severity"].items():
-                    stats_all["count_by_severity"][sev] = stats_all["count_by_severity"].get(sev, 0) + cnt
+                _merge_stats(stats_all, s)
             except Exception as exc:
                 sys.stderr.write(f"[scan] Manifest 扫描失败: {exc}\n")
                 return 2
 
+        # APK 单遍扫描：Manifest 与 SDK/API/字符串分析共享一次读取；多个 APK 按 --threads 并行，与源码扫描共用扫描缓存
+        if needs_apk and apks:
+            try:
+                for f, s in apk_scanner.scan_apks(
+                    [Path(p) for p in apks],
+                    all_rules,
+                    {},
+                    workers=max(args.threads, 1),
+                    cache_dir=None if args.no_cache else Path(args.scan_cache_dir).expanduser(),
+                ):
+                    findings_all.extend(f)
+                    _merge_stats(stats_all, s)
+            except Exception as exc:
+                sys.stderr.write(f"[scan] APK 扫描失败: {exc}\n")
+                return 2
+
         # SDK/源码扫描（源码目录或输入文件）
         if needs_src and inputs:
             try:
-                f, s = sdk_scanner.scan_sdk_api([Path(p) for p in inputs], all_rules, source_flags={})
+                f, s = sdk_scanner.scan_sdk_api(
+                    [Path(p) for p in inputs],
+                    all_rules,
+                    source_flags={},
+                    workers=max(args.threads, 1),
+                    cache_dir=None if args.no_cache else Path(args.scan_cache_dir).expanduser(),
+                    excludes=args.excludes,
+                    max_file_size=args.max_file_size or None,
+                )
                 findings_all.extend(f)
-                for reg, cnt in s["count_by_regulation"].items():
-                    stats_all["count_by_regulation"][reg] = stats_all["count_by_regulation"].get(reg, 0) + cnt
-                for sev, cnt in s["count_by_severity"].items():
-                    stats_all["count_by_severity"][sev] = stats_all["count_by_severity"].get(sev, 0) + cnt
+                _merge_stats(stats_all, s)
             except Exception as exc:
                 sys.stderr.write(f"[scan] SDK 扫描失败: {exc}\n")
                 return 2
@@ -367,6 +466,10 @@ def _handle_scan(args: argparse.Namespace) -> int:
 
 
 def _handle_rulesync(args: argparse.Namespace) -> int:
+    from datetime import datetime, timezone
+
+    from minos import rules_index, rulesync, rulesync_convert, syncpool
+
     cache_dir = Path(args.cache_dir).expanduser()
     retries = max(args.retries, 0)
     attempt = 0
@@ -397,6 +500,65 @@ def _handle_rulesync(args: argparse.Namespace) -> int:
         host = urlparse(src).hostname or ""
         return host in allow_hosts
 
+    def _gc(cache_root: Path, regulations: list[str] | None = None) -> None:
+        if args.cache_max_bytes is None and args.cache_max_age is None:
+            return
+        max_age = args.cache_max_age * 86400 if args.cache_max_age is not None else None
+        rulesync.gc_cache(cache_root, max_bytes=args.cache_max_bytes, max_age=max_age, regulations=regulations)
+
+    def _gc_regulation(reg_dir: Path, cache_root: Path | None) -> None:
+        if args.cache_max_bytes is None and args.cache_max_age is None:
+            return
+        max_age = args.cache_max_age * 86400 if args.cache_max_age is not None else None
+        rulesync.gc_regulation(reg_dir, max_bytes=args.cache_max_bytes, max_age=max_age, cache_root=cache_root)
+
+    # 单个规则包同步/回滚/固定：指定 --regulation 时 --cache-dir 为缓存根目录（与 scan 的 --rules-dir 相同），
+    # 版本位于 <cache-dir>/<regulation>/<version>；否则版本直接位于 --cache-dir 下，共享状态也都在该目录内
+    if args.regulation:
+        cache_root: Path | None = cache_dir
+        reg_dir = cache_dir / args.regulation.lower()
+    else:
+        cache_root = None
+        reg_dir = cache_dir
+
+    # 固定/取消固定版本
+    if args.pin or args.unpin:
+        try:
+            if args.pin:
+                rulesync.pin_version(reg_dir, args.pin)
+                sys.stdout.write(f"[rulesync] 已固定版本: {reg_dir / args.pin}\n")
+            if args.unpin:
+                rulesync.unpin_version(reg_dir, args.unpin)
+                sys.stdout.write(f"[rulesync] 已取消固定: {reg_dir / args.unpin}\n")
+        except rulesync.RulesyncError as exc:
+            sys.stderr.write(f"[rulesync] {exc}\n")
+            return 1
+        return 0
+
+    # 缓存回收模式：--background 时交给脱离当前会话的子进程执行
+    if args.gc:
+        if args.cache_max_bytes is None and args.cache_max_age is None:
+            sys.stderr.write("[rulesync] --gc 需指定 --cache-max-bytes 或 --cache-max-age\n")
+            return 1
+        regs = [str(r).lower() for r in args.regulations] if args.regulations else None
+        if args.background:
+            import subprocess
+
+            argv = [sys.executable, "-m", "minos.cli", "rulesync", "--gc", "--cache-dir", str(cache_dir)]
+            if args.cache_max_bytes is not None:
+                argv += ["--cache-max-bytes", str(args.cache_max_bytes)]
+            if args.cache_max_age is not None:
+                argv += ["--cache-max-age", str(args.cache_max_age)]
+            for reg in regs or []:
+                argv += ["--regulations", reg]
+            proc = subprocess.Popen(
+                argv, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True
+            )
+            sys.stdout.write(f"[rulesync] 缓存回收已在后台运行 (pid={proc.pid})\n")
+            return 0
+        _gc(cache_dir, regs)
+        return 0
+
     # from-url 模式（Story-11）：单步在线拉取→转换→缓存/激活，默认 PRD 映射
     if args.from_url is not None or args.source is None:
         try:
@@ -408,6 +570,7 @@ def _handle_rulesync(args: argparse.Namespace) -> int:
                 regs = list(PRD_DEFAULT_URLS.keys())
             version = (args.version_override or args.version or "latest")
             version = str(version).lower()
+            urls: dict[str, str] = {}
             for reg in regs:
                 url = args.from_url or PRD_DEFAULT_URLS.get(reg)
                 if url is None:
@@ -422,28 +585,52 @@ def _handle_rulesync(args: argparse.Namespace) -> int:
                         raise rulesync.RulesyncError(
                             "首版仅支持在线法规参考链接，同步本地文件需 --allow-local-sources"
                         )
+                urls[reg] = url
+
+            def _sync_from_url(reg: str) -> None:
+                url = urls[reg]
                 reg_dir = cache_dir / reg
                 target_dir = reg_dir / version
                 target_dir.mkdir(parents=True, exist_ok=True)
                 rules_path = target_dir / "rules.yaml"
-                # 调用转换模块，download+extract→YAML 落地
-                rulesync_convert.convert_url_to_yaml(
-                    url=url,
-                    cache_dir=cache_dir,
-                    out_path=rules_path,
-                    regulation=reg,
-                    version=version,
-                )
-                meta = {
-                    "version": version,
-                    "source": url,
-                    "regulation": reg,
-                    "installed_at": datetime.now(timezone.utc).isoformat(),
-                    "active": True,
-                }
-                (target_dir / "metadata.json").write_text(json.dumps(meta, ensure_ascii=False, indent=2), encoding="utf-8")
-                rulesync.activate_version(reg_dir, version)
+                # 版本锁串行化同一版本的并发转换；rules.yaml 原子落地，下载期间不阻塞 scan 读取
+                with rules_index.version_lock(reg_dir, version):
+                    # 调用转换模块，download+extract→YAML 落地（下载按主机限流，失败按法规独立退避重试）
+                    syncpool.call_with_retries(
+                        lambda: rulesync_convert.convert_url_to_yaml(
+                            url=url,
+                            cache_dir=cache_dir,
+                            out_path=rules_path,
+                            regulation=reg,
+                            version=version,
+                        ),
+                        reg,
+                        retries=retries,
+                    )
+                    meta = {
+                        "version": version,
+                        "source": url,
+                        "regulation": reg,
+                        "installed_at": datetime.now(timezone.utc).isoformat(),
+                        "active": True,
+                    }
+                    with rules_index.cache_lock(reg_dir):
+                        rules_index._atomic_write_text(
+                            target_dir / "metadata.json", json.dumps(meta, ensure_ascii=False, indent=2)
+                        )
+                rulesync.activate_version(reg_dir, version, cache_root=cache_dir)
                 print(f"[rulesync] synced {reg} from {url} to {target_dir}")
+
+            # 各法规并发执行：已下载的法规转换时其余法规继续下载，单个法规失败不影响其它法规
+            results = syncpool.run_parallel(
+                urls, _sync_from_url, jobs=args.jobs, limiter=syncpool.HostLimiter(args.per_host)
+            )
+            failed = {reg: exc for reg, (_, exc) in results.items() if exc is not None}
+            for reg, exc in failed.items():
+                sys.stderr.write(f"[rulesync] {reg} 同步失败: {exc}\n")
+            if failed:
+                return 1
+            _gc(cache_dir)
             return 0
         except rulesync.RulesyncError as exc:
             sys.stderr.write(f"[rulesync] {exc}\n")
@@ -507,8 +694,6 @@ def _handle_rulesync(args: argparse.Namespace) -> int:
         target_dir = cache_dir / args.regulation / args.version_override
         target_dir.mkdir(parents=True, exist_ok=True)
         rules_path = target_dir / "rules.yaml"
-        yaml.safe_dump(merged, rules_path.open("w", encoding="utf-8"), allow_unicode=True, sort_keys=False)
-
         meta = {
             "version": args.version_override,
             "source": args.source_url or "local-import",
@@ -516,8 +701,11 @@ def _handle_rulesync(args: argparse.Namespace) -> int:
             "installed_at": "",
             "active": True,
         }
-        (target_dir / "metadata.json").write_text(json.dumps(meta, ensure_ascii=False, indent=2), encoding="utf-8")
-        rulesync.activate_version(cache_dir / args.regulation, args.version_override)
+        # 版本目录中的文件可能是共享 blob 的硬链接：一律写临时文件后 rename 替换，不原地改写
+        with rules_index.cache_lock(cache_dir / args.regulation):
+            rules_index._atomic_write_text(rules_path, yaml.safe_dump(merged, allow_unicode=True, sort_keys=False))
+            rules_index._atomic_write_text(target_dir / "metadata.json", json.dumps(meta, ensure_ascii=False, indent=2))
+        rulesync.activate_version(cache_dir / args.regulation, args.version_override, cache_root=cache_dir)
         sys.stdout.write(f"[rulesync] 已导入 YAML 到 {rules_path}\n")
         return 0
 
@@ -525,23 +713,26 @@ def _handle_rulesync(args: argparse.Namespace) -> int:
         try:
             # 回滚模式
             if args.rollback_to:
-                path = rulesync.rollback(cache_dir, args.version, target_version=args.rollback_to)
+                path = rulesync.rollback(reg_dir, args.version, target_version=args.rollback_to, cache_root=cache_root)
                 sys.stdout.write(f"[rulesync] 回滚成功: {path}\n")
                 return 0
             # 同步模式
             path = rulesync.sync_rules(
                 source=args.source,
                 version=args.version,
-                cache_dir=cache_dir,
+                cache_dir=reg_dir,
                 expected_sha256=args.sha256,
                 gpg_key=args.gpg_key,
                 offline=args.offline,
                 download_timeout=args.timeout,
+                extract=not args.no_extract,
+                cache_root=cache_root,
             )
             if args.cleanup_keep:
-                rulesync.cleanup(cache_dir, keep=args.cleanup_keep)
+                rulesync.cleanup(reg_dir, keep=args.cleanup_keep, cache_root=cache_root)
+            _gc_regulation(reg_dir, cache_root)
             sys.stdout.write(f"[rulesync] 规则同步成功: {path}\n")
-            active = rulesync.get_active_path(cache_dir)
+            active = rulesync.get_active_path(reg_dir)
             if active:
                 sys.stdout.write(f"[rulesync] 当前激活规则路径: {active}\n")
             return 0
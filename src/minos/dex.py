@@ -0,0 +1,75 @@
+"""
+DEX 字符串池解析：读取 string_ids 表并解码 MUTF-8，供 SDK/API/字符串规则匹配。
+- 只解析 header 与 string_ids/string_data，不触碰字节码，避免操作码数据中的误命中
+- 类型描述符（Lcom/example/Foo;）额外生成点分形式（com.example.Foo），使 sdk 包名规则可直接匹配
+"""
+
+import struct
+from typing import List
+
+DEX_MAGIC_PREFIX = b"dex\n"
+_HEADER_SIZE = 0x70
+_STRING_IDS_OFF = 0x38
+
+# 拼接扫描缓冲区时使用的分隔符：MUTF-8 中 NUL 编码为 C0 80，字符串内不会出现 0x00
+POOL_SEPARATOR = b"\0"
+
+
+class DexFormatError(Exception):
+    """DEX 格式异常（非 DEX 或结构损坏）。"""
+
+
+def is_dex(data: bytes) -> bool:
+    return len(data) >= _HEADER_SIZE and data[:4] == DEX_MAGIC_PREFIX and data[7:8] == b"\0"
+
+
+def _decode_mutf8(raw: bytes) -> bytes:
+    """MUTF-8 → UTF-8：还原 C0 80 编码的 NUL，合并分开编码的代理对（补充平面字符）。"""
+    text = raw.replace(b"\xc0\x80", b"\0").decode("utf-8", errors="surrogatepass")
+    text = text.encode("utf-16-le", errors="surrogatepass").decode("utf-16-le", errors="ignore")
+    return text.encode("utf-8", errors="ignore")
+
+
+def read_string_pool(data: bytes) -> List[bytes]:
+    """
+    返回 DEX 字符串池（UTF-8 编码，按 string_ids 顺序，DEX 规范保证池内唯一）。
+    非 DEX 或偏移越界时抛出 DexFormatError。
+    """
+    if not is_dex(data):
+        raise DexFormatError("不是有效的 DEX 文件")
+    size, off = struct.unpack_from("<II", data, _STRING_IDS_OFF)
+    if size == 0:
+        return []
+    if off < _HEADER_SIZE or off + size * 4 > len(data):
+        raise DexFormatError("string_ids 表越界")
+    offsets = struct.unpack_from(f"<{size}I", data, off)
+    end_of_data = len(data)
+    find = data.find
+    strings: List[bytes] = []
+    for pos in offsets:
+        # 跳过 uleb128 的 utf16_size，字符串内容以 0x00 结尾
+        while pos < end_of_data and data[pos] & 0x80:
+            pos += 1
+        pos += 1
+        end = find(b"\0", pos)
+        if pos > end_of_data or end == -1:
+            raise DexFormatError("string_data 越界")
+        raw = data[pos:end]
+        if b"\xed" in raw or b"\xc0\x80" in raw:
+            raw = _decode_mutf8(raw)
+        strings.append(raw)
+    return strings
+
+
+def _descriptor_to_class_name(s: bytes) -> bytes:
+    """Lcom/example/Foo; / [Lcom/example/Foo; → com.example.Foo；非类型描述符返回空。"""
+    body = s.lstrip(b"[")
+    if len(body) < 3 or body[:1] != b"L" or body[-1:] != b";":
+        return b""
+    return body[1:-1].replace(b"/", b".")
+
+
+def build_scan_buffer(strings: List[bytes]) -> bytes:
+    """将字符串池与类型描述符的点分形式拼接为单个缓冲区，便于多模式匹配一次完成。"""
+    class_names = [name for name in map(_descriptor_to_class_name, strings) if name]
+    return POOL_SEPARATOR.join(strings + class_names)
@@ -0,0 +1,137 @@
+"""
+跨进程文件锁：同一主机上并行的 CI 任务共享 ~/.minos/rules 时协调安装/激活/清理。
+- POSIX 使用 flock（支持共享锁/排他锁），Windows 使用 msvcrt.locking（仅排他锁，共享锁按排他处理）
+- 锁随文件描述符关闭自动释放，进程崩溃不会留下死锁
+- 同一进程内对同一锁文件嵌套加锁会自我阻塞，调用方需保证锁不重入
+- 锁文件可在持写锁时删除（remove）：加锁成功后复核描述符与路径指向同一文件，已被删除或替换时重新打开
+- 读锁在只读目录（只读挂载、无写权限）上退化为不加锁：锁文件已存在时只读打开，无法创建时跳过，
+  此类目录中也不可能有写者并发改动
+"""
+
+import errno
+import os
+import time
+from pathlib import Path
+from typing import Optional
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None  # type: ignore[assignment]
+    import msvcrt
+
+# 默认等待时长（秒）：覆盖慢速网络下的规则包下载
+DEFAULT_LOCK_TIMEOUT = 600.0
+_POLL_INTERVAL = 0.05
+
+# 只读目录上打开/创建锁文件的错误码
+_READONLY_ERRNOS = (errno.EROFS, errno.EACCES, errno.EPERM)
+
+
+class LockTimeout(Exception):
+    """等待文件锁超时。"""
+
+
+def _try_lock(fd: int, shared: bool) -> bool:
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, (fcntl.LOCK_SH if shared else fcntl.LOCK_EX) | fcntl.LOCK_NB)
+        else:  # pragma: no cover - Windows
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+    except OSError as exc:
+        # flock 冲突为 EWOULDBLOCK（POSIX 下其它错误照常抛出）；msvcrt 冲突为 EACCES/EDEADLK
+        if isinstance(exc, BlockingIOError) or fcntl is None:
+            return False
+        raise
+    return True
+
+
+def _unlock(fd: int) -> None:
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+    else:  # pragma: no cover - Windows
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+
+class FileLock:
+    """
+    基于锁文件的读写锁：shared=True 为读锁（可并发），否则为写锁（独占）。
+    timeout=None 表示无限等待。
+    """
+
+    def __init__(self, path: Path, shared: bool = False, timeout: Optional[float] = DEFAULT_LOCK_TIMEOUT):
+        self.path = path
+        self.shared = shared
+        self.timeout = timeout
+        self._fd: Optional[int] = None
+
+    def _open(self) -> Optional[int]:
+        if not self.shared:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            return os.open(str(self.path), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            # flock 只需可读的描述符
+            return os.open(str(self.path), os.O_RDONLY)
+        except FileNotFoundError:
+            pass
+        except OSError as exc:
+            if exc.errno in _READONLY_ERRNOS:
+                return None
+            raise
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            return os.open(str(self.path), os.O_RDWR | os.O_CREAT, 0o644)
+        except OSError as exc:
+            if exc.errno in _READONLY_ERRNOS:
+                return None
+            raise
+
+    def acquire(self) -> "FileLock":
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        while True:
+            fd = self._open()
+            if fd is None:
+                return self
+            while not _try_lock(fd, self.shared):
+                if deadline is not None and time.monotonic() >= deadline:
+                    os.close(fd)
+                    raise LockTimeout(f"等待文件锁超时: {self.path}")
+                time.sleep(_POLL_INTERVAL)
+            if self._is_current(fd):
+                self._fd = fd
+                return self
+            # 等待期间锁文件被持有者删除：锁住的是已脱离路径的旧文件，重新打开
+            os.close(fd)
+
+    def _is_current(self, fd: int) -> bool:
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return False
+        opened = os.fstat(fd)
+        return (st.st_dev, st.st_ino) == (opened.st_dev, opened.st_ino)
+
+    def release(self) -> None:
+        if self._fd is None:
+            return
+        try:
+            _unlock(self._fd)
+        finally:
+            os.close(self._fd)
+            self._fd = None
+
+    def remove(self) -> None:
+        """持写锁时删除锁文件（随后释放锁）；等待同一锁的进程会重新打开新建的锁文件。"""
+        if self._fd is None or self.shared:
+            raise RuntimeError(f"删除锁文件需先持有写锁: {self.path}")
+        try:
+            self.path.unlink(missing_ok=True)
+        finally:
+            self.release()
+
+    def __enter__(self) -> "FileLock":
+        return self.acquire()
+
+    def __exit__(self, *exc) -> None:
+        self.release()
@@ -0,0 +1,93 @@
+"""
+git 规则源的持久化镜像：每个仓库 URL 在缓存根目录下保留一个 bare 镜像，后续同步只做增量 fetch。
+- 首次 git clone --mirror --filter=blob:none（blobless 部分克隆，只取提交与树对象）
+- 同步时用临时 worktree + 稀疏检出（sparse-checkout）只检出 #path= 指定的子路径，
+  git 仅按需批量拉取该路径下的文件内容，大仓库中的其它文件不会下载
+- 服务端不支持 filter 时 git 自动退回完整克隆，镜像仍可复用
+- 同一镜像的 fetch/检出按镜像加文件锁串行
+布局：<cache_root>/.git-mirrors/<url sha256 前 16 位>.git
+"""
+
+import hashlib
+import os
+import shutil
+import subprocess
+from pathlib import Path
+from typing import List, Optional
+
+from minos.filelock import FileLock
+
+MIRRORS_DIR = ".git-mirrors"
+
+
+class GitMirrorError(Exception):
+    """git 镜像同步异常。"""
+
+
+def mirror_path(cache_root: Path, repo_url: str) -> Path:
+    key = hashlib.sha256(repo_url.encode("utf-8")).hexdigest()[:16]
+    return cache_root / MIRRORS_DIR / f"{key}.git"
+
+
+def _git(args: List[str], timeout: int, cwd: Optional[Path] = None) -> str:
+    try:
+        proc = subprocess.run(
+            ["git", *args],
+            cwd=str(cwd) if cwd else None,
+            check=True,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            timeout=timeout,
+        )
+    except FileNotFoundError as exc:
+        raise GitMirrorError("未找到 git 命令，请先安装 git") from exc
+    except subprocess.TimeoutExpired as exc:
+        raise GitMirrorError("git 拉取超时") from exc
+    except subprocess.CalledProcessError as exc:
+        raise GitMirrorError(f"git 拉取失败: {exc.stderr.strip()}") from exc
+    return proc.stdout
+
+
+def _update(mirror: Path, repo_url: str, timeout: int) -> None:
+    if (mirror / "HEAD").exists():
+        # 增量 fetch：partialclonefilter 已记录在镜像配置中，新提交同样只取树对象
+        _git(["--git-dir", str(mirror), "fetch", "--prune", "origin"], timeout)
+        return
+    tmp = mirror.with_name(f".{mirror.name}.{os.getpid()}.tmp")
+    shutil.rmtree(tmp, ignore_errors=True)
+    try:
+        _git(["clone", "--mirror", "--filter=blob:none", "--", repo_url, str(tmp)], timeout)
+        os.replace(tmp, mirror)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def checkout(
+    cache_root: Path, repo_url: str, rel_path: str, workdir: Path, rev: str = "HEAD", timeout: int = 60
+) -> Path:
+    """
+    更新 repo_url 的镜像后，将 rev 下的 rel_path 稀疏检出到 workdir，返回 workdir/rel_path。
+    workdir 需不存在；调用方负责删除（临时目录）。
+    rev 与 repo_url 来自规则源 URL，以 - 开头时会被 git 当作命令行选项解析，直接拒绝。
+    """
+    if rev.startswith("-"):
+        raise GitMirrorError(f"非法的 git 引用: {rev}")
+    if repo_url.startswith("-"):
+        raise GitMirrorError(f"非法的 git 仓库地址: {repo_url}")
+    mirror = mirror_path(cache_root, repo_url)
+    mirror.parent.mkdir(parents=True, exist_ok=True)
+    git_dir = ["--git-dir", str(mirror)]
+    with FileLock(mirror.with_name(f".{mirror.name}.lock")):
+        _update(mirror, repo_url, timeout)
+        _git([*git_dir, "worktree", "add", "--no-checkout", "--detach", str(workdir), rev], timeout)
+        try:
+            # 非 cone 模式按路径模式匹配，兼容单文件与目录
+            pattern = "/" + rel_path.strip("/")
+            _git(["sparse-checkout", "set", "--no-cone", pattern, pattern + "/"], timeout, cwd=workdir)
+            _git(["checkout"], timeout, cwd=workdir)
+        finally:
+            # 检出内容留在 workdir 供调用方读取，镜像中只注销 worktree 记录
+            (workdir / ".git").unlink(missing_ok=True)
+            _git([*git_dir, "worktree", "prune"], timeout)
+    return workdir / rel_path
@@ -0,0 +1,245 @@
+"""
+HTTP 条件请求：按 URL 记录校验器（ETag、Last-Modified、内容 sha256），再次拉取时发送
+If-None-Match/If-Modified-Since，上游未变化时服务端返回 304，不再传输正文。
+- 校验器存储为目录下的 http-validators.json（临时文件 + os.replace 原子写入，读改写加文件锁）
+- 请求声明 Accept-Encoding: gzip，Content-Encoding 为 gzip 时边下载边解压；sha256 按解压后内容计算
+- 304 由调用方据此跳过下载后的解压/转换
+- 正文流式写盘并同步计算 sha256；连接中断时按 Range 续传
+- 重定向到其它主机（如镜像仓库 blob 跳转到对象存储的预签名 URL）时不转发 Authorization
+"""
+
+import hashlib
+import http.client
+import json
+import os
+import urllib.error
+import urllib.parse
+import urllib.request
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from minos.filelock import FileLock
+
+VALIDATORS_FILE = "http-validators.json"
+
+# 读缓冲区大小（整个下载过程复用同一块缓冲区）
+_BUFFER_SIZE = 1024 * 1024
+DEFAULT_RESUME_ATTEMPTS = 3
+
+# 校验器：{"etag": str|None, "last_modified": str|None, "sha256": str}
+Validator = Dict[str, Any]
+
+
+class NotModified(Exception):
+    """服务端返回 304：本地副本仍为最新。"""
+
+
+class ValidatorStore:
+    """单个目录下的 URL → 校验器映射。"""
+
+    def __init__(self, directory: Path):
+        self.path = directory / VALIDATORS_FILE
+
+    def _load(self) -> Dict[str, Validator]:
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def get(self, url: str) -> Optional[Validator]:
+        entry = self._load().get(url)
+        return entry if isinstance(entry, dict) else None
+
+    def put(self, url: str, validator: Validator) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with FileLock(self.path.with_name(f".{VALIDATORS_FILE}.lock")):
+            data = self._load()
+            data[url] = validator
+            tmp = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+            try:
+                tmp.write_text(json.dumps(data, ensure_ascii=False, indent=2, sort_keys=True), encoding="utf-8")
+                os.replace(tmp, self.path)
+            except OSError:
+                tmp.unlink(missing_ok=True)
+                raise
+
+
+def conditional_headers(validator: Optional[Validator]) -> Dict[str, str]:
+    headers = {"Accept-Encoding": "gzip"}
+    if validator:
+        if validator.get("etag"):
+            headers["If-None-Match"] = validator["etag"]
+        if validator.get("last_modified"):
+            headers["If-Modified-Since"] = validator["last_modified"]
+    return headers
+
+
+class _Transfer:
+    """
+    单次下载的流式状态：正文边读边写入目标文件并更新 sha256，缓冲区在整个下载（含续传）中复用。
+    written 为已写入的解码后字节数，即续传时 Range 的起点（身份编码下的偏移）。
+    """
+
+    def __init__(self, out):
+        self.out = out
+        self.hash = hashlib.sha256()
+        self.written = 0
+        self._buf = bytearray(_BUFFER_SIZE)
+        self._view = memoryview(self._buf)
+
+    def reset(self) -> None:
+        self.out.seek(0)
+        self.out.truncate()
+        self.hash = hashlib.sha256()
+        self.written = 0
+
+    def _emit(self, data) -> None:
+        self.hash.update(data)
+        self.out.write(data)
+        self.written += len(data)
+
+    def copy(self, resp) -> bool:
+        """读取 resp 直到结束；返回正文是否完整（连接提前断开时为 False）。"""
+        encoding = (resp.headers.get("Content-Encoding") or "").strip().lower()
+        gzipped = encoding in ("gzip", "x-gzip")
+        # wbits=16+MAX_WBITS 接受 gzip 头，流式解压
+        decomp = zlib.decompressobj(16 + zlib.MAX_WBITS) if gzipped else None
+        length = resp.headers.get("Content-Length")
+        expected = int(length) if length and length.isdigit() else None
+        received = 0
+        view = self._view
+        while True:
+            try:
+                n = resp.readinto(self._buf)
+            except (http.client.IncompleteRead, ConnectionError, TimeoutError):
+                return False
+            if not n:
+                break
+            received += n
+            if decomp is not None:
+                out = decomp.decompress(view[:n])
+                if out:
+                    self._emit(out)
+            else:
+                self._emit(view[:n])
+        if decomp is not None:
+            tail = decomp.flush()
+            if tail:
+                self._emit(tail)
+            return decomp.eof
+        return expected is None or received >= expected
+
+
+class _RedirectHandler(urllib.request.HTTPRedirectHandler):
+    """跨主机（scheme/host/port 任一变化）重定向时去掉 Authorization，凭据只发给原始主机。"""
+
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        new = super().redirect_request(req, fp, code, msg, headers, newurl)
+        if new is not None:
+            origin = urllib.parse.urlsplit(req.full_url)
+            target = urllib.parse.urlsplit(new.full_url)
+            if (origin.scheme, origin.netloc.lower()) != (target.scheme, target.netloc.lower()):
+                new.remove_header("Authorization")
+        return new
+
+
+_OPENER = urllib.request.build_opener(_RedirectHandler)
+
+
+def _open(url: str, headers: Dict[str, str], timeout: int):
+    req = urllib.request.Request(url, headers=headers)
+    try:
+        resp = _OPENER.open(req, timeout=timeout)
+    except urllib.error.HTTPError as exc:
+        if exc.code == 304:
+            raise NotModified(url) from None
+        raise
+    if getattr(resp, "status", 200) == 304:
+        resp.close()
+        raise NotModified(url)
+    return resp
+
+
+def _if_range(headers) -> Optional[str]:
+    # If-Range 只接受强 ETag 或 Last-Modified；都没有时不续传，避免拼接不同版本的内容
+    etag = headers.get("ETag")
+    if etag and not etag.startswith("W/"):
+        return etag
+    return headers.get("Last-Modified")
+
+
+def _resume_offset(resp) -> Optional[int]:
+    """206 响应的 Content-Range 起点；非 206 返回 None。"""
+    if getattr(resp, "status", 200) != 206:
+        return None
+    content_range = resp.headers.get("Content-Range") or ""
+    try:
+        return int(content_range.split()[1].split("-")[0])
+    except (IndexError, ValueError):
+        return -1
+
+
+def fetch(
+    url: str,
+    dest: Path,
+    timeout: int = 30,
+    validator: Optional[Validator] = None,
+    resume_attempts: int = DEFAULT_RESUME_ATTEMPTS,
+    headers: Optional[Dict[str, str]] = None,
+) -> Validator:
+    """
+    流式 GET url 并写入 dest（先写 .part 临时文件再 os.replace），返回响应的新校验器，
+    其中 sha256 在下载过程中同步计算，调用方无需再读一遍文件。
+    - validator 非空时发送条件请求，服务端返回 304 时抛出 NotModified（dest 不变）
+    - 连接中途断开时以 Range + If-Range 从已写入位置续传（至多 resume_attempts 次）；
+      服务端不支持 Range 或内容已变化（返回 200）时从头重新下载
+    - headers 为附加请求头（如镜像仓库的 Authorization），每次请求（含续传）都会携带；跨主机重定向时不转发 Authorization
+    网络异常以 urllib.error.URLError / OSError 原样抛出，由调用方转换为模块异常。
+    """
+    extra = dict(headers or {})
+    resp = _open(url, {**extra, **conditional_headers(validator)}, timeout)
+    headers = resp.headers
+    tmp = dest.with_name(f".{dest.name}.{os.getpid()}.part")
+    try:
+        with tmp.open("wb") as out:
+            transfer = _Transfer(out)
+            attempts = 0
+            while True:
+                with resp:
+                    complete = transfer.copy(resp)
+                if complete:
+                    break
+                attempts += 1
+                if attempts > resume_attempts:
+                    raise ConnectionError(f"下载中断，续传 {resume_attempts} 次后仍未完成: {url}")
+                if_range = _if_range(headers)
+                if if_range is None:
+                    transfer.reset()
+                    resp = _open(url, {**extra, "Accept-Encoding": "gzip"}, timeout)
+                    headers = resp.headers
+                    continue
+                resp = _open(
+                    url,
+                    {**extra, "Range": f"bytes={transfer.written}-", "If-Range": if_range, "Accept-Encoding": "identity"},
+                    timeout,
+                )
+                offset = _resume_offset(resp)
+                if offset != transfer.written:
+                    if offset is not None:
+                        # 206 但起点不符或无法解析：正文只是部分内容，不带 Range 重新请求完整内容
+                        resp.close()
+                        resp = _open(url, {**extra, "Accept-Encoding": "gzip"}, timeout)
+                    # 200（不支持 Range 或上游已变化）：从头下载
+                    transfer.reset()
+                    headers = resp.headers
+        os.replace(tmp, dest)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    return {
+        "etag": headers.get("ETag"),
+        "last_modified": headers.get("Last-Modified"),
+        "sha256": transfer.hash.hexdigest(),
+    }
@@ -2,10 +2,13 @@
 Manifest 扫描：解析权限/导出组件，按规则匹配并生成 findings/stats。
 """
 
-import zipfile
 import xml.etree.ElementTree as ET
 from pathlib import Path
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from minos import axml
+from minos.archive import ApkSession
+from minos.ruleset import RuleSet, as_ruleset
 
 ANDROID_NS = "{http://schemas.android.com/apk/res/android}"
 
@@ -14,12 +17,34 @@ class ManifestScanError(Exception):
     """Manifest 扫描异常。"""
 
 
+class ManifestCollector:
+    """ApkSession 分析器：收集 APK 根目录下的 AndroidManifest.xml，其它条目不解压。"""
+
+    def __init__(self) -> None:
+        self.contents: List[bytes] = []
+        self._chunks: List[bytes] = []
+
+    def accepts(self, name: str) -> bool:
+        return name == "AndroidManifest.xml"
+
+    def open_entry(self, name: str) -> "ManifestCollector":
+        self._chunks = []
+        return self
+
+    def write(self, chunk: bytes) -> None:
+        self._chunks.append(chunk)
+
+    def close(self) -> None:
+        self.contents.append(b"".join(self._chunks))
+        self._chunks = []
+
+
 def _collect_manifest_contents(manifest_input: Path) -> List[bytes]:
     """
     支持三种输入：
     - 直接传入 AndroidManifest.xml 文件
     - 传入源码目录（寻找 AndroidManifest.xml，支持 src/main/AndroidManifest.xml 等主 Manifest）
-    - 传入 APK（读取压缩包内的 AndroidManifest.xml，假设为可解析 XML）
+    - 传入 APK（读取压缩包内的 AndroidManifest.xml，二进制 AXML 或文本 XML 均可）
     """
     contents: List[bytes] = []
     if manifest_input.is_dir():
@@ -36,15 +61,15 @@ def _collect_manifest_contents(manifest_input: Path) -> List[bytes]:
         return contents
 
     if manifest_input.suffix.lower() == ".apk":
+        session = ApkSession(manifest_input)
+        collector = session.register(ManifestCollector())
         try:
-            with zipfile.ZipFile(manifest_input, "r") as zf:
-                content = zf.read("AndroidManifest.xml")
-                contents.append(content)
-                return contents
-        except KeyError:
-            raise ManifestScanError("APK 中未找到 AndroidManifest.xml")
+            session.run()
         except Exception as exc:
             raise ManifestScanError(f"读取 APK 失败: {exc}") from exc
+        if not collector.contents:
+            raise ManifestScanError("APK 中未找到 AndroidManifest.xml")
+        return collector.contents
 
     if manifest_input.exists():
         contents.append(manifest_input.read_bytes())
@@ -54,80 +79,130 @@ def _collect_manifest_contents(manifest_input: Path) -> List[bytes]:
 
 
 def _parse_manifest_content(content: bytes) -> ET.Element:
+    # APK 内的 Manifest 为二进制 AXML，直接解码为元素树；源码中的为文本 XML
+    if axml.is_axml(content):
+        try:
+            return axml.parse(content)
+        except axml.AxmlError as exc:
+            raise ManifestScanError(f"解析二进制 Manifest 失败: {exc}") from exc
     try:
         return ET.fromstring(content)
     except Exception as exc:
         raise ManifestScanError(f"解析 Manifest 失败: {exc}") from exc
 
 
-def _merge_roots(roots: List[ET.Element]) -> ET.Element:
-    """合并多个 Manifest：合并 uses-permission 和 application 下的组件。"""
-    if not roots:
-        raise ManifestScanError("未提供可用的 Manifest 解析结果")
-    base = roots[0]
-    base_app = base.find("application")
-    if base_app is None:
-        base_app = ET.SubElement(base, "application")
+# 组件规则支持的组件类型
+COMPONENT_TYPES = ("activity", "service", "provider")
+# 建立索引的组件标签（receiver 一并收录，供 intent-filter/meta-data 查询）
+_INDEXED_COMPONENTS = ("activity", "activity-alias", "service", "provider", "receiver")
 
-    for other in roots[1:]:
-        for perm in other.findall("uses-permission"):
-            base.append(perm)
-        other_app = other.find("application")
-        if other_app is not None:
-            for child in list(other_app):
-                base_app.append(child)
-    return base
 
+def _android_attr(elem: ET.Element, name: str) -> Optional[str]:
+    return elem.attrib.get(f"{ANDROID_NS}{name}") or elem.attrib.get(f"android:{name}")
 
-def _match_permission(root: ET.Element, rule: Dict[str, Any]) -> List[Dict[str, Any]]:
-    pattern = rule.get("pattern")
-    if not pattern:
-        return []
-    findings = []
-    for perm in root.findall("uses-permission"):
-        name = perm.attrib.get(f"{ANDROID_NS}name") or perm.attrib.get("android:name")
-        if name == pattern:
-            findings.append(
+
+class ManifestComponent:
+    """索引中的单个组件：名称、exported 标记、intent-filter（action/category/data scheme）与 meta-data。"""
+
+    __slots__ = ("type", "name", "exported", "intent_filters", "meta_data")
+
+    def __init__(self, elem: ET.Element):
+        self.type = elem.tag
+        self.name = _android_attr(elem, "name") or ""
+        self.exported = str(_android_attr(elem, "exported")).lower() == "true"
+        self.intent_filters: List[Dict[str, List[str]]] = []
+        for f in elem.findall("intent-filter"):
+            self.intent_filters.append(
                 {
-                    "rule_id": rule.get("rule_id"),
-                    "regulation": rule.get("regulation"),
-                    "severity": rule.get("severity", "medium"),
-                    "location": "AndroidManifest.xml",
-                    "evidence": f"uses-permission: {name}",
-                    "recommendation": rule.get("recommendation", ""),
+                    "actions": [_android_attr(a, "name") or "" for a in f.findall("action")],
+                    "categories": [_android_attr(c, "name") or "" for c in f.findall("category")],
+                    "schemes": [_android_attr(d, "scheme") or "" for d in f.findall("data") if _android_attr(d, "scheme")],
                 }
             )
-    return findings
+        self.meta_data = _collect_meta_data(elem)
+
 
+def _collect_meta_data(elem: ET.Element) -> Dict[str, str]:
+    meta: Dict[str, str] = {}
+    for m in elem.findall("meta-data"):
+        name = _android_attr(m, "name")
+        if name:
+            meta[name] = _android_attr(m, "value") or _android_attr(m, "resource") or ""
+    return meta
 
-def _match_components(root: ET.Element, rule: Dict[str, Any]) -> List[Dict[str, Any]]:
+
+class ManifestIndex:
+    """
+    合并后 Manifest 的索引模型，一次构建后规则求值均为哈希查找：
+    - permissions：权限名 → 声明次数（多个 Manifest 合并时可能重复声明，按次数生成 findings）
+    - components：组件类型 → 组件列表（保持文档顺序）；exported：组件类型 → 导出组件名列表
+    - meta_data：application 级 meta-data
+    """
+
+    def __init__(self, roots: List[ET.Element]):
+        if not roots:
+            raise ManifestScanError("未提供可用的 Manifest 解析结果")
+        self.permissions: Dict[str, int] = {}
+        self.components: Dict[str, List[ManifestComponent]] = {t: [] for t in _INDEXED_COMPONENTS}
+        self.meta_data: Dict[str, str] = {}
+        for root in roots:
+            for perm in root.findall("uses-permission"):
+                name = _android_attr(perm, "name")
+                if name:
+                    self.permissions[name] = self.permissions.get(name, 0) + 1
+            app = root.find("application")
+            if app is None:
+                continue
+            for elem in app:
+                if elem.tag in self.components:
+                    self.components[elem.tag].append(ManifestComponent(elem))
+            self.meta_data.update(_collect_meta_data(app))
+        self.exported: Dict[str, List[str]] = {
+            t: [c.name for c in comps if c.exported] for t, comps in self.components.items()
+        }
+
+    @classmethod
+    def from_contents(cls, contents: List[bytes]) -> "ManifestIndex":
+        return cls([_parse_manifest_content(c) for c in contents])
+
+
+def _match_permission(index: ManifestIndex, rule: Dict[str, Any]) -> List[Dict[str, Any]]:
+    pattern = rule.get("pattern")
+    if not pattern:
+        return []
+    finding = {
+        "rule_id": rule.get("rule_id"),
+        "regulation": rule.get("regulation"),
+        "severity": rule.get("severity", "medium"),
+        "location": "AndroidManifest.xml",
+        "evidence": f"uses-permission: {pattern}",
+        "recommendation": rule.get("recommendation", ""),
+    }
+    return [dict(finding) for _ in range(index.permissions.get(pattern, 0))]
+
+
+def _match_components(index: ManifestIndex, rule: Dict[str, Any]) -> List[Dict[str, Any]]:
     component = rule.get("component")
-    if component not in {"activity", "service", "provider"}:
+    if component not in COMPONENT_TYPES:
         return []
-    findings = []
-    app = root.find("application")
-    if app is None:
-        return findings
-    for elem in app.findall(component):
-        exported = elem.attrib.get(f"{ANDROID_NS}exported") or elem.attrib.get("android:exported")
-        if str(exported).lower() != "true":
-            continue
-        name = elem.attrib.get(f"{ANDROID_NS}name") or elem.attrib.get("android:name") or ""
-        findings.append(
-            {
-                "rule_id": rule.get("rule_id"),
-                "regulation": rule.get("regulation"),
-                "severity": rule.get("severity", "high"),
-                "location": f"AndroidManifest.xml:{component}",
-                "evidence": f"{component} exported=true name={name}",
-                "recommendation": rule.get("recommendation", ""),
-            }
-        )
-    return findings
+    return [
+        {
+            "rule_id": rule.get("rule_id"),
+            "regulation": rule.get("regulation"),
+            "severity": rule.get("severity", "high"),
+            "location": f"AndroidManifest.xml:{component}",
+            "evidence": f"{component} exported=true name={name}",
+            "recommendation": rule.get("recommendation", ""),
+        }
+        for name in index.exported[component]
+    ]
+
+
+_RULE_MATCHERS = {"permission": _match_permission, "component": _match_components}
 
 
 def scan_manifest(
-    manifest_path: Path, rules: List[Dict[str, Any]], source_flags: Dict[str, str]
+    manifest_path: Path, rules: Union[RuleSet, List[Dict[str, Any]]], source_flags: Dict[str, str]
 ) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
     """
     扫描 Manifest，返回 (findings, stats)。
@@ -136,32 +211,30 @@ def scan_manifest(
     - 组件：{"rule_id": "...", "type": "component", "component": "activity", "regulation": "...", "severity": "..."}
     """
     contents = _collect_manifest_contents(manifest_path)
-    roots = [_parse_manifest_content(c) for c in contents]
-    root = _merge_roots(roots)
+    return scan_manifest_contents(contents, rules, source_flags, label=str(manifest_path))
 
-    # 规则归一化：支持 disabled，后出现的同 rule_id 覆盖前者
-    normalized: Dict[str, Dict[str, Any]] = {}
-    for rule in rules:
-        rid = rule.get("rule_id")
-        if not rid:
-            continue
-        if rule.get("disabled") is True:
-            # 标记为禁用则移除已存在的同名规则
-            if rid in normalized:
-                del normalized[rid]
-            normalized[rid] = {"disabled": True}
-            continue
-        normalized[rid] = rule
-    active_rules = [r for r in normalized.values() if not r.get("disabled")]
 
-    findings: List[Dict[str, Any]] = []
+def scan_manifest_contents(
+    contents: List[bytes],
+    rules: Union[RuleSet, List[Dict[str, Any]]],
+    source_flags: Dict[str, str],
+    label: Optional[str] = None,
+) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """
+    扫描已读取的 Manifest 内容（多个时合并），返回 (findings, stats)。
+    供 APK 单遍会话等已持有 Manifest 字节的调用方复用，label 用于日志。
+    """
+    index = ManifestIndex.from_contents(contents)
 
+    # 规则归一化（disabled/同 rule_id 覆盖）由 RuleSet 一次完成，调用方传入已编译规则集时不再重复
+    ruleset = as_ruleset(rules)
+    active_rules = ruleset.rules
+
+    findings: List[Dict[str, Any]] = []
     for rule in active_rules:
-        rtype = rule.get("type")
-        if rtype == "permission":
-            findings.extend(_match_permission(root, rule))
-        elif rtype == "component":
-            findings.extend(_match_components(root, rule))
+        matcher = _RULE_MATCHERS.get(rule.get("type"))
+        if matcher is not None:
+            findings.extend(matcher(index, rule))
 
     # 来源标记：source_flags 优先，其次规则自带 source，默认 region
     source_map: Dict[str, str] = dict(source_flags)
@@ -185,7 +258,7 @@ def scan_manifest(
 
     # stdout 摘要
     print(
-        f"[manifest] scanned {manifest_path}, findings={len(findings)}, "
+        f"[manifest] scanned {label}, findings={len(findings)}, "
         f"by_regulation={stats['count_by_regulation']}, by_severity={stats['count_by_severity']}"
     )
 
@@ -0,0 +1,201 @@
+"""
+OCI 分发协议客户端（只读）：按 distribution-spec 拉取 manifest 与 blob，替代 oras 命令行。
+- 引用格式：oci://<registry>/<repository>[:tag|@sha256:...]（HTTPS）；oci+http://... 用于本地/内网 registry
+- blob 以 digest 为键缓存在 <cache_root>/.oci/blobs/sha256/<hex>，已缓存的层不再下载；下载时流式校验 digest
+- 支持匿名 Bearer token 质询（WWW-Authenticate: Bearer realm=...,service=...,scope=...），token 过期（401）时重新获取一次
+- manifest 与 blob 请求均经 httpcache 的 opener，跨主机重定向时不转发 Authorization
+- 规则层按 org.opencontainers.image.title 注解（oras 推送时的文件名）选择，与原 #path 语义一致
+"""
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import urllib.error
+import urllib.parse
+import urllib.request
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from minos import httpcache
+
+CACHE_DIR = ".oci"
+
+_MANIFEST_TYPES = ", ".join(
+    [
+        "application/vnd.oci.image.manifest.v1+json",
+        "application/vnd.oci.image.index.v1+json",
+        "application/vnd.docker.distribution.manifest.v2+json",
+        "application/vnd.docker.distribution.manifest.list.v2+json",
+    ]
+)
+_INDEX_TYPES = (
+    "application/vnd.oci.image.index.v1+json",
+    "application/vnd.docker.distribution.manifest.list.v2+json",
+)
+_TITLE_ANNOTATION = "org.opencontainers.image.title"
+_BEARER_PARAM = re.compile(r'(\w+)="([^"]*)"')
+
+
+class OciError(Exception):
+    """OCI 拉取异常。"""
+
+
+def parse_reference(source: str) -> Tuple[str, str, str]:
+    """解析 oci://host/repo:tag → (registry 基础 URL, repository, tag 或 digest)。"""
+    if source.startswith("oci+"):
+        scheme, rest = source[len("oci+") :].split("://", 1)
+    elif source.startswith("oci://"):
+        scheme, rest = "https", source[len("oci://") :]
+    else:
+        raise OciError(f"不是 OCI 引用: {source}")
+    if "/" not in rest:
+        raise OciError(f"OCI 引用缺少仓库名: {source}")
+    host, path = rest.split("/", 1)
+    if "@" in path:
+        repo, ref = path.split("@", 1)
+    else:
+        # 冒号只在最后一段中表示 tag（registry 端口在 host 中）
+        head, _, last = path.rpartition("/")
+        name, sep, tag = last.partition(":")
+        repo = f"{head}/{name}" if head else name
+        ref = tag if sep else "latest"
+    if not repo or not ref:
+        raise OciError(f"无法解析 OCI 引用: {source}")
+    return f"{scheme}://{host}", repo, ref
+
+
+class Registry:
+    """单个 registry 仓库的会话：缓存 Bearer token，提供 manifest/blob 请求。"""
+
+    def __init__(self, base: str, repository: str, timeout: int = 60):
+        self.base = base
+        self.repository = repository
+        self.timeout = timeout
+        self._token: Optional[str] = None
+
+    def _auth_headers(self) -> Dict[str, str]:
+        return {"Authorization": f"Bearer {self._token}"} if self._token else {}
+
+    def _fetch_token(self, challenge: str) -> None:
+        if not challenge.lower().startswith("bearer "):
+            raise OciError(f"不支持的 registry 认证方式: {challenge.split(' ', 1)[0]}")
+        params = dict(_BEARER_PARAM.findall(challenge))
+        realm = params.pop("realm", None)
+        if not realm:
+            raise OciError("registry 认证质询缺少 realm")
+        params.setdefault("scope", f"repository:{self.repository}:pull")
+        url = f"{realm}?{urllib.parse.urlencode(params)}"
+        with urllib.request.urlopen(url, timeout=self.timeout) as resp:
+            data = json.loads(resp.read().decode("utf-8"))
+        self._token = data.get("token") or data.get("access_token")
+        if not self._token:
+            raise OciError("registry 未返回访问 token")
+
+    def _request(self, path: str, headers: Dict[str, str]):
+        url = f"{self.base}/v2/{self.repository}/{path}"
+        for attempt in range(2):
+            req = urllib.request.Request(url, headers={**headers, **self._auth_headers()})
+            try:
+                return httpcache._OPENER.open(req, timeout=self.timeout)
+            except urllib.error.HTTPError as exc:
+                if not self._retry_auth(exc, attempt):
+                    raise OciError(f"registry 请求失败 {exc.code}: {url}") from exc
+        raise OciError(f"registry 认证失败: {url}")  # pragma: no cover
+
+    def _retry_auth(self, exc: urllib.error.HTTPError, attempt: int) -> bool:
+        """首次请求返回 401 且带质询时（未认证或 token 已过期）重新获取 token，返回是否应重试。"""
+        challenge = exc.headers.get("WWW-Authenticate") if exc.headers else None
+        if exc.code != 401 or attempt != 0 or not challenge:
+            return False
+        self._fetch_token(challenge)
+        return True
+
+    def manifest(self, reference: str) -> Dict[str, Any]:
+        """获取 manifest；引用指向 index 时取第一个子 manifest。"""
+        with self._request(f"manifests/{reference}", {"Accept": _MANIFEST_TYPES}) as resp:
+            raw = resp.read()
+            media_type = (resp.headers.get("Content-Type") or "").split(";")[0].strip()
+        if reference.startswith("sha256:") and hashlib.sha256(raw).hexdigest() != reference.split(":", 1)[1]:
+            raise OciError(f"manifest digest 不匹配: {reference}")
+        data = json.loads(raw.decode("utf-8"))
+        if data.get("mediaType", media_type) in _INDEX_TYPES:
+            manifests = data.get("manifests") or []
+            if not manifests:
+                raise OciError("OCI index 中没有 manifest")
+            return self.manifest(manifests[0]["digest"])
+        return data
+
+    def fetch_blob(self, digest: str, dest: Path) -> None:
+        """流式下载 blob 到 dest，digest 不符时删除并报错。"""
+        url = f"{self.base}/v2/{self.repository}/blobs/{digest}"
+        # 认证通常已在获取 manifest 时协商（同一仓库 pull 权限）；blob 下载走 httpcache 的流式/续传逻辑
+        for attempt in range(2):
+            try:
+                result = httpcache.fetch(url, dest, timeout=self.timeout, headers=self._auth_headers())
+                break
+            except urllib.error.HTTPError as exc:
+                if not self._retry_auth(exc, attempt):
+                    raise OciError(f"registry 请求失败 {exc.code}: {url}") from exc
+        else:  # pragma: no cover
+            raise OciError(f"registry 认证失败: {url}")
+        if f"sha256:{result['sha256']}" != digest:
+            dest.unlink(missing_ok=True)
+            raise OciError(f"blob digest 不匹配: {digest}")
+
+
+def blob_cache_path(cache_root: Path, digest: str) -> Path:
+    algo, _, hexdigest = digest.partition(":")
+    if algo != "sha256" or not re.fullmatch(r"[0-9a-f]{64}", hexdigest):
+        raise OciError(f"不支持的 digest: {digest}")
+    return cache_root / CACHE_DIR / "blobs" / "sha256" / hexdigest
+
+
+def select_layer(manifest: Dict[str, Any], path: Optional[str]) -> Dict[str, Any]:
+    layers: List[Dict[str, Any]] = manifest.get("layers") or []
+    if path:
+        for layer in layers:
+            if (layer.get("annotations") or {}).get(_TITLE_ANNOTATION) == path:
+                return layer
+        raise OciError(f"OCI 制品未找到路径: {path}")
+    candidates = [
+        layer
+        for layer in layers
+        if (layer.get("annotations") or {}).get(_TITLE_ANNOTATION, "").endswith(".tar.gz")
+        or "tar+gzip" in (layer.get("mediaType") or "")
+    ]
+    if len(candidates) != 1:
+        raise OciError("OCI 制品包含多个 tar.gz，请使用 #path 指定")
+    return candidates[0]
+
+
+def resolve_layer(source: str, path: Optional[str], timeout: int = 60) -> Tuple[Registry, Dict[str, Any]]:
+    """只拉取 manifest（元数据），返回 registry 会话与选中的规则层描述。"""
+    base, repository, reference = parse_reference(source)
+    registry = Registry(base, repository, timeout=timeout)
+    try:
+        return registry, select_layer(registry.manifest(reference), path)
+    except (urllib.error.URLError, OSError, ValueError) as exc:
+        raise OciError(f"OCI 拉取失败: {exc}") from exc
+
+
+def pull_layer(registry: Registry, layer: Dict[str, Any], cache_root: Path, dest: Path) -> bool:
+    """
+    将规则层放到 dest：按 digest 命中本地缓存时不发起 blob 请求。
+    返回是否命中缓存。
+    """
+    digest = layer.get("digest") or ""
+    cached = blob_cache_path(cache_root, digest)
+    hit = cached.exists()
+    if not hit:
+        cached.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            registry.fetch_blob(digest, cached)
+        except (urllib.error.URLError, OSError) as exc:
+            raise OciError(f"OCI blob 下载失败: {exc}") from exc
+    try:
+        os.link(cached, dest)
+    except OSError:
+        shutil.copyfile(cached, dest)
+    return hit
@@ -0,0 +1,164 @@
+"""
+规则包直读（read-through）：版本目录中只保留已校验的规则包本体与成员偏移索引，scan 按偏移直接读取
+rules.yaml 等成员，不再把整个包解压成文件树。
+- tar.gz 安装时一次流式解压为未压缩的 tar 存入内容寻址存储（硬链接为 <version>/package.tar），
+  同时记录每个普通文件成员的数据偏移与大小；gzip 不可随机访问，解压一次换取之后的 seek + read
+- zip 包自带中央目录，原样存放为 <version>/package.zip；STORED 成员按数据偏移直接读取，
+  DEFLATED 成员读取压缩数据后原始 deflate 解压
+- 成员索引写入 <version>/package.json：{"format", "archive", "members": {name: [offset, length, size, method]}}
+- 读取时已解压的同名文件优先，解压模式安装的版本与旧缓存行为不变
+"""
+
+import json
+import os
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from minos import blobstore
+
+PACKAGE_INDEX = "package.json"
+PACKAGE_FORMAT = 1
+
+_METHOD_STORED = 0
+_METHOD_DEFLATED = 8
+
+# 向上查找版本目录的最大层数（成员可位于包内子目录）
+_MAX_DEPTH = 4
+
+
+class RulePackError(Exception):
+    """规则包直读异常。"""
+
+
+def _write_index(version_dir: Path, archive: str, members: Dict[str, list]) -> None:
+    path = version_dir / PACKAGE_INDEX
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    data = {"format": PACKAGE_FORMAT, "archive": archive, "members": members}
+    tmp.write_text(json.dumps(data, ensure_ascii=False, sort_keys=True), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def _member_name(name: str) -> Optional[str]:
+    try:
+        rel = blobstore.safe_member_path(name)
+    except blobstore.BlobStoreError as exc:
+        raise RulePackError(str(exc)) from exc
+    return rel.as_posix() if rel is not None else None
+
+
+def _index_tar(archive: Path) -> Dict[str, list]:
+    import tarfile
+
+    members: Dict[str, list] = {}
+    # 未压缩 tar 的遍历只读取各成员头部并 seek 跳过数据
+    with tarfile.open(archive, "r:") as tar:
+        for member in tar:
+            name = _member_name(member.name)
+            if name is None or not member.isfile() or member.issparse():
+                continue
+            members[name] = [member.offset_data, member.size, member.size, _METHOD_STORED]
+    return members
+
+
+def _index_zip(archive: Path) -> Dict[str, list]:
+    import zipfile
+
+    from minos.archive import _stored_data_offset
+
+    members: Dict[str, list] = {}
+    with zipfile.ZipFile(archive) as zf:
+        for info in zf.infolist():
+            name = _member_name(info.filename)
+            if name is None or info.is_dir():
+                continue
+            if info.flag_bits & 0x1 or info.compress_type not in (_METHOD_STORED, _METHOD_DEFLATED):
+                raise RulePackError(f"规则包成员使用了不支持的加密或压缩方式: {info.filename}")
+            offset = _stored_data_offset(zf, info)
+            members[name] = [offset, info.compress_size, info.file_size, info.compress_type]
+    return members
+
+
+def install_package(archive: Path, version_dir: Path, store: Path) -> Dict[str, int]:
+    """
+    以直读模式安装规则包到 version_dir：包本体（tar.gz 解压为 tar；zip 原样）入内容寻址存储并硬链接，
+    生成成员偏移索引。返回统计：files（普通文件成员数）、reused（恒为 0，整包流式写入不预判复用）。
+    """
+    import gzip
+    import zipfile
+
+    version_dir.mkdir(parents=True, exist_ok=True)
+    if zipfile.is_zipfile(archive):
+        target = version_dir / "package.zip"
+        blobstore.add_file(store, archive, target)
+        members = _index_zip(target)
+    else:
+        target = version_dir / "package.tar"
+        try:
+            with gzip.open(archive, "rb") as src:
+                blobstore.add_stream(store, src, target)
+        except (OSError, EOFError) as exc:
+            raise RulePackError(f"规则包解压失败: {exc}") from exc
+        members = _index_tar(target)
+    _write_index(version_dir, target.name, members)
+    return {"files": len(members), "reused": 0}
+
+
+def load_index(version_dir: Path) -> Optional[Dict[str, Any]]:
+    """读取版本目录的成员索引；非直读模式安装（无索引）或格式不符时返回 None。"""
+    try:
+        data = json.loads((version_dir / PACKAGE_INDEX).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if not isinstance(data, dict) or data.get("format") != PACKAGE_FORMAT:
+        return None
+    return data
+
+
+def _locate(path: Path) -> Optional[Tuple[Path, Dict[str, Any], str]]:
+    # 向上找到含 package.json 的版本目录；遇到不含索引的版本目录（有 metadata.json）即停止
+    for parent in list(path.parents)[:_MAX_DEPTH]:
+        index = load_index(parent)
+        if index is not None:
+            return parent, index, path.relative_to(parent).as_posix()
+        if (parent / "metadata.json").exists():
+            return None
+    return None
+
+
+def read_member(version_dir: Path, name: str, index: Optional[Dict[str, Any]] = None) -> bytes:
+    """按偏移从 version_dir 的规则包中读取成员 name 的内容。"""
+    index = index if index is not None else load_index(version_dir)
+    entry = (index or {}).get("members", {}).get(name)
+    if entry is None:
+        raise FileNotFoundError(f"规则包中不存在成员: {version_dir / name}")
+    offset, length, size, method = entry
+    with (version_dir / index["archive"]).open("rb") as f:  # type: ignore[index]
+        f.seek(offset)
+        raw = f.read(length)
+    if len(raw) != length:
+        raise RulePackError(f"规则包已截断: {version_dir / name}")
+    data = raw if method == _METHOD_STORED else zlib.decompress(raw, -zlib.MAX_WBITS)
+    if len(data) != size:
+        raise RulePackError(f"规则包成员大小不符: {version_dir / name}")
+    return data
+
+
+def read_bytes(path: Path) -> bytes:
+    """读取规则文件：已解压的文件优先，否则从所在版本目录的规则包中按偏移读取。"""
+    try:
+        return path.read_bytes()
+    except FileNotFoundError:
+        located = _locate(path)
+        if located is None:
+            raise
+        version_dir, index, name = located
+        return read_member(version_dir, name, index)
+
+
+def exists(path: Path) -> bool:
+    """path 为已解压文件，或为直读模式版本目录中规则包的成员。"""
+    if path.exists():
+        return True
+    located = _locate(path)
+    return located is not None and located[2] in located[1].get("members", {})
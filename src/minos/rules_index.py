@@ -0,0 +1,257 @@
+"""
+规则缓存索引：缓存根目录下的 index.json 记录各法规的版本、激活版本、sha256 与规则/编译缓存路径。
+- 由 rulesync 在安装/激活/清理时增量维护，写入采用临时文件 + os.replace，读者不会看到半写状态
+- scan 解析激活规则时只读取一次索引，无需遍历版本目录与逐个解析 metadata.json
+- 旧缓存（无索引或索引缺少某法规）按目录扫描重建对应条目，索引指向的文件缺失时同样重建
+- 激活版本以法规目录下的 ACTIVE 指针文件为准（临时文件 + rename 原子切换），索引中的 active 为其镜像，scan 不依赖它；
+  无 ACTIVE 的旧缓存回退读取 metadata.json 的 active 字段
+- 并发协调（锁顺序固定为 版本锁 → 法规锁 → 索引锁，避免死锁）：
+  法规目录 .lock 为读写锁（安装/激活/清理持写锁，scan 加载规则持读锁）；
+  .<version>.sync.lock 保证同一版本只有一个进程下载；缓存根目录 .index.lock 串行化索引读改写
+缓存布局：<cache_root>/<regulation>/{ACTIVE, <version>/{rules.yaml, rules.compiled, metadata.json}}
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from minos import rulepack
+from minos.filelock import DEFAULT_LOCK_TIMEOUT, FileLock, LockTimeout
+
+INDEX_FILE = "index.json"
+INDEX_FORMAT = 1
+ACTIVE_FILE = "ACTIVE"
+LOCK_FILE = ".lock"
+INDEX_LOCK_FILE = ".index.lock"
+
+_KEEP = object()
+
+
+def index_path(cache_root: Path) -> Path:
+    return cache_root / INDEX_FILE
+
+
+def cache_lock(reg_dir: Path, shared: bool = False) -> FileLock:
+    """法规目录读写锁：安装/激活/清理持写锁，读取规则文件持读锁。"""
+    return FileLock(reg_dir / LOCK_FILE, shared=shared)
+
+
+def version_lock(reg_dir: Path, version: str) -> FileLock:
+    """单版本下载锁（single flight）：同一版本并发同步时只有持锁者下载，其余等待后复用。"""
+    return FileLock(reg_dir / f".{version}.sync.lock")
+
+
+def remove_version_lock(reg_dir: Path, version: str) -> bool:
+    """
+    版本淘汰后删除其下载锁文件（调用方持法规写锁）。只做非阻塞尝试：该版本正在同步（锁被持有）时保留，
+    返回是否已删除。
+    """
+    lock = version_lock(reg_dir, version)
+    lock.timeout = 0
+    if not lock.path.exists():
+        return False
+    try:
+        lock.acquire()
+        lock.remove()
+    except (LockTimeout, OSError):
+        lock.release()
+        return False
+    return True
+
+
+def _index_lock(cache_root: Path, timeout: float = DEFAULT_LOCK_TIMEOUT) -> FileLock:
+    return FileLock(cache_root / INDEX_LOCK_FILE, timeout=timeout)
+
+
+def _empty_index() -> Dict[str, Any]:
+    return {"format": INDEX_FORMAT, "regulations": {}}
+
+
+def load_index(cache_root: Path) -> Dict[str, Any]:
+    """读取索引；不存在或格式不符时返回空索引。"""
+    try:
+        data = json.loads(index_path(cache_root).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return _empty_index()
+    if not isinstance(data, dict) or data.get("format") != INDEX_FORMAT or not isinstance(data.get("regulations"), dict):
+        return _empty_index()
+    return data
+
+
+def _write_index(cache_root: Path, data: Dict[str, Any]) -> None:
+    _atomic_write_text(index_path(cache_root), json.dumps(data, ensure_ascii=False, indent=2, sort_keys=True))
+
+
+def _atomic_write_text(path: Path, text: str) -> None:
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        with tmp.open("w", encoding="utf-8") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except OSError:
+        tmp.unlink(missing_ok=True)
+        raise
+
+
+def _read_pointer(reg_dir: Path) -> Optional[str]:
+    try:
+        version = (reg_dir / ACTIVE_FILE).read_text(encoding="utf-8").strip()
+    except OSError:
+        return None
+    return version or None
+
+
+def write_active(reg_dir: Path, version: str) -> None:
+    """原子切换激活版本：写临时文件后 rename 覆盖 ACTIVE，并发读者只会看到旧值或新值。"""
+    _atomic_write_text(reg_dir / ACTIVE_FILE, version + "\n")
+
+
+def read_active(reg_dir: Path) -> Optional[str]:
+    """读取激活版本（指向已删除版本时返回 None）；无 ACTIVE 指针的旧缓存回退扫描 metadata.json。"""
+    version = _read_pointer(reg_dir)
+    if version is None:
+        return scan_regulation(reg_dir).get("active")
+    return version if (reg_dir / version).is_dir() else None
+
+
+def _read_metadata(version_dir: Path) -> Dict[str, Any]:
+    try:
+        meta = json.loads((version_dir / "metadata.json").read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    return meta if isinstance(meta, dict) else {}
+
+
+def _version_record(reg_name: str, version: str, meta: Dict[str, Any]) -> Dict[str, Any]:
+    rel = f"{reg_name}/{version}"
+    return {
+        "sha256": meta.get("sha256"),
+        "source": meta.get("source"),
+        "installed_at": meta.get("installed_at"),
+        "rules_path": f"{rel}/rules.yaml",
+        "compiled_path": f"{rel}/rules.compiled",
+    }
+
+
+def scan_regulation(reg_dir: Path) -> Dict[str, Any]:
+    """按目录重建单个法规的索引条目（旧缓存迁移/自愈使用，代价与版本数成正比）。"""
+    entry: Dict[str, Any] = {"active": None, "versions": {}}
+    if not reg_dir.is_dir():
+        return entry
+    legacy_active = None
+    for sub in sorted(reg_dir.iterdir()):
+        if not sub.is_dir() or sub.name.startswith("."):
+            continue
+        meta = _read_metadata(sub)
+        entry["versions"][sub.name] = _version_record(reg_dir.name, sub.name, meta)
+        if meta.get("active") and legacy_active is None:
+            legacy_active = sub.name
+    pointer = _read_pointer(reg_dir)
+    if pointer is None:
+        entry["active"] = legacy_active
+    elif pointer in entry["versions"]:
+        entry["active"] = pointer
+    return entry
+
+
+def update_regulation(
+    reg_dir: Path,
+    add: Iterable[str] = (),
+    remove: Iterable[str] = (),
+    active: Any = _KEEP,
+) -> Dict[str, Any]:
+    """
+    增量更新 reg_dir 对应法规的索引条目并原子写回 <reg_dir.parent>/index.json。
+    - add：新安装的版本（读取其 metadata.json）
+    - remove：已删除的版本
+    - active：新的激活版本（None 表示无激活版本）；缺省时按 ACTIVE 指针对齐，修复上次崩溃留下的不一致
+    """
+    cache_root = reg_dir.parent
+    with _index_lock(cache_root):
+        return _update_locked(reg_dir, add, remove, active)
+
+
+def _update_locked(reg_dir: Path, add: Iterable[str], remove: Iterable[str], active: Any) -> Dict[str, Any]:
+    cache_root = reg_dir.parent
+    data = load_index(cache_root)
+    entry = data["regulations"].get(reg_dir.name)
+    if entry is None:
+        entry = scan_regulation(reg_dir)
+    versions = entry.setdefault("versions", {})
+    for version in add:
+        versions[version] = _version_record(reg_dir.name, version, _read_metadata(reg_dir / version))
+    for version in remove:
+        versions.pop(version, None)
+        if entry.get("active") == version:
+            entry["active"] = None
+    if active is _KEEP:
+        active = read_active(reg_dir)
+    if active is not None and active not in versions:
+        versions[active] = _version_record(reg_dir.name, active, _read_metadata(reg_dir / active))
+    entry["active"] = active
+    data["regulations"][reg_dir.name] = entry
+    _write_index(cache_root, data)
+    return entry
+
+
+def _pick_version(
+    entry: Dict[str, Any], cache_root: Path, preferred: Optional[str], active: Optional[str]
+) -> Optional[str]:
+    versions = entry.get("versions") or {}
+    if preferred and preferred in versions and rulepack.exists(cache_root / versions[preferred]["rules_path"]):
+        return preferred
+    if active in versions:
+        return active
+    return sorted(versions)[-1] if versions else None
+
+
+def _rebuild_entry(index: Dict[str, Any], cache_root: Path, regulation: str) -> Dict[str, Any]:
+    reg_dir = cache_root / regulation
+    if not reg_dir.exists():
+        raise FileNotFoundError(f"未找到法规 {regulation} 的规则目录: {reg_dir}")
+    entry = scan_regulation(reg_dir)
+    index["regulations"][regulation] = entry
+    _try_store_entry(cache_root, regulation, entry)
+    return entry
+
+
+def resolve_rules(
+    index: Dict[str, Any], cache_root: Path, regulation: str, preferred: Optional[str] = None
+) -> Tuple[str, Path]:
+    """
+    解析 scan 使用的规则版本与 rules.yaml 路径：指定版本（存在时）> 激活版本 > 名称排序最新版本。
+    激活版本读取 ACTIVE 指针（无指针的旧缓存取索引中的 active），索引只用于定位文件；
+    索引缺失该法规、未登记目标版本或指向的文件已不存在时，按目录重建条目后再解析。
+    """
+    entry = index["regulations"].get(regulation)
+    rebuilt = entry is None
+    if rebuilt:
+        entry = _rebuild_entry(index, cache_root, regulation)
+    pointer = _read_pointer(cache_root / regulation)
+    version = _pick_version(entry, cache_root, preferred, pointer or entry.get("active"))
+    target = preferred or pointer
+    stale = (
+        version is None
+        or (target is not None and version != target)
+        or not rulepack.exists(cache_root / entry["versions"][version]["rules_path"])
+    )
+    if stale and not rebuilt:
+        entry = _rebuild_entry(index, cache_root, regulation)
+        version = _pick_version(entry, cache_root, preferred, pointer or entry.get("active"))
+    if version is None:
+        raise FileNotFoundError(f"未找到 {cache_root / regulation} 下的规则版本")
+    return version, cache_root / entry["versions"][version]["rules_path"]
+
+
+def _try_store_entry(cache_root: Path, regulation: str, entry: Dict[str, Any]) -> None:
+    # scan 侧的迁移写入为尽力而为：只读缓存目录或锁竞争时直接使用内存中的条目
+    try:
+        with _index_lock(cache_root, timeout=1.0):
+            data = load_index(cache_root)
+            data["regulations"][regulation] = entry
+            _write_index(cache_root, data)
+    except (OSError, LockTimeout):
+        pass
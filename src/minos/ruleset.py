@@ -0,0 +1,172 @@
+"""
+编译后的规则集：规则归一化（disabled/同 rule_id 覆盖）只做一次，按类型分组并预编码匹配模式。
+- 每个 rules.yaml 旁生成 sidecar（rules.compiled），以 YAML 内容 sha256 校验，内容变化即失效重建
+- sidecar 负载为 JSON（不使用 pickle）：共享缓存目录中被篡改的 sidecar 至多导致规则错误，无法执行代码
+- 命中 sidecar 时跳过 yaml.safe_load；sidecar 不可写（只读目录等）或规则无法与 JSON 往返一致
+  （日期、集合等 YAML 类型）时静默退回每次解析
+- 多个规则文件按加载顺序合并，语义与先拼接原始规则再归一化一致
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+from minos import rulepack
+
+COMPILED_SUFFIX = ".compiled"
+
+# sidecar 格式：魔数 + YAML 内容 sha256（hex） + JSON 负载 [[rule_id, 规则或 null（已禁用）], ...]；
+# 格式变化时递增魔数版本（v1 为 pickle 负载，不再读取）
+_MAGIC = b"MINOS-RULESET-2\n"
+
+# rule_id → (规则, 预编码模式) 或 None（已禁用）
+_Entries = Dict[str, Optional[Tuple[Dict[str, Any], bytes]]]
+
+
+class RuleSetError(Exception):
+    """规则集加载异常。"""
+
+
+class RuleSet:
+    """
+    归一化后的只读规则集：
+    - rules：生效规则（按 rule_id 首次出现的顺序，值取最后一次定义）
+    - patterns：与 rules 一一对应的 UTF-8 编码模式（无 pattern 时为 b""）
+    - by_type：type → 生效规则列表
+    """
+
+    __slots__ = ("digest", "_entries", "rules", "patterns", "by_type")
+
+    def __init__(self, entries: _Entries, digest: str = ""):
+        self.digest = digest
+        self._entries = entries
+        self.rules: List[Dict[str, Any]] = []
+        self.patterns: List[bytes] = []
+        self.by_type: Dict[str, List[Dict[str, Any]]] = {}
+        for entry in entries.values():
+            if entry is None:
+                continue
+            rule, encoded = entry
+            self.rules.append(rule)
+            self.patterns.append(encoded)
+            self.by_type.setdefault(rule.get("type") or "", []).append(rule)
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+    def __iter__(self):
+        return iter(self.rules)
+
+    def of_type(self, rtype: str) -> List[Dict[str, Any]]:
+        return self.by_type.get(rtype, [])
+
+    def __getstate__(self) -> Tuple[_Entries, str]:
+        return self._entries, self.digest
+
+    def __setstate__(self, state: Tuple[_Entries, str]) -> None:
+        entries, digest = state
+        self.__init__(entries, digest)  # type: ignore[misc]
+
+    @classmethod
+    def merge(cls, rulesets: Iterable["RuleSet"]) -> "RuleSet":
+        """按顺序合并多个规则集，后者的同名规则（含禁用）覆盖前者。"""
+        entries: _Entries = {}
+        for rs in rulesets:
+            entries.update(rs._entries)
+        return cls(entries)
+
+
+def compile_ruleset(rules: Iterable[Any], digest: str = "") -> RuleSet:
+    """归一化原始规则列表：跳过缺少 rule_id 的条目，disabled 移除同名规则，后出现的同 rule_id 覆盖前者。"""
+    entries: _Entries = {}
+    for rule in rules:
+        if not isinstance(rule, dict):
+            continue
+        rid = rule.get("rule_id")
+        if not rid:
+            continue
+        entries[rid] = None if rule.get("disabled") is True else _entry(rule)
+    return RuleSet(entries, digest)
+
+
+def _entry(rule: Dict[str, Any]) -> Tuple[Dict[str, Any], bytes]:
+    pattern = rule.get("pattern")
+    return rule, pattern.encode(errors="ignore") if isinstance(pattern, str) else b""
+
+
+def as_ruleset(rules: Union[RuleSet, Iterable[Any]]) -> RuleSet:
+    """扫描入口同时接受原始规则列表与已编译规则集，已编译时不再重复归一化。"""
+    if isinstance(rules, RuleSet):
+        return rules
+    return compile_ruleset(rules)
+
+
+def compiled_path(rules_path: Path) -> Path:
+    return rules_path.with_suffix(COMPILED_SUFFIX)
+
+
+def _read_compiled(path: Path, digest: str) -> Optional[RuleSet]:
+    try:
+        with path.open("rb") as f:
+            if f.read(len(_MAGIC)) != _MAGIC or f.read(64).decode("ascii", errors="replace") != digest:
+                return None
+            payload = json.loads(f.read().decode("utf-8"))
+        entries: _Entries = {}
+        for rid, rule in payload:
+            if rule is not None and not isinstance(rule, dict):
+                return None
+            entries[rid] = None if rule is None else _entry(rule)
+    except (OSError, TypeError, ValueError):
+        return None
+    return RuleSet(entries, digest)
+
+
+def _write_compiled(path: Path, ruleset: RuleSet) -> None:
+    payload = [[rid, entry[0] if entry is not None else None] for rid, entry in ruleset._entries.items()]
+    try:
+        text = json.dumps(payload, ensure_ascii=False)
+        if json.loads(text) != payload:
+            return
+    except (TypeError, ValueError):
+        return
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        with tmp.open("wb") as f:
+            f.write(_MAGIC)
+            f.write(ruleset.digest.encode("ascii"))
+            f.write(text.encode("utf-8"))
+        os.replace(tmp, path)
+    except OSError:
+        tmp.unlink(missing_ok=True)
+
+
+def load_ruleset(rules_path: Path, use_cache: bool = True) -> RuleSet:
+    """加载 rules.yaml 并编译；sidecar 与 YAML 内容哈希一致时直接从 JSON 负载还原。直读模式的版本从规则包按偏移读取。"""
+    try:
+        raw = rulepack.read_bytes(rules_path)
+    except FileNotFoundError as exc:
+        raise RuleSetError(f"规则文件不存在: {rules_path}") from exc
+    except rulepack.RulePackError as exc:
+        raise RuleSetError(f"读取规则包失败: {exc}") from exc
+    digest = hashlib.sha256(raw).hexdigest()
+    sidecar = compiled_path(rules_path)
+    if use_cache:
+        cached = _read_compiled(sidecar, digest)
+        if cached is not None:
+            return cached
+    try:
+        import yaml  # type: ignore
+    except Exception as exc:
+        raise RuleSetError(f"缺少 PyYAML 依赖: {exc}")
+    try:
+        data = yaml.safe_load(raw.decode("utf-8"))
+    except Exception as exc:
+        raise RuleSetError(f"读取规则 YAML 失败: {exc}")
+    if not isinstance(data, list):
+        raise RuleSetError("规则 YAML 应为列表")
+    ruleset = compile_ruleset(data, digest)
+    if use_cache:
+        _write_compiled(sidecar, ruleset)
+    return ruleset
@@ -1,20 +1,26 @@
 """
 规则同步模块：拉取、校验、缓存与回滚。
+多进程共享同一缓存目录时：同一版本的同步按版本锁串行（后到者复用先到者的安装结果），
+安装/激活/清理持法规目录写锁，scan 读取规则持读锁（见 rules_index）。
+多个法规共用缓存根目录时由调用方传入 cache_root，blob 存储等共享状态与索引位于其中；
+未传入时 cache_dir 自成一体，所有状态都在 cache_dir 内。
 """
 
 import hashlib
 import json
+import os
 import shutil
-import subprocess
 import tarfile
 import tempfile
 import urllib.error
 import urllib.parse
-import urllib.request
+import uuid
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Callable, Optional
 
+from minos import blobstore, cachegc, gitmirror, httpcache, oci, rulepack, rules_index, syncpool
+
 
 class RulesyncError(Exception):
     """基础规则同步异常。"""
@@ -24,11 +30,20 @@ class RulesyncChecksumError(RulesyncError):
     """校验失败异常。"""
 
 
+# 本地文件哈希的读缓冲区（1 MiB，单次调用内复用）
+_HASH_BUFFER_SIZE = 1024 * 1024
+
+
 def _calc_sha256(file_path: Path) -> str:
     h = hashlib.sha256()
-    with file_path.open("rb") as f:
-        for chunk in iter(lambda: f.read(8192), b""):
-            h.update(chunk)
+    buf = bytearray(_HASH_BUFFER_SIZE)
+    view = memoryview(buf)
+    with file_path.open("rb", buffering=0) as f:
+        while True:
+            n = f.readinto(buf)
+            if not n:
+                break
+            h.update(view[:n])
     return h.hexdigest()
 
 
@@ -36,10 +51,17 @@ def _is_remote_source(source: str) -> bool:
     return source.startswith(("http://", "https://", "git+", "oci://", "oci+"))
 
 
-def _download_http(source: str, dest: Path, timeout: int = 30) -> None:
+def _download_http(
+    source: str, dest: Path, timeout: int = 30, validator: Optional[httpcache.Validator] = None
+) -> Optional[httpcache.Validator]:
+    """
+    下载规则包（支持 gzip 传输编码），返回响应的校验器（ETag/Last-Modified/sha256）。
+    validator 非空时发送条件请求，上游未变化（304）时抛出 httpcache.NotModified。
+    """
     try:
-        with urllib.request.urlopen(source, timeout=timeout) as resp, dest.open("wb") as out:
-            shutil.copyfileobj(resp, out)
+        return httpcache.fetch(source, dest, timeout=timeout, validator=validator)
+    except httpcache.NotModified:
+        raise
     except urllib.error.HTTPError as exc:  # pragma: no cover - 依赖外部网络
         raise RulesyncError(f"HTTP 下载失败: {exc.code} {exc.reason}") from exc
     except urllib.error.URLError as exc:  # pragma: no cover - 依赖外部网络
@@ -63,29 +85,24 @@ def _parse_source_with_path(source: str) -> tuple[str, Optional[str]]:
     return base, path
 
 
-def _download_git(source: str, dest: Path, timeout: int = 60) -> None:
+def _download_git(source: str, dest: Path, timeout: int = 60, cache_root: Optional[Path] = None) -> None:
+    """
+    git+<repo>#path=<子路径>[&ref=<分支/标签/提交>]：经持久化 bare 镜像增量 fetch，
+    只稀疏检出子路径（见 minos.gitmirror）；目录打包为 tar.gz，文件直接作为规则包。
+    cache_root 缺省时镜像建在 dest 所在的临时目录中（不复用）。
+    """
     base, path = _parse_source_with_path(source)
     repo_url = base[len("git+") :]
+    fragment = urllib.parse.parse_qs(source.split("#", 1)[1]) if "#" in source else {}
+    rev = (fragment.get("ref") or ["HEAD"])[0]
     rel_path = Path(path) if path else Path("rules.tar.gz")
     with tempfile.TemporaryDirectory() as tmpdir:
-        repo_dir = Path(tmpdir) / "repo"
         try:
-            subprocess.run(
-                ["git", "clone", "--depth", "1", repo_url, str(repo_dir)],
-                check=True,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                timeout=timeout,
+            target = gitmirror.checkout(
+                cache_root or dest.parent, repo_url, rel_path.as_posix(), Path(tmpdir) / "wt", rev=rev, timeout=timeout
             )
-        except FileNotFoundError as exc:
-            raise RulesyncError("未找到 git 命令，请先安装 git") from exc
-        except subprocess.TimeoutExpired as exc:
-            raise RulesyncError("git 拉取超时") from exc
-        except subprocess.CalledProcessError as exc:
-            raise RulesyncError(f"git 拉取失败: {exc.stderr.strip()}") from exc
-
-        target = repo_dir / rel_path
+        except gitmirror.GitMirrorError as exc:
+            raise RulesyncError(str(exc)) from exc
         if not target.exists():
             raise RulesyncError(f"git 源未找到路径: {rel_path}")
 
@@ -96,56 +113,67 @@ def _download_git(source: str, dest: Path, timeout: int = 60) -> None:
             shutil.copyfile(target, dest)
 
 
-def _download_oci(source: str, dest: Path, timeout: int = 60) -> None:
+def _download_oci(
+    source: str,
+    dest: Path,
+    timeout: int = 60,
+    validator: Optional[httpcache.Validator] = None,
+    cache_root: Optional[Path] = None,
+) -> httpcache.Validator:
+    """
+    内置 OCI 客户端拉取规则层（见 minos.oci），返回 {"sha256": 层 digest}。
+    规则层 digest 即规则包 sha256：与 validator 记录的已安装包一致时只请求 manifest，抛出 httpcache.NotModified；
+    cache_root 下已缓存的层不再下载。
+    """
     base, path = _parse_source_with_path(source)
-    ref = base.replace("oci://", "", 1).replace("oci+", "", 1)
-    if not shutil.which("oras"):
-        raise RulesyncError("未找到 oras，请先安装以拉取 OCI 制品")
-    with tempfile.TemporaryDirectory() as tmpdir:
-        out_dir = Path(tmpdir) / "oci"
-        out_dir.mkdir(parents=True, exist_ok=True)
-        try:
-            subprocess.run(
-                ["oras", "pull", ref, "-o", str(out_dir)],
-                check=True,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                timeout=timeout,
-            )
-        except subprocess.TimeoutExpired as exc:
-            raise RulesyncError("OCI 拉取超时") from exc
-        except subprocess.CalledProcessError as exc:
-            raise RulesyncError(f"OCI 拉取失败: {exc.stderr.strip()}") from exc
-        rel_path = Path(path) if path else None
-        if rel_path:
-            target = out_dir / rel_path
-            if not target.exists():
-                raise RulesyncError(f"OCI 制品未找到路径: {rel_path}")
-            shutil.copyfile(target, dest)
-            return
-        candidates = list(out_dir.rglob("*.tar.gz"))
-        if len(candidates) != 1:
-            raise RulesyncError("OCI 制品包含多个 tar.gz，请使用 #path 指定")
-        shutil.copyfile(candidates[0], dest)
-
-
-def _prepare_remote_source(source: str, tmpdir: Path, timeout: int) -> Path:
+    try:
+        registry, layer = oci.resolve_layer(base, path, timeout=timeout)
+        digest = str(layer.get("digest") or "")
+        if validator and f"sha256:{validator.get('sha256')}" == digest:
+            raise httpcache.NotModified(source)
+        hit = oci.pull_layer(registry, layer, cache_root or dest.parent, dest)
+    except oci.OciError as exc:
+        raise RulesyncError(str(exc)) from exc
+    if hit:
+        print(f"[rulesync] OCI layer {digest[:19]} cached, skip blob download")
+    return {"etag": None, "last_modified": None, "sha256": digest.split(":", 1)[1]}
+
+
+def _prepare_remote_source(
+    source: str,
+    tmpdir: Path,
+    timeout: int,
+    validator: Optional[httpcache.Validator] = None,
+    cache_root: Optional[Path] = None,
+) -> tuple[Path, Optional[httpcache.Validator]]:
+    """
+    拉取远端规则包到 tmpdir，返回 (包路径, 校验器)；HTTP/OCI 源未变化时抛出 httpcache.NotModified。
+    cache_root 为规则缓存根目录，OCI 层缓存与 git 镜像位于其下。
+    """
     tmpdir.mkdir(parents=True, exist_ok=True)
     dest = tmpdir / "rules.tar.gz"
-    if source.startswith(("http://", "https://")):
-        _download_http(source, dest, timeout=timeout)
-    elif source.startswith("git+"):
-        _download_git(source, dest, timeout=timeout)
-    elif source.startswith(("oci://", "oci+")):
-        _download_oci(source, dest, timeout=timeout)
-    else:
-        raise RulesyncError(f"不支持的远端协议: {source}")
-    return dest
+    new_validator = None
+    # 并行同步多个法规时按主机限流（见 syncpool）
+    with syncpool.host_slot(source):
+        if source.startswith(("http://", "https://")):
+            new_validator = _download_http(source, dest, timeout=timeout, validator=validator)
+        elif source.startswith("git+"):
+            _download_git(source, dest, timeout=timeout, cache_root=cache_root)
+        elif source.startswith(("oci://", "oci+")):
+            new_validator = _download_oci(source, dest, timeout=timeout, validator=validator, cache_root=cache_root)
+        else:
+            raise RulesyncError(f"不支持的远端协议: {source}")
+    return dest, new_validator
 
 
 def _write_metadata(
-    cache_dir: Path, version: str, source: str, sha256: str, active: bool, gpg: Optional[str] = None
+    cache_dir: Path,
+    version: str,
+    source: str,
+    sha256: str,
+    active: bool,
+    gpg: Optional[str] = None,
+    version_dir: Optional[Path] = None,
 ) -> None:
     meta = {
         "version": version,
@@ -155,26 +183,156 @@ def _write_metadata(
         "installed_at": datetime.now(timezone.utc).isoformat(),
         "active": active,
     }
+    meta_path = (version_dir or cache_dir / version) / "metadata.json"
+    # 包内同名文件是 blob 硬链接，rename 替换而不原地改写
+    rules_index._atomic_write_text(meta_path, json.dumps(meta, ensure_ascii=False, indent=2))
+
+
+def _state_root(cache_dir: Path, cache_root: Optional[Path]) -> Path:
+    """共享状态（blob 存储、OCI 层缓存、git 镜像）所在目录：显式传入的缓存根目录，缺省为 cache_dir 本身。"""
+    return cache_root if cache_root is not None else cache_dir
+
+
+def _update_index(cache_dir: Path, cache_root: Optional[Path], **changes) -> None:
+    """
+    同步维护缓存根目录下的规则索引（见 rules_index）。
+    仅在 cache_dir 位于显式传入的 cache_root 下时维护，不在调用方未指定的目录中写文件。
+    """
+    if cache_root is None or cache_dir.parent != cache_root:
+        return
+    try:
+        rules_index.update_regulation(cache_dir, **changes)
+    except OSError as exc:
+        raise RulesyncError(f"写入规则索引失败: {exc}") from exc
+
+
+def _set_active(cache_dir: Path, version: str, cache_root: Optional[Path] = None) -> None:
+    """
+    原子切换 ACTIVE 指针（常数时间，崩溃安全），随后同步索引。
+    metadata.json 的 active 字段是 ACTIVE 的镜像（供旧版本读取），只改写切换前后的两个版本，不逐个改写。
+    """
+    previous = rules_index.read_active(cache_dir)
+    try:
+        rules_index.write_active(cache_dir, version)
+    except OSError as exc:
+        raise RulesyncError(f"切换激活版本失败: {exc}") from exc
+    if previous != version:
+        if previous is not None:
+            _mark_active(cache_dir, previous, False)
+        _mark_active(cache_dir, version, True)
+    _update_index(cache_dir, cache_root, active=version)
+
+
+def _mark_active(cache_dir: Path, version: str, active: bool) -> None:
+    meta_path = cache_dir / version / "metadata.json"
+    try:
+        st = meta_path.stat()
+        meta = json.loads(meta_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return
+    if not isinstance(meta, dict) or meta.get("active") is active:
+        return
+    meta["active"] = active
+    try:
+        rules_index._atomic_write_text(meta_path, json.dumps(meta, ensure_ascii=False, indent=2))
+        # 保留原 mtime：它标识安装时间（见 _install_stamp 与 cachegc.last_used）
+        os.utime(meta_path, ns=(st.st_atime_ns, st.st_mtime_ns))
+    except OSError:
+        # 以 ACTIVE 指针为准，镜像字段写入失败不影响切换
+        pass
+
+
+def _install_stamp(cache_dir: Path, version: str) -> Optional[int]:
+    try:
+        return os.stat(cache_dir / version / "metadata.json").st_mtime_ns
+    except OSError:
+        return None
+
+
+def _installed_sha256(cache_dir: Path, version: str) -> Optional[str]:
+    try:
+        meta = json.loads((cache_dir / version / "metadata.json").read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    return meta.get("sha256") if isinstance(meta, dict) else None
+
+
+def _revalidation_validator(
+    cache_dir: Path, version: str, source: str, expected_sha256: Optional[str]
+) -> Optional[httpcache.Validator]:
+    """
+    该版本已由同一 URL 安装且内容与记录的校验器一致时返回校验器，用于发送条件请求（OCI 为只取 manifest）；
+    否则返回 None（需要完整下载）。
+    """
+    validator = httpcache.ValidatorStore(cache_dir).get(source)
+    if not validator:
+        return None
+    # HTTP 需要 ETag/Last-Modified 才能发条件请求；OCI 以层 digest（即 sha256）比对 manifest
+    is_oci = source.startswith(("oci://", "oci+"))
+    if not is_oci and not (validator.get("etag") or validator.get("last_modified")):
+        return None
     meta_path = cache_dir / version / "metadata.json"
-    meta_path.write_text(json.dumps(meta, ensure_ascii=False, indent=2), encoding="utf-8")
+    try:
+        meta = json.loads(meta_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if not isinstance(meta, dict) or meta.get("source") != source or meta.get("sha256") != validator.get("sha256"):
+        return None
+    if expected_sha256 and expected_sha256 != validator.get("sha256"):
+        return None
+    return validator
+
+
+def _scratch_dir(cache_dir: Path, version: str, kind: str) -> Path:
+    """版本目录的同级临时目录（点号开头，list_versions/索引扫描会忽略）。"""
+    return cache_dir / f".{version}.{kind}.{os.getpid()}.{uuid.uuid4().hex[:8]}"
+
+
+def _swap_in(staging: Path, target_dir: Path) -> Optional[Path]:
+    """
+    将 staging 换入 target_dir（调用方持法规写锁），返回被换出的旧目录（无则 None）。
+    标准库没有目录的原子交换，旧目录先 rename 移出再 rename 新目录；持锁期间 scan 不会观察到中间状态。
+    """
+    old = None
+    if target_dir.exists():
+        old = _scratch_dir(target_dir.parent, target_dir.name, "trash")
+        os.rename(target_dir, old)
+    os.rename(staging, target_dir)
+    return old
+
+
+def _sweep_scratch(cache_dir: Path) -> list[Path]:
+    """收集崩溃遗留的临时目录：trash 一律回收，staging 仅回收所属进程已退出的。"""
+    leftovers = []
+    for p in cache_dir.iterdir():
+        if not p.name.startswith(".") or not p.is_dir():
+            continue
+        parts = p.name.split(".")
+        # .<version>.<kind>.<pid>.<suffix>，version 本身可能含点号
+        if len(parts) < 5 or parts[-3] not in ("staging", "trash"):
+            continue
+        if parts[-3] == "staging" and _pid_alive(parts[-2]):
+            continue
+        leftovers.append(p)
+    return leftovers
 
 
-def _set_active(cache_dir: Path, version: str) -> None:
-    for meta_file in cache_dir.glob("*/metadata.json"):
-        meta = json.loads(meta_file.read_text(encoding="utf-8"))
-        meta["active"] = meta_file.parent.name == version
-        meta_file.write_text(json.dumps(meta, ensure_ascii=False, indent=2), encoding="utf-8")
+def _pid_alive(pid: str) -> bool:
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except (PermissionError, ValueError, OSError):
+        return True
+    return True
 
 
 def get_active_path(cache_dir: Path) -> Optional[Path]:
-    """返回当前激活的规则目录路径，无则返回 None。"""
+    """返回当前激活的规则目录路径，无则返回 None（读取 ACTIVE 指针，不遍历版本目录）。"""
     if not cache_dir.exists():
         return None
-    for meta_file in cache_dir.glob("*/metadata.json"):
-        meta = json.loads(meta_file.read_text(encoding="utf-8"))
-        if meta.get("active"):
-            return meta_file.parent
-    return None
+    version = rules_index.read_active(cache_dir)
+    return cache_dir / version if version else None
 
 
 def sync_rules(
@@ -185,6 +343,8 @@ def sync_rules(
     gpg_key: Optional[str] = None,
     offline: bool = False,
     download_timeout: int = 30,
+    extract: bool = True,
+    cache_root: Optional[Path] = None,
 ) -> Path:
     """
     从受控仓库拉取规则包、校验并写入缓存目录，返回激活版本路径。
@@ -192,55 +352,107 @@ def sync_rules(
     - 校验（SHA256，预留 GPG）
     - 离线模式使用缓存
     - 元数据写入（版本、来源、校验结果、时间戳、active 标记）
+    - extract=False 为直读模式：不解压文件树，只存放规则包与成员偏移索引（支持 tar.gz 与 zip），scan 按偏移读取
+    - cache_root：多法规共享的缓存根目录（cache_dir 为其下的法规目录），blob 存储、OCI 层缓存、git 镜像与
+      index.json 位于其中；缺省时共享状态都放在 cache_dir 内，且不维护索引
     """
     cache_dir.mkdir(parents=True, exist_ok=True)
     target_dir = cache_dir / version
     if offline:
-        if target_dir.exists():
-            _set_active(cache_dir, version)
-            print(f"[rulesync] offline mode, using cached version {version}")
-            return target_dir
+        with rules_index.cache_lock(cache_dir):
+            if target_dir.exists():
+                _set_active(cache_dir, version, cache_root)
+                print(f"[rulesync] offline mode, using cached version {version}")
+                return target_dir
         print("[rulesync] offline mode but version not found")
         raise RulesyncError("离线模式下未找到缓存的规则版本")
 
-    def _sync_from_path(source_path: Path) -> Path:
+    # 等锁前记录安装状态：持锁后若已被其它进程安装（且校验一致），直接复用而不重复下载
+    stamp = _install_stamp(cache_dir, version)
+
+    def _sync_from_path(source_path: Path, known_sha256: Optional[str] = None) -> Path:
         if not source_path.exists():
             print(f"[rulesync] source not found: {source}")
             raise RulesyncError(f"规则源不存在: {source}")
 
-        sha256 = _calc_sha256(source_path)
+        # HTTP 下载时 sha256 已在流式写盘时算出，不再重读文件；校验失败时尚未开始解压
+        sha256 = known_sha256 or _calc_sha256(source_path)
         if expected_sha256 and sha256 != expected_sha256:
             print("[rulesync] checksum mismatch")
             raise RulesyncChecksumError("规则包校验失败")
 
-        if target_dir.exists():
-            # 清理已有版本目录
-            for child in target_dir.iterdir():
-                if child.is_dir():
-                    for sub in child.rglob("*"):
-                        if sub.is_file():
-                            sub.unlink()
-                    child.rmdir()
+        # 分阶段安装：先在同级临时目录中完成解压与元数据写入（不持法规锁），
+        # 再在写锁内以 rename 换入，旧目录整体移出后单次 rmtree
+        staging = _scratch_dir(cache_dir, version, "staging")
+        old = None
+        try:
+            store = blobstore.store_dir(_state_root(cache_dir, cache_root))
+            try:
+                if extract:
+                    # 解压 tar.gz：文件内容进入内容寻址存储，版本目录中为指向 blob 的硬链接
+                    stats = blobstore.install_tar(source_path, staging, store)
                 else:
-                    child.unlink()
-            target_dir.rmdir()
-        target_dir.mkdir(parents=True, exist_ok=True)
-
-        # 解压 tar.gz 到目标目录
-        with tarfile.open(source_path, "r:gz") as tar:
-            tar.extractall(path=target_dir)
-
-        print(f"[rulesync] synced {version} from {source} to {target_dir}")
-        _write_metadata(cache_dir, version, source, sha256, active=True, gpg=gpg_key)
-        _set_active(cache_dir, version)
+                    stats = rulepack.install_package(source_path, staging, store)
+            except (tarfile.TarError, blobstore.BlobStoreError, rulepack.RulePackError) as exc:
+                raise RulesyncError(f"规则包解压失败: {exc}") from exc
+            if not stats["files"]:
+                raise RulesyncError("规则包中没有文件")
+            _write_metadata(cache_dir, version, source, sha256, active=True, gpg=gpg_key, version_dir=staging)
+
+            with rules_index.cache_lock(cache_dir):
+                old = _swap_in(staging, target_dir)
+                _update_index(cache_dir, cache_root, add=[version])
+                _set_active(cache_dir, version, cache_root)
+        finally:
+            if staging.exists():
+                shutil.rmtree(staging, ignore_errors=True)
+        if old is not None:
+            shutil.rmtree(old, ignore_errors=True)
+        print(
+            f"[rulesync] synced {version} from {source} to {target_dir} "
+            f"(files={stats['files']} reused={stats['reused']})"
+        )
         return target_dir
 
-    if _is_remote_source(source):
-        with tempfile.TemporaryDirectory() as tmpdir:
-            source_path = _prepare_remote_source(source, Path(tmpdir), timeout=download_timeout)
-            return _sync_from_path(source_path)
-
-    return _sync_from_path(Path(source))
+    with rules_index.version_lock(cache_dir, version):
+        current = _install_stamp(cache_dir, version)
+        if current is not None and current != stamp:
+            sha256 = _installed_sha256(cache_dir, version)
+            if not expected_sha256 or sha256 == expected_sha256:
+                with rules_index.cache_lock(cache_dir):
+                    _set_active(cache_dir, version, cache_root)
+                print(f"[rulesync] reuse {version} installed by concurrent sync")
+                return target_dir
+
+        if _is_remote_source(source):
+            validator = _revalidation_validator(cache_dir, version, source, expected_sha256)
+            state_root = _state_root(cache_dir, cache_root)
+            with tempfile.TemporaryDirectory() as tmpdir:
+                try:
+                    source_path, new_validator = _prepare_remote_source(
+                        source, Path(tmpdir), timeout=download_timeout, validator=validator, cache_root=state_root
+                    )
+                except httpcache.NotModified:
+                    # 304：上游未变化，跳过下载与解压，仅确保该版本处于激活状态
+                    with rules_index.cache_lock(cache_dir):
+                        if target_dir.is_dir():
+                            _set_active(cache_dir, version, cache_root)
+                            print(f"[rulesync] not modified, using cached version {version}")
+                            return target_dir
+                    # 条件请求期间该版本已被清理/回收：不再使用校验器，完整下载
+                    print(f"[rulesync] cached version {version} removed, downloading again")
+                    source_path, new_validator = _prepare_remote_source(
+                        source, Path(tmpdir), timeout=download_timeout, cache_root=state_root
+                    )
+                installed = _sync_from_path(source_path, (new_validator or {}).get("sha256"))
+            if new_validator:
+                try:
+                    httpcache.ValidatorStore(cache_dir).put(source, new_validator)
+                except OSError:
+                    pass
+            return installed
+
+        return _sync_from_path(Path(source))
 
 
 def list_versions(cache_dir: Path) -> list[str]:
@@ -249,21 +461,25 @@ def list_versions(cache_dir: Path) -> list[str]:
         return []
     versions: list[str] = []
     for p in cache_dir.iterdir():
-        if p.is_dir():
+        # 点号开头的为安装/清理中的临时目录
+        if p.is_dir() and not p.name.startswith("."):
             versions.append(p.name)
     return versions
 
 
-def activate_version(cache_dir: Path, version: str) -> Path:
-    """切换激活规则版本。"""
+def activate_version(cache_dir: Path, version: str, cache_root: Optional[Path] = None) -> Path:
+    """切换激活规则版本（cache_root 同 sync_rules）。"""
     target_dir = cache_dir / version
-    if not target_dir.exists():
-        raise RulesyncError(f"未找到指定版本: {version}")
-    _set_active(cache_dir, version)
+    with rules_index.cache_lock(cache_dir):
+        if not target_dir.exists():
+            raise RulesyncError(f"未找到指定版本: {version}")
+        _set_active(cache_dir, version, cache_root)
     return target_dir
 
 
-def rollback(cache_dir: Path, current_version: str, target_version: Optional[str] = None) -> Path:
+def rollback(
+    cache_dir: Path, current_version: str, target_version: Optional[str] = None, cache_root: Optional[Path] = None
+) -> Path:
     """
     回滚到指定版本；若未指定则回滚到上一个版本。
     """
@@ -271,7 +487,7 @@ def rollback(cache_dir: Path, current_version: str, target_version: Optional[str
     if target_version:
         if target_version not in versions:
             raise RulesyncError(f"未找到目标版本: {target_version}")
-        return activate_version(cache_dir, target_version)
+        return activate_version(cache_dir, target_version, cache_root)
 
     if current_version not in versions:
         raise RulesyncError(f"当前版本不存在: {current_version}")
@@ -279,36 +495,126 @@ def rollback(cache_dir: Path, current_version: str, target_version: Optional[str
     if idx == 0:
         raise RulesyncError("没有更早的版本可回滚")
     prev_version = versions[idx - 1]
-    return activate_version(cache_dir, prev_version)
+    return activate_version(cache_dir, prev_version, cache_root)
 
 
-def cleanup(cache_dir: Path, keep: int = 3) -> None:
+def cleanup(cache_dir: Path, keep: int = 3, cache_root: Optional[Path] = None) -> None:
     """
-    清理旧版本/缓存，只保留最新 keep 个版本（按名称排序）。
+    清理旧版本，只保留最近使用的 keep 个版本（scan 访问时间，无记录时按安装时间）；
+    激活版本与固定版本始终保留（cache_root 同 sync_rules）。按容量/时长回收见 gc_cache/gc_regulation。
     """
     if keep <= 0:
         return
-    versions = sorted(list_versions(cache_dir))
-    if len(versions) <= keep:
-        return
-    to_delete = versions[:-keep]
-    for version in to_delete:
+    with rules_index.cache_lock(cache_dir):
+        trash = _sweep_scratch(cache_dir) if cache_dir.exists() else []
+        records = cachegc.scan_versions(cache_dir, list_versions(cache_dir))
+        plan = cachegc.plan_eviction(records, keep=keep)
+        trash += _evict_locked(cache_dir, plan["victims"], cache_root)[0]
+    _discard(trash, cache_dir, cache_root)
+
+
+def gc_cache(
+    cache_root: Path,
+    max_bytes: Optional[int] = None,
+    max_age: Optional[float] = None,
+    regulations: Optional[list[str]] = None,
+) -> dict:
+    """
+    按容量预算（max_bytes，字节）与最长未使用时长（max_age，秒）回收缓存根目录下各法规的版本，
+    从最久未使用的版本起淘汰，激活与固定版本永不淘汰。regulations 缺省为缓存中由 rulesync 管理的全部法规。
+    只统计与回收版本目录（及随之失去引用的 blob）；OCI 层缓存与 git 镜像不计入预算。
+    返回 {"evicted": ["<法规>/<版本>", ...], "freed": 预计释放字节数}。
+    """
+    regs = regulations if regulations is not None else cachegc.regulation_dirs(cache_root)
+    return _gc_dirs([cache_root / reg for reg in regs], cache_root, max_bytes, max_age)
+
+
+def gc_regulation(
+    cache_dir: Path,
+    max_bytes: Optional[int] = None,
+    max_age: Optional[float] = None,
+    cache_root: Optional[Path] = None,
+) -> dict:
+    """回收单个法规目录的版本（cache_root 同 sync_rules），参数与返回值同 gc_cache。"""
+    return _gc_dirs([cache_dir], cache_root, max_bytes, max_age)
+
+
+def _gc_dirs(
+    reg_dirs: list[Path], cache_root: Optional[Path], max_bytes: Optional[int], max_age: Optional[float]
+) -> dict:
+    stats: dict = {"evicted": [], "freed": 0}
+    if max_bytes is None and max_age is None:
+        return stats
+    dirs = {reg_dir.name: reg_dir for reg_dir in reg_dirs if reg_dir.is_dir()}
+    records = []
+    # 统计阶段只持读锁，不阻塞 scan；淘汰前在写锁内复核
+    for reg_dir in dirs.values():
+        with rules_index.cache_lock(reg_dir, shared=True):
+            records += cachegc.scan_versions(reg_dir, list_versions(reg_dir), usage=max_bytes is not None)
+    plan = cachegc.plan_eviction(records, max_bytes=max_bytes, max_age=max_age)
+    by_reg: dict = {}
+    for record in plan["victims"]:
+        by_reg.setdefault(record["regulation"], []).append(record)
+    for reg, victims in by_reg.items():
+        reg_dir = dirs[reg]
+        with rules_index.cache_lock(reg_dir):
+            trash = _sweep_scratch(reg_dir)
+            moved, removed = _evict_locked(reg_dir, victims, cache_root)
+        _discard(trash + moved, reg_dir, cache_root)
+        stats["evicted"] += [f"{reg}/{version}" for version in removed]
+    stats["freed"] = plan["freed"]
+    if stats["evicted"]:
+        print(f"[rulesync] cache gc evicted {len(stats['evicted'])} versions: {', '.join(stats['evicted'])}")
+    return stats
+
+
+def pin_version(cache_dir: Path, version: str) -> None:
+    """固定版本：回收时永不淘汰。"""
+    with rules_index.cache_lock(cache_dir):
+        if not (cache_dir / version).is_dir():
+            raise RulesyncError(f"未找到指定版本: {version}")
+        cachegc.write_pins(cache_dir, cachegc.read_pins(cache_dir) | {version})
+
+
+def unpin_version(cache_dir: Path, version: str) -> None:
+    with rules_index.cache_lock(cache_dir):
+        cachegc.write_pins(cache_dir, cachegc.read_pins(cache_dir) - {version})
+
+
+def _evict_locked(cache_dir: Path, victims: list, cache_root: Optional[Path] = None) -> tuple[list[Path], list[str]]:
+    # 调用方持法规写锁：复核激活/固定状态与访问时间（统计后被 scan 使用过的版本跳过），rename 移出、删除版本下载锁文件并更新索引
+    protected = cachegc.protected_versions(cache_dir)
+    trash = []
+    removed = []
+    for record in victims:
+        version = record["version"]
         target_dir = cache_dir / version
-        if target_dir.exists() and target_dir.is_dir():
-            for sub in target_dir.rglob("*"):
-                if sub.is_file():
-                    sub.unlink()
-            # 删除空目录
-            for subdir in sorted(target_dir.rglob("*"), reverse=True):
-                if subdir.is_dir():
-                    try:
-                        subdir.rmdir()
-                    except OSError:
-                        pass
-            try:
-                target_dir.rmdir()
-            except OSError:
-                pass
+        if version in protected or not target_dir.is_dir():
+            continue
+        if cachegc.last_used(target_dir) > record["last_used"]:
+            continue
+        moved = _scratch_dir(cache_dir, version, "trash")
+        try:
+            os.rename(target_dir, moved)
+        except OSError:
+            continue
+        trash.append(moved)
+        removed.append(version)
+        rules_index.remove_version_lock(cache_dir, version)
+    if removed:
+        _update_index(cache_dir, cache_root, remove=removed)
+    return trash, removed
+
+
+def _discard(trash: list[Path], cache_dir: Path, cache_root: Optional[Path]) -> None:
+    # 写锁内只做 rename，目录树在锁外各自单次 rmtree 删除，不阻塞 scan
+    for path in trash:
+        shutil.rmtree(path, ignore_errors=True)
+    # 删除版本目录后回收已无引用的 blob（未传 cache_root 安装的版本，其 blob 在法规目录自身的存储中）
+    for root in dict.fromkeys((_state_root(cache_dir, cache_root), cache_dir)):
+        freed = blobstore.gc(blobstore.store_dir(root))
+        if freed["removed"]:
+            print(f"[rulesync] gc removed {freed['removed']} blobs ({freed['freed']} bytes)")
 
 
 # 默认法规列表（来自 PRD 法规参考链接）
@@ -323,6 +629,8 @@ def sync_regulations(
     cleanup_keep: int = 1,
     offline: bool = False,
     retries: int = 0,
+    jobs: int = 1,
+    backoff: float = syncpool.DEFAULT_BACKOFF,
 ) -> None:
     """
     同步多个法规集，默认同步 PRD 法规参考链接中的全部法规。
@@ -331,7 +639,9 @@ def sync_regulations(
     - downloader: 可注入的下载器，签名 downloader(regulation, version, cache_root) -> sha256
     - cleanup_keep: 同步成功后保留的版本数（按法规目录内处理）
     - offline: 离线模式，仅使用已有缓存，缺失则报错
-    - retries: 下载失败的重试次数（默认 0）
+    - retries: 下载失败的重试次数（默认 0），按法规独立指数退避（backoff 秒起）
+    - jobs: 并发同步的法规数（默认 1 顺序执行；大于 1 时 downloader 在多个工作线程中并发调用）
+    某个法规失败不影响其它法规完成同步，全部结束后再抛出失败法规的异常。
     """
     regs = regulations or DEFAULT_REGULATIONS
     cache_root.mkdir(parents=True, exist_ok=True)
@@ -339,33 +649,44 @@ def sync_regulations(
     if downloader is None and not offline:
         raise RulesyncError("在线规则同步未实现，请提供 downloader 或启用离线模式")
 
-    for reg in regs:
-        reg_dir = cache_root / reg
-        reg_dir.mkdir(parents=True, exist_ok=True)
-
-        if offline:
+    if offline:
+        for reg in regs:
+            reg_dir = cache_root / reg
+            reg_dir.mkdir(parents=True, exist_ok=True)
             active = get_active_path(reg_dir)
             if active is None:
                 raise RulesyncError(f"离线模式下未找到 {reg} 缓存")
             print(f"[rulesync] offline use cached {reg} -> {active}")
-            continue
+        return
 
+    def _sync_one(reg: str) -> None:
+        reg_dir = cache_root / reg
+        reg_dir.mkdir(parents=True, exist_ok=True)
         # 通过注入 downloader 拉取指定法规版本并写入隔离目录
-        attempts = 0
-        while True:
-            try:
-                downloader(reg, version, reg_dir)  # type: ignore[misc]
-                break
-            except RulesyncError as exc:
-                attempts += 1
-                if attempts > retries:
-                    raise
-                print(f"[rulesync] download failed for {reg}, retry {attempts}/{retries}: {exc}")
-            except Exception as exc:
-                attempts += 1
-                if attempts > retries:
-                    raise RulesyncError(f"同步 {reg} 失败: {exc}") from exc
-                print(f"[rulesync] download failed for {reg}, retry {attempts}/{retries}: {exc}")
+        try:
+            syncpool.call_with_retries(
+                lambda: downloader(reg, version, reg_dir),  # type: ignore[misc]
+                reg,
+                retries=retries,
+                backoff=backoff,
+            )
+        except RulesyncError:
+            raise
+        except Exception as exc:
+            raise RulesyncError(f"同步 {reg} 失败: {exc}") from exc
 
         if cleanup_keep and cleanup_keep > 0:
-            cleanup(reg_dir, keep=cleanup_keep)
+            cleanup(reg_dir, keep=cleanup_keep, cache_root=cache_root)
+
+    results = syncpool.run_parallel(regs, _sync_one, jobs=jobs)
+    _raise_failures({reg: exc for reg, (_, exc) in results.items() if exc is not None})
+
+
+def _raise_failures(failures: dict) -> None:
+    """单个法规失败时原样抛出其异常；多个失败时汇总为一个 RulesyncError。"""
+    if not failures:
+        return
+    if len(failures) == 1:
+        raise next(iter(failures.values()))
+    detail = "; ".join(f"{reg}: {exc}" for reg, exc in failures.items())
+    raise RulesyncError(f"{len(failures)} 个法规同步失败: {detail}") from next(iter(failures.values()))
@@ -5,13 +5,16 @@
 """
 
 import html as html_lib
+import json
+import os
 import re
 import hashlib
-import urllib.request
-import urllib.error
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 
+from minos import httpcache, syncpool
+from minos.filelock import FileLock
+
 
 class RulesyncConvertError(Exception):
     """转换失败基础异常。"""
@@ -82,13 +85,21 @@ def read_document(path: Path) -> Tuple[str, str]:
     raise RulesyncConvertError(f"不支持的文件类型: {path.suffix}")
 
 
+# 条款标题行模式（按优先级，每个分支捕获 编号、标题 两组），合并为一个交替式正则：
+# 各分支自带 $ 锚定，交替按顺序尝试，结果与逐个模式 match 相同；英文分支以 (?i:...) 局部忽略大小写
 _CLAUSE_PATTERNS = [
-    re.compile(r"^\s*(Article|Art\.?)\s+([0-9A-Za-z\.\-\u00ba\u00b0]+)(?:\s+(.*))?$", re.IGNORECASE),
-    re.compile(r"^\s*Section\s+([0-9A-Za-z\.\-\u00ba\u00b0]+)(?:\s+(.*))?$", re.IGNORECASE),
-    re.compile(r"^\s*Art\.\s*([0-9A-Za-z\.\-\u00ba\u00b0]+)\s*[:\.]?\s*(.*)?$", re.IGNORECASE),
-    re.compile(r"^\s*第([一二三四五六七八九十百零〇\d]+)条(?=[：:、\s]|$)\s*(.*)$"),
-    re.compile(r"^\s*第?([0-9０-９]+)条(?=[：:、\s\(\)（）]|$)\s*(.*)$"),  # 日文/全角数字
+    r"(?i:(?:Article|Art\.?)\s+([0-9A-Za-z\.\-\u00ba\u00b0]+)(?:\s+(.*))?$)",
+    r"(?i:Section\s+([0-9A-Za-z\.\-\u00ba\u00b0]+)(?:\s+(.*))?$)",
+    r"(?i:Art\.\s*([0-9A-Za-z\.\-\u00ba\u00b0]+)\s*[:\.]?\s*(.*)?$)",
+    r"第([一二三四五六七八九十百零〇\d]+)条(?=[：:、\s]|$)\s*(.*)$",
+    r"第?([0-9０-９]+)条(?=[：:、\s\(\)（）]|$)\s*(.*)$",  # 日文/全角数字
 ]
+_CLAUSE_HEADER = re.compile(r"^\s*(?:" + "|".join(_CLAUSE_PATTERNS) + ")")
+
+# 预筛：标题行首个非空白字符只可能是这些（ſ 在忽略大小写时匹配 s），绝大多数正文行无需进入正则；
+# 以 第/数字 开头的只可能命中中日文分支，行内须含“条”（编号列表等正文行在此排除）
+_CLAUSE_LATIN_FIRST = frozenset("AaSs\u017f")
+_CLAUSE_CJK_FIRST = frozenset("第0123456789０１２３４５６７８９")
 
 
 _CN_NUMERAL_MAP = {
@@ -133,20 +144,23 @@ def _cn_numeral_to_int(s: str) -> Optional[int]:
 
 
 def _extract_clause_title(line: str) -> Optional[Tuple[str, str]]:
-    for pat in _CLAUSE_PATTERNS:
-        m = pat.match(line)
-        if m:
-            if len(m.groups()) == 3:
-                _, clause_raw, title = m.groups()
-            else:
-                clause_raw, title = m.groups()
-            clause = clause_raw.strip()
-            # 中文数字归一化
-            cn_val = _cn_numeral_to_int(clause)
-            if cn_val is not None:
-                clause = str(cn_val)
-            return clause, (title or "").strip()
-    return None
+    first = line[:1]
+    if first.isspace():
+        first = line.lstrip()[:1]
+    if first not in _CLAUSE_LATIN_FIRST and (first not in _CLAUSE_CJK_FIRST or "条" not in line):
+        return None
+    m = _CLAUSE_HEADER.match(line)
+    if not m:
+        return None
+    groups = m.groups()
+    # 命中分支的编号组必定参与匹配
+    i = next(k for k in range(0, len(groups), 2) if groups[k] is not None)
+    clause, title = groups[i].strip(), groups[i + 1]
+    # 中文数字归一化
+    cn_val = _cn_numeral_to_int(clause)
+    if cn_val is not None:
+        clause = str(cn_val)
+    return clause, (title or "").strip()
 
 
 def segment_text(text: str) -> List[Dict]:
@@ -511,11 +525,23 @@ def convert_files_to_yaml(
         raise RulesyncConvertError(f"缺少 PyYAML 依赖: {exc}") from exc
 
     out_path.parent.mkdir(parents=True, exist_ok=True)
-    with out_path.open("w", encoding="utf-8") as f:
-        yaml.safe_dump(rules, f, allow_unicode=True, sort_keys=False)
+    # 原子落地：并发读取 rules.yaml 的 scan 不会读到半写文件
+    _atomic_write_bytes(
+        out_path, yaml.safe_dump(rules, allow_unicode=True, sort_keys=False).encode("utf-8")
+    )
     return out_path
 
 
+def _atomic_write_bytes(path: Path, data: bytes) -> None:
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+    except OSError:
+        tmp.unlink(missing_ok=True)
+        raise
+
+
 def _cache_filename(url: str) -> str:
     h = hashlib.sha256(url.encode("utf-8")).hexdigest()[:16]
     return f"{h}.html"
@@ -523,30 +549,75 @@ def _cache_filename(url: str) -> str:
 
 def fetch_url(url: str, cache_dir: Path, timeout: int = 20) -> Path:
     """
-    下载 URL 到缓存目录；若缓存已存在则直接返回。
+    下载 URL 到缓存目录并返回缓存文件路径。
+    已缓存时以 ETag/Last-Modified 发送条件请求（304 直接复用缓存），网络不可用时回退到已有缓存。
+    多进程同时请求同一 URL 时按 URL 加锁，只下载一次，其余进程等待后直接复用缓存。
     """
+    return _fetch_with_validator(url, cache_dir, timeout)[0]
+
+
+def _fetch_with_validator(url: str, cache_dir: Path, timeout: int) -> Tuple[Path, Optional[str]]:
+    """返回 (缓存文件, 内容 sha256)；sha256 为 None 表示无法确认内容（旧缓存且无校验器）。"""
     cache_dir.mkdir(parents=True, exist_ok=True)
     target = cache_dir / _cache_filename(url)
-    if target.exists():
-        return target
+    stamp = _mtime_ns(target)
+    with FileLock(cache_dir / f".{target.stem}.lock"):
+        store = httpcache.ValidatorStore(cache_dir)
+        validator = store.get(url) if target.exists() else None
+        if stamp is None and target.exists():
+            # 等锁期间已由其它进程下载完成
+            return target, (validator or {}).get("sha256")
+        new_validator = _fetch_locked(url, target, timeout, validator)
+        if new_validator is None:
+            return target, (validator or {}).get("sha256")
+        try:
+            store.put(url, new_validator)
+        except OSError:
+            pass
+        return target, new_validator["sha256"]
+
+
+def _mtime_ns(path: Path) -> Optional[int]:
+    try:
+        return path.stat().st_mtime_ns
+    except OSError:
+        return None
+
+
+def _fetch_locked(
+    url: str, target: Path, timeout: int, validator: Optional[httpcache.Validator]
+) -> Optional[httpcache.Validator]:
+    """拉取 url 到 target，返回新的校验器；内容未变化或离线使用旧缓存时返回 None。"""
     # 支持 file:// 直接读取
     if url.startswith("file://"):
         src_path = Path(url.replace("file://", "", 1))
         if not src_path.exists():
+            if target.exists():
+                return None
             raise RulesyncConvertError(f"文件不存在: {url}")
-        target.write_bytes(src_path.read_bytes())
-        return target
+        data = src_path.read_bytes()
+        _atomic_write_bytes(target, data)
+        return {"etag": None, "last_modified": None, "sha256": hashlib.sha256(data).hexdigest()}
     try:
-        with urllib.request.urlopen(url, timeout=timeout) as resp:
-            content = resp.read()
-        target.write_bytes(content)
-        return target
-    except urllib.error.URLError as exc:  # pragma: no cover - 依赖网络
-        raise RulesyncConvertError(f"下载失败: {exc}") from exc
-    except Exception as exc:  # pragma: no cover
+        with syncpool.host_slot(url):
+            return httpcache.fetch(url, target, timeout=timeout, validator=validator)
+    except httpcache.NotModified:
+        return None
+    except Exception as exc:  # pragma: no cover - 依赖网络
+        if target.exists():
+            print(f"[rulesync] revalidate failed, using cached copy of {url}: {exc}")
+            return None
         raise RulesyncConvertError(f"下载失败: {exc}") from exc
 
 
+def _conversion_stamp(url: str, sha256: str, regulation: str, version: str) -> str:
+    return json.dumps({"url": url, "sha256": sha256, "regulation": regulation, "version": version}, sort_keys=True)
+
+
+def _stamp_path(out_path: Path) -> Path:
+    return out_path.with_name(f".{out_path.name}.source.json")
+
+
 def convert_url_to_yaml(
     url: str,
     cache_dir: Path,
@@ -556,7 +627,23 @@ def convert_url_to_yaml(
     timeout: int = 20,
 ) -> Path:
     """
-    下载 URL（带缓存）并转换为 YAML。
+    下载 URL（带缓存与条件请求）并转换为 YAML。
+    源文档内容（sha256）、法规与版本均与上次转换一致且产物仍在时跳过转换（含 304 未修改）。
     """
-    cache_file = fetch_url(url, cache_dir=cache_dir, timeout=timeout)
-    return convert_files_to_yaml(inputs=[cache_file], out_path=out_path, source_url=url, regulation=regulation, version=version)
+    cache_file, sha256 = _fetch_with_validator(url, cache_dir=cache_dir, timeout=timeout)
+    stamp = _conversion_stamp(url, sha256, regulation, version) if sha256 else None
+    stamp_path = _stamp_path(out_path)
+    if stamp and out_path.exists():
+        try:
+            if stamp_path.read_text(encoding="utf-8") == stamp:
+                print(f"[rulesync] not modified, skip conversion: {url}")
+                return out_path
+        except OSError:
+            pass
+    result = convert_files_to_yaml(inputs=[cache_file], out_path=out_path, source_url=url, regulation=regulation, version=version)
+    if stamp:
+        try:
+            _atomic_write_bytes(stamp_path, stamp.encode("utf-8"))
+        except OSError:
+            pass
+    return result
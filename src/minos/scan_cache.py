@@ -0,0 +1,146 @@
+"""
+扫描结果缓存：按文件内容哈希 + 规则集指纹缓存单文件命中结果，用于增量重扫。
+- files 表：文件标识（路径或 APK!条目）+ size + mtime_ns → 内容 sha256，未变化的文件无需再读取内容
+- results 表：(sha256, 规则指纹) → 命中模式下标，相同内容在不同路径/不同输入间复用
+- 按 last_used 做 LRU 淘汰：数据库有效体积超过 max_bytes 时删除最久未使用的条目
+- 缓存只是加速手段：查询出错（数据库损坏、被并发任务锁住超时等）时本次扫描停用缓存，按未命中处理
+"""
+
+import json
+import sqlite3
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+DEFAULT_SCAN_CACHE_DIR = Path("~/.minos/scan-cache")
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    key TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    digest TEXT NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS results (
+    digest TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    pattern_ids TEXT NOT NULL,
+    last_used REAL NOT NULL,
+    PRIMARY KEY (digest, fingerprint)
+);
+CREATE INDEX IF NOT EXISTS idx_files_last_used ON files(last_used);
+CREATE INDEX IF NOT EXISTS idx_results_last_used ON results(last_used);
+"""
+
+# 每轮淘汰删除的条目比例（按当前条目数计算，避免小缓存一次被清空）
+_EVICT_RATIO = 0.1
+
+
+class ScanCacheError(Exception):
+    """扫描缓存异常。"""
+
+
+class ScanCache:
+    """
+    单次扫描会话的缓存句柄：查询在内存中完成，写入与 last_used 更新在 close() 时一次性提交，
+    以减少并发 CI 任务间的写锁竞争。
+    """
+
+    def __init__(self, cache_dir: Path, fingerprint: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir.expanduser()
+        self.fingerprint = fingerprint
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._pending_files: List[Tuple[str, int, int, str, float]] = []
+        self._pending_results: Dict[str, Tuple[str, float]] = {}
+        self._touched_files: List[str] = []
+        self._touched_digests: List[str] = []
+        # 查询出错后记录异常并停用缓存，close() 时抛出供调用方提示
+        self.error: Optional[ScanCacheError] = None
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.cache_dir / "scan-cache.sqlite3"), timeout=30)
+            self._conn.executescript(_SCHEMA)
+        except (OSError, sqlite3.Error) as exc:
+            raise ScanCacheError(f"打开扫描缓存失败: {exc}") from exc
+
+    def lookup(self, key: str, size: int, mtime_ns: int) -> Optional[List[int]]:
+        """按文件标识与元信息查询命中模式下标；文件变化、规则集指纹不同或缓存已停用时返回 None。"""
+        row = None
+        if self.error is None:
+            try:
+                row = self._conn.execute(
+                    "SELECT r.pattern_ids, f.digest FROM files f JOIN results r ON r.digest = f.digest "
+                    "WHERE f.key = ? AND f.size = ? AND f.mtime_ns = ? AND r.fingerprint = ?",
+                    (key, size, mtime_ns, self.fingerprint),
+                ).fetchone()
+                pattern_ids = json.loads(row[0]) if row is not None else None
+            except (sqlite3.Error, ValueError) as exc:
+                self.error = ScanCacheError(f"查询扫描缓存失败: {exc}")
+                row = None
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._touched_files.append(key)
+        self._touched_digests.append(row[1])
+        return pattern_ids
+
+    def store(self, key: str, size: int, mtime_ns: int, digest: str, pattern_ids: List[int]) -> None:
+        if self.error is not None:
+            return
+        now = time.time()
+        self._pending_files.append((key, size, mtime_ns, digest, now))
+        self._pending_results[digest] = (json.dumps(pattern_ids), now)
+
+    def close(self) -> None:
+        """提交本次扫描的写入，并按体积上限做 LRU 淘汰；缓存已停用时只关闭连接并抛出停用原因。"""
+        if self.error is not None:
+            self._conn.close()
+            raise self.error
+        now = time.time()
+        try:
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO files (key, size, mtime_ns, digest, last_used) VALUES (?, ?, ?, ?, ?)",
+                    self._pending_files,
+                )
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO results (digest, fingerprint, pattern_ids, last_used) VALUES (?, ?, ?, ?)",
+                    [(d, self.fingerprint, ids, ts) for d, (ids, ts) in self._pending_results.items()],
+                )
+                self._conn.executemany(
+                    "UPDATE files SET last_used = ? WHERE key = ?", [(now, k) for k in self._touched_files]
+                )
+                self._conn.executemany(
+                    "UPDATE results SET last_used = ? WHERE digest = ? AND fingerprint = ?",
+                    [(now, d, self.fingerprint) for d in self._touched_digests],
+                )
+            self._evict()
+        except sqlite3.Error as exc:
+            raise ScanCacheError(f"写入扫描缓存失败: {exc}") from exc
+        finally:
+            self._conn.close()
+
+    def _used_bytes(self) -> int:
+        page_size = self._conn.execute("PRAGMA page_size").fetchone()[0]
+        page_count = self._conn.execute("PRAGMA page_count").fetchone()[0]
+        free_count = self._conn.execute("PRAGMA freelist_count").fetchone()[0]
+        return (page_count - free_count) * page_size
+
+    def _evict(self) -> None:
+        # 删除后的空闲页由 sqlite 复用，按有效页计算体积，无需 VACUUM
+        while self.max_bytes > 0 and self._used_bytes() > self.max_bytes:
+            removed = 0
+            with self._conn:
+                for table in ("results", "files"):
+                    count = self._conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                    removed += self._conn.execute(
+                        f"DELETE FROM {table} WHERE rowid IN (SELECT rowid FROM {table} ORDER BY last_used LIMIT ?)",
+                        (max(int(count * _EVICT_RATIO), 1),),
+                    ).rowcount
+            if not removed:
+                break
@@ -1,55 +1,600 @@
 """
 SDK/敏感 API/字符串 扫描（简化实现）：
 - 支持扫描目录、文本文件、APK 压缩包，按规则 pattern 做子串匹配。
+- DEX 文件只匹配解析出的字符串池，避免扫描字节码。
 - 可选输出 JSON/HTML 报告。
 """
 
+import hashlib
+import io
 import json
+import mmap
+import re
+import shutil
+import tempfile
 import zipfile
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timezone
+from itertools import chain, islice
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Tuple, Union
+
+from minos import dex
+from minos.archive import NESTED_SEP, ArchiveReader, is_archive_name, iter_archive_members
+from minos.ruleset import RuleSet, as_ruleset, compile_ruleset
+from minos.scan_cache import ScanCache, ScanCacheError
+from minos.walker import DEFAULT_MAX_FILE_SIZE, walk_files
 
 DEFAULT_RULES_PATH = Path(__file__).parent / "rules" / "sdk_rules.yaml"
 
+# 并行扫描时每个任务包含的文件数；过小则调度开销大，过大则负载不均
+BATCH_SIZE = 64
 
-def _iter_file_contents(path: Path):
+# 流式扫描的块大小：大文件/大 APK 条目按块读取，峰值内存与文件大小无关
+STREAM_CHUNK_SIZE = 1 << 20
+
+# DEX 解析需随机访问：不超过该大小的 DEX 整块读入内存，更大的（归档条目先溢出到临时文件）以 mmap 只读映射
+DEX_MEMORY_MAX_BYTES = 32 * 1024 * 1024
+
+# 扫描目标：(文件路径, 归档成员链, 报告 location)；普通文件成员链为 None，
+# 归档内条目为 "!/" 连接的成员链（如 base.apk!/classes.dex）
+ScanTarget = Tuple[Path, Optional[str], str]
+
+
+def _iter_archive_targets(path: Path, legacy_location: bool = False) -> Iterator[ScanTarget]:
+    """
+    递归枚举归档内条目。location 形如 outer.xapk!/base.apk!/classes.dex；
+    legacy_location=True（顶层 APK 输入）时沿用仅条目名的形式，如 classes.dex。
+    """
+    try:
+        zf = zipfile.ZipFile(path, "r")
+    except zipfile.BadZipFile as exc:
+        print(f"[sdk] not a zip archive, scan as plain file {path}: {exc}")
+        yield path, None, str(path)
+        return
+    with zf:
+        for member in iter_archive_members(zf):
+            location = member if legacy_location else f"{path}{NESTED_SEP}{member}"
+            yield path, member, location
+
+
+def _iter_scan_targets(
+    path: Path,
+    excludes: Optional[List[str]] = None,
+    max_file_size: Optional[int] = DEFAULT_MAX_FILE_SIZE,
+) -> Iterator[ScanTarget]:
+    """
+    枚举扫描目标，不读取内容（内容由 worker 读取，避免在进程间传递大块字节）。
+    目录输入使用剪枝遍历：遵循 .gitignore/.minosignore、默认排除与 excludes，跳过超过 max_file_size 的文件。
+    APK/AAR/JAR/XAPK/APKS 等归档（含目录中的依赖包）递归展开内层归档后逐条目扫描。
+    """
     if path.is_dir():
-        for p in path.rglob("*"):
-            if p.is_file():
-                yield p, p.read_bytes()
-    elif path.is_file() and path.suffix.lower() == ".apk":
-        with zipfile.ZipFile(path, "r") as zf:
-            for info in zf.infolist():
-                if info.is_dir():
-                    continue
-                content = zf.read(info.filename)
-                yield Path(info.filename), content
+        for p in walk_files(path, excludes=excludes, max_file_size=max_file_size):
+            if is_archive_name(p.name):
+                yield from _iter_archive_targets(p)
+            else:
+                yield p, None, str(p)
+    elif path.is_file() and is_archive_name(path.name):
+        yield from _iter_archive_targets(path, legacy_location=path.suffix.lower() == ".apk")
     elif path.is_file():
-        yield path, path.read_bytes()
+        yield path, None, str(path)
     else:
         raise FileNotFoundError(f"输入不存在: {path}")
 
 
-def _match_rule(content: bytes, rule: Dict[str, Any]) -> bool:
-    pattern = rule.get("pattern")
-    if not pattern:
-        return False
-    return pattern.encode(errors="ignore") in content
+def _iter_batch_streams(batch: List[ScanTarget]) -> Iterator[Tuple[Path, BinaryIO]]:
+    """
+    逐个打开一批目标的只读流（普通文件或归档条目解压流），由调用方按块读取。
+    同一归档（及同一内层归档）的相邻条目复用已打开的 ZipFile。
+    """
+    with ArchiveReader() as reader:
+        for path, member, _ in batch:
+            if member is None:
+                with path.open("rb") as f:
+                    yield path, f
+                continue
+            with reader.open(path, member) as f:
+                yield Path(member), f
+
+
+def _iter_file_contents(path: Path):
+    """顺序读取输入下的全部文件内容，返回 (location, content)（整块读取，供小文件/调试使用）。"""
+    for fpath, stream in _iter_batch_streams(list(_iter_scan_targets(path))):
+        yield fpath, stream.read()
+
+
+SUPPORTED_RULE_TYPES = {"sdk", "api", "string"}
+
+
+# 匹配语义版本，计入规则集指纹：相同模式集合的命中结果发生变化时递增（v2：DEX 改为只匹配字符串池），
+# 使扫描缓存中按旧语义得到的结果失效
+MATCHER_VERSION = 2
 
+# 模式数低于该值时逐个子串查找：bytes 的子串搜索为 C 实现的快速算法，少量模式下远快于逐位置尝试的 trie 正则
+SUBSTRING_SCAN_MAX_PATTERNS = 64
 
-def _normalize_rules(rules: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-    """支持 disabled，后出现的同 rule_id 覆盖前者（用于兜底规则 + 本地覆盖合并）。"""
-    normalized: Dict[str, Dict[str, Any]] = {}
-    for r in rules:
-        rid = r.get("rule_id")
-        if not rid:
+# trie 正则的分组嵌套上限：re 的解析与编译为递归实现，嵌套过深（长模式及其大量前缀模式）会触发 RecursionError
+MAX_TRIE_NESTING = 100
+
+
+def _build_trie_regex(trie: Dict[Any, Any]) -> Optional[bytes]:
+    """
+    将 trie 转换为正则片段：同层分支按首字节区分，终止节点的后续分支为可选（贪婪取最长）。
+    自底向上迭代构建，模式长度不受递归深度限制；分组嵌套超过 MAX_TRIE_NESTING 时返回 None。
+    """
+    built: Dict[int, Tuple[bytes, int]] = {}
+    stack: List[Tuple[Dict[Any, Any], bool]] = [(trie, False)]
+    while stack:
+        node, expanded = stack.pop()
+        children = sorted(k for k in node if k is not None)
+        if not expanded:
+            stack.append((node, True))
+            stack.extend((node[k], False) for k in children)
             continue
-        if r.get("disabled") is True:
-            normalized[rid] = {"disabled": True}
+        alts = []
+        nesting = 0
+        for k in children:
+            fragment, depth = built.pop(id(node[k]))
+            alts.append(re.escape(bytes([k])) + fragment)
+            nesting = max(nesting, depth)
+        if not alts:
+            built[id(node)] = (b"", 0)
             continue
-        normalized[rid] = r
-    return [r for r in normalized.values() if not r.get("disabled")]
+        body = alts[0]
+        if len(alts) > 1:
+            body = b"(?:" + b"|".join(alts) + b")"
+            nesting += 1
+        if None in node:
+            body = b"(?:" + body + b")?"
+            nesting += 1
+        if nesting > MAX_TRIE_NESTING:
+            return None
+        built[id(node)] = (body, nesting)
+    return built[id(trie)][0]
+
+
+def _alternation_regex(patterns: List[bytes]) -> bytes:
+    """trie 嵌套过深时的退路：转义模式按长度降序并列，同一起点仍优先取最长命中。"""
+    return b"|".join(re.escape(p) for p in sorted(patterns, key=len, reverse=True))
+
+
+class PatternMatcher:
+    """
+    多模式匹配器（Aho-Corasick 思路）：规则 pattern 编译一次为 trie 自动机，单次扫描内容即得到全部命中规则。
+    - trie 以 lookahead 正则形式执行，状态转移在 re 引擎（C 实现）中完成
+    - 同一起点只返回最长命中，其前缀模式通过预计算的输出集合补全
+    - 模式少于 SUBSTRING_SCAN_MAX_PATTERNS 时不构建自动机，逐个模式做子串查找
+    - 命中结果按规则原始顺序返回，与逐条子串匹配一致
+    """
+
+    def __init__(self, rules: List[Dict[str, Any]], encoded_patterns: Optional[List[bytes]] = None):
+        self.rules: List[Dict[str, Any]] = []
+        self.skipped: List[Dict[str, Any]] = []
+        self._rule_ids_by_pattern: Dict[bytes, List[int]] = {}
+        self._always: List[int] = []
+        for pos, rule in enumerate(rules):
+            if rule.get("type") not in SUPPORTED_RULE_TYPES:
+                self.skipped.append(rule)
+                continue
+            pattern = rule.get("pattern")
+            if not pattern:
+                continue
+            idx = len(self.rules)
+            self.rules.append(rule)
+            encoded = encoded_patterns[pos] if encoded_patterns is not None else pattern.encode(errors="ignore")
+            if not encoded:
+                # 与 bytes.__contains__ 语义一致：空模式总是命中
+                self._always.append(idx)
+                continue
+            self._rule_ids_by_pattern.setdefault(encoded, []).append(idx)
+
+        self.patterns: List[bytes] = sorted(self._rule_ids_by_pattern)
+        self.max_pattern_len = max((len(p) for p in self.patterns), default=0)
+        trie: Dict[Any, Any] = {}
+        for pat in self.patterns:
+            node = trie
+            for b in pat:
+                node = node.setdefault(b, {})
+            node[None] = pat
+        # 输出集合：某模式命中时，其所有前缀模式在同一起点也必然命中
+        self._outputs: Dict[bytes, Tuple[bytes, ...]] = {}
+        for pat in self.patterns:
+            node = trie
+            prefixes = []
+            for b in pat:
+                node = node[b]
+                if None in node:
+                    prefixes.append(node[None])
+            self._outputs[pat] = tuple(prefixes)
+        self._regex = None
+        if len(self.patterns) >= SUBSTRING_SCAN_MAX_PATTERNS:
+            body = _build_trie_regex(trie)
+            if body is None:
+                body = _alternation_regex(self.patterns)
+            self._regex = re.compile(b"(?=(" + body + b"))")
+        self._pattern_ids = {pat: i for i, pat in enumerate(self.patterns)}
+        # 规则集指纹：仅由匹配语义版本与模式集合决定（缓存的是命中模式而非规则，严重级别等字段变化不影响缓存）
+        h = hashlib.sha256(b"minos-pattern-matcher-v%d" % MATCHER_VERSION)
+        for pat in self.patterns:
+            h.update(len(pat).to_bytes(4, "big"))
+            h.update(pat)
+        self.fingerprint = h.hexdigest()
+
+    def find_patterns(self, content: bytes) -> set:
+        """单次扫描返回内容中出现的全部模式（bytes）。"""
+        found: set = set()
+        self._scan_into(content, found)
+        return found
+
+    def find_patterns_stream(self, stream: BinaryIO, chunk_size: int = 1 << 20, hasher: Any = None) -> set:
+        """
+        分块扫描流内容，峰值内存约为 chunk_size + 最长模式长度。
+        相邻块保留 (最长模式长度 - 1) 字节重叠，跨块命中不会遗漏，结果与整块扫描一致。
+        传入 hasher 时边读边计算内容摘要（全部模式命中后仍读完剩余内容以完成摘要）。
+        """
+        scan = StreamScan(self)
+        if scan.done and hasher is None:
+            return scan.found
+        while True:
+            chunk = stream.read(chunk_size)
+            if not chunk:
+                break
+            if hasher is not None:
+                hasher.update(chunk)
+            scan.feed(chunk)
+            if scan.done and hasher is None:
+                break
+        return scan.found
+
+    def _scan_into(self, content: bytes, found: set) -> bool:
+        """扫描内容并累积命中模式，全部模式均已命中时返回 True 以便提前结束。"""
+        total = len(self.patterns)
+        if self._regex is None:
+            for pat in self.patterns:
+                if pat not in found and pat in content:
+                    found.add(pat)
+            return len(found) == total
+        for m in self._regex.finditer(content):
+            hit = m.group(1)
+            if hit in found:
+                continue
+            found.update(self._outputs[hit])
+            if len(found) == total:
+                return True
+        return False
+
+    def match(self, content: bytes) -> List[Dict[str, Any]]:
+        """返回命中的规则列表（保持规则原始顺序）。"""
+        return [self.rules[i] for i in self.match_indices(content)]
+
+    def match_indices(self, content: bytes) -> List[int]:
+        """返回命中规则在 self.rules 中的下标（升序），便于跨进程传递结果。"""
+        return self.indices_for_patterns(self.find_patterns(content))
+
+    def match_stream_indices(self, stream: BinaryIO, chunk_size: int = 1 << 20) -> List[int]:
+        """match_indices 的流式版本：按块读取，不整体加载文件。"""
+        return self.indices_for_patterns(self.find_patterns_stream(stream, chunk_size))
+
+    def indices_for_patterns(self, found: set) -> List[int]:
+        idxs = list(self._always)
+        for pat in found:
+            idxs.extend(self._rule_ids_by_pattern.get(pat, ()))
+        return sorted(idxs)
+
+    def pattern_ids(self, found: set) -> List[int]:
+        """命中模式 → 模式下标（同一指纹下稳定，可持久化到扫描缓存）。"""
+        return sorted(self._pattern_ids[pat] for pat in found)
+
+    def indices_for_pattern_ids(self, pattern_ids: List[int]) -> List[int]:
+        return self.indices_for_patterns({self.patterns[i] for i in pattern_ids})
+
+
+class StreamScan:
+    """增量扫描状态：由调用方推送数据块（如 APK 会话分发的条目数据），跨块保留重叠尾部。"""
+
+    def __init__(self, matcher: PatternMatcher):
+        self.matcher = matcher
+        self.found: set = set()
+        self.done = not matcher.patterns
+        self._overlap = matcher.max_pattern_len - 1
+        self._tail = b""
+
+    def feed(self, chunk: bytes) -> None:
+        if self.done or not chunk:
+            return
+        buf = self._tail + chunk if self._tail else chunk
+        self.done = self.matcher._scan_into(buf, self.found)
+        self._tail = buf[-self._overlap :] if self._overlap else b""
+
+
+def compile_rules(rules: Union[RuleSet, List[Dict[str, Any]]]) -> PatternMatcher:
+    """将规则（原始列表或已编译 RuleSet）编译为多模式匹配器（每次扫描仅编译一次）。"""
+    ruleset = as_ruleset(rules)
+    return PatternMatcher(ruleset.rules, ruleset.patterns)
+
+
+# worker 进程内的匹配器，由 _init_worker 编译一次后复用
+_WORKER_MATCHER: Optional[PatternMatcher] = None
+
+
+def _init_worker(rules: Union[RuleSet, List[Dict[str, Any]]]) -> None:
+    global _WORKER_MATCHER
+    _WORKER_MATCHER = compile_rules(rules)
+
+
+def _scan_batch(
+    batch: List[ScanTarget], matcher: Optional[PatternMatcher] = None, with_digest: bool = False
+) -> List[Tuple[List[int], Optional[str]]]:
+    """
+    扫描一批目标，返回与 batch 等长的 [(命中模式下标, 内容 sha256)]。
+    模式下标对应 matcher.patterns，可跨进程还原；with_digest=False 时不计算摘要。
+    """
+    matcher = matcher or _WORKER_MATCHER
+    if matcher is None:
+        raise RuntimeError("worker 未初始化匹配器")
+    results: List[Tuple[List[int], Optional[str]]] = []
+    for fpath, stream in _iter_batch_streams(batch):
+        hasher = hashlib.sha256() if with_digest else None
+        if fpath.suffix.lower() == ".dex":
+            found = _find_patterns_dex_stream(matcher, stream, hasher)
+        else:
+            found = matcher.find_patterns_stream(stream, STREAM_CHUNK_SIZE, hasher=hasher)
+        results.append((matcher.pattern_ids(found), hasher.hexdigest() if hasher else None))
+    return results
+
+
+def _find_patterns_dex(matcher: PatternMatcher, data: bytes, hasher: Any = None) -> set:
+    """DEX 只匹配字符串池（含类型描述符的点分类名），不扫描字节码；解析失败时退回整块字节匹配。"""
+    if hasher is not None:
+        hasher.update(data)
+    try:
+        strings = dex.read_string_pool(data)
+    except dex.DexFormatError:
+        return matcher.find_patterns(data)
+    return matcher.find_patterns(dex.build_scan_buffer(strings))
+
+
+def _find_patterns_dex_stream(matcher: PatternMatcher, stream: BinaryIO, hasher: Any = None) -> set:
+    """
+    _find_patterns_dex 的流式入口：普通文件直接使用，归档条目先复制到 SpooledTemporaryFile
+    （超过 DEX_MEMORY_MAX_BYTES 时落盘），峰值内存不随 DEX 大小增长。
+    """
+    try:
+        stream.fileno()
+    except (OSError, AttributeError, io.UnsupportedOperation):
+        with tempfile.SpooledTemporaryFile(max_size=DEX_MEMORY_MAX_BYTES) as spool:
+            shutil.copyfileobj(stream, spool, STREAM_CHUNK_SIZE)
+            return _find_patterns_dex_file(matcher, spool, hasher)
+    return _find_patterns_dex_file(matcher, stream, hasher)
+
+
+def _find_patterns_dex_file(matcher: PatternMatcher, f: Any, hasher: Any = None) -> set:
+    size = f.seek(0, io.SEEK_END)
+    f.seek(0)
+    if size <= DEX_MEMORY_MAX_BYTES:
+        return _find_patterns_dex(matcher, f.read(), hasher)
+    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        if hasher is not None:
+            hasher.update(data)
+        try:
+            strings = dex.read_string_pool(data)  # type: ignore[arg-type]
+        except dex.DexFormatError:
+            # mmap 不支持 bytes 的子串 in 运算，解析失败时按块扫描整个文件
+            f.seek(0)
+            return matcher.find_patterns_stream(f, STREAM_CHUNK_SIZE)
+    return matcher.find_patterns(dex.build_scan_buffer(strings))
+
+
+def _target_cache_key(target: ScanTarget, stat_cache: Dict[Path, Tuple[str, int, int]]) -> Tuple[str, int, int]:
+    """缓存键：绝对路径（APK 条目为 APK!条目名）+ 文件 size/mtime_ns；APK 条目沿用所在 APK 的元信息。"""
+    path, member, _ = target
+    info = stat_cache.get(path)
+    if info is None:
+        st = path.stat()
+        info = (str(path.absolute()), st.st_size, st.st_mtime_ns)
+        if member is not None:
+            stat_cache.clear()
+            stat_cache[path] = info
+    key, size, mtime_ns = info
+    if member is not None:
+        key = f"{key}!{member}"
+    return key, size, mtime_ns
+
+
+def _iter_batches(
+    inputs: List[Path],
+    batch_size: int,
+    excludes: Optional[List[str]] = None,
+    max_file_size: Optional[int] = DEFAULT_MAX_FILE_SIZE,
+) -> Iterator[List[ScanTarget]]:
+    for input_path in inputs:
+        print(f"[sdk] scanning input={input_path}")
+        batch: List[ScanTarget] = []
+        try:
+            for target in _iter_scan_targets(input_path, excludes=excludes, max_file_size=max_file_size):
+                batch.append(target)
+                if len(batch) >= batch_size:
+                    yield batch
+                    batch = []
+        except FileNotFoundError as exc:
+            print(f"[sdk] error: {exc}")
+        if batch:
+            yield batch
+
+
+def _create_executor(workers: int, rules: RuleSet) -> Executor:
+    """优先使用进程池（匹配为 CPU 密集，线程受 GIL 限制）；受限环境无法创建进程池时退回线程池。"""
+    try:
+        return ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(rules,))
+    except (OSError, NotImplementedError, ImportError) as exc:
+        print(f"[sdk] process pool unavailable, fallback to threads: {exc}")
+        return ThreadPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(rules,))
+
+
+def _run_batches(
+    batches: Iterator[List[ScanTarget]],
+    matcher: PatternMatcher,
+    rules: RuleSet,
+    workers: int,
+    cache: Optional[ScanCache] = None,
+) -> Iterator[List[Tuple[str, List[int]]]]:
+    """
+    按提交顺序产出每批结果 [(location, 命中规则下标)]，保证多 worker 下 findings 顺序确定。
+    在途批次数限制为 workers*2，避免枚举过快导致内存堆积。
+    启用缓存时，命中缓存的目标不再分发，仅未命中的目标交给 worker 扫描并回写缓存。
+    """
+    stat_cache: Dict[Path, Tuple[str, int, int]] = {}
+    with_digest = cache is not None
+
+    def _prepare(batch: List[ScanTarget]):
+        keys: List[Optional[Tuple[str, int, int]]] = [None] * len(batch)
+        cached: List[Optional[List[int]]] = [None] * len(batch)
+        if cache is not None:
+            for i, target in enumerate(batch):
+                try:
+                    keys[i] = _target_cache_key(target, stat_cache)
+                except OSError:
+                    continue
+                cached[i] = cache.lookup(*keys[i])
+        misses = [t for t, c in zip(batch, cached) if c is None]
+        return keys, cached, misses
+
+    def _merge(batch, keys, cached, scanned) -> List[Tuple[str, List[int]]]:
+        scanned_iter = iter(scanned)
+        merged: List[Tuple[str, List[int]]] = []
+        for target, key, pattern_ids in zip(batch, keys, cached):
+            if pattern_ids is None:
+                pattern_ids, digest = next(scanned_iter)
+                if cache is not None and key is not None and digest is not None:
+                    cache.store(*key, digest, pattern_ids)
+            merged.append((target[2], matcher.indices_for_pattern_ids(pattern_ids)))
+        return merged
+
+    # 只有一个批次时直接在当前进程扫描，省去进程池启动开销
+    head = list(islice(batches, 2))
+    if workers <= 1 or len(head) < 2:
+        for batch in chain(head, batches):
+            keys, cached, misses = _prepare(batch)
+            scanned = _scan_batch(misses, matcher, with_digest) if misses else []
+            yield _merge(batch, keys, cached, scanned)
+        return
+
+    with _create_executor(workers, rules) as executor:
+        pending: deque = deque()
+        for batch in chain(head, batches):
+            keys, cached, misses = _prepare(batch)
+            future = executor.submit(_scan_batch, misses, None, with_digest) if misses else None
+            pending.append((batch, keys, cached, future))
+            if len(pending) >= workers * 2:
+                b, k, c, fut = pending.popleft()
+                yield _merge(b, k, c, fut.result() if fut else [])
+        while pending:
+            b, k, c, fut = pending.popleft()
+            yield _merge(b, k, c, fut.result() if fut else [])
+
+
+def build_findings(
+    matcher: PatternMatcher, results: List[Tuple[str, List[int]]], source_flags: Dict[str, str]
+) -> List[Dict[str, Any]]:
+    """将 [(location, 命中规则下标)] 转换为 findings，并输出逐文件日志。"""
+    findings: List[Dict[str, Any]] = []
+    for location, rule_idxs in results:
+        print(f"[sdk] parsing file={location}")
+        for idx in rule_idxs:
+            rule = matcher.rules[idx]
+            finding = {
+                "rule_id": rule.get("rule_id"),
+                "regulation": rule.get("regulation"),
+                "severity": rule.get("severity", "medium"),
+                "source": source_flags.get(rule.get("rule_id")) or rule.get("source") or "region",
+                "location": location,
+                "evidence": f"pattern matched: {rule.get('pattern')}",
+                "recommendation": rule.get("recommendation", ""),
+            }
+            print(
+                f"[sdk] hit rule_id={finding['rule_id']} regulation={finding['regulation']} "
+                f"source={finding['source']} location={finding['location']}"
+            )
+            findings.append(finding)
+    return findings
+
+
+class _StreamSink:
+    def __init__(self, analyzer: "SdkAnalyzer", name: str, key: Optional[Tuple[str, int, int]] = None):
+        self._analyzer = analyzer
+        self._name = name
+        self._key = key
+        self._hasher = hashlib.sha256() if key is not None else None
+        self._scan = StreamScan(analyzer.matcher)
+
+    def write(self, chunk: bytes) -> None:
+        if self._hasher is not None:
+            self._hasher.update(chunk)
+        self._scan.feed(chunk)
+
+    def close(self) -> None:
+        digest = self._hasher.hexdigest() if self._hasher is not None else None
+        self._analyzer._add_result(self._name, self._scan.found, self._key, digest)
+
+
+class _DexSink:
+    """DEX 需要随机访问 string_ids 表，先缓冲完整条目（超过 DEX_MEMORY_MAX_BYTES 时落盘）再解析字符串池。"""
+
+    def __init__(self, analyzer: "SdkAnalyzer", name: str, key: Optional[Tuple[str, int, int]] = None):
+        self._analyzer = analyzer
+        self._name = name
+        self._key = key
+        self._spool = tempfile.SpooledTemporaryFile(max_size=DEX_MEMORY_MAX_BYTES)
+
+    def write(self, chunk: bytes) -> None:
+        self._spool.write(chunk)
+
+    def close(self) -> None:
+        hasher = hashlib.sha256() if self._key is not None else None
+        with self._spool:
+            found = _find_patterns_dex_file(self._analyzer.matcher, self._spool, hasher)
+        self._analyzer._add_result(self._name, found, self._key, hasher.hexdigest() if hasher else None)
+
+
+class SdkAnalyzer:
+    """
+    ApkSession 分析器：对 APK 内每个条目（含 DEX、资源、native 库及内层归档条目）做 SDK/API/字符串匹配，
+    结果按条目读取顺序保存在 results 中，location 与 scan_sdk_api 对顶层 APK 的约定一致（条目名）。
+    传入 cache 与 apk_path 时按条目复用扫描缓存（键与 scan_sdk_api 扫描同一 APK 时一致），命中的条目不再解压。
+    """
+
+    def __init__(self, matcher: PatternMatcher, cache: Optional[ScanCache] = None, apk_path: Optional[Path] = None):
+        self.matcher = matcher
+        self.cache = cache if apk_path is not None else None
+        self.apk_path = apk_path
+        self.results: List[Tuple[str, List[int]]] = []
+        self._stat_cache: Dict[Path, Tuple[str, int, int]] = {}
+
+    def accepts(self, name: str) -> bool:
+        return True
+
+    def open_entry(self, name: str):
+        key = None
+        if self.cache is not None:
+            try:
+                key = _target_cache_key((self.apk_path, name, name), self._stat_cache)  # type: ignore[arg-type]
+            except OSError:
+                key = None
+            pattern_ids = self.cache.lookup(*key) if key is not None else None
+            if pattern_ids is not None:
+                self.results.append((name, self.matcher.indices_for_pattern_ids(pattern_ids)))
+                return None
+        if name.lower().endswith(".dex"):
+            return _DexSink(self, name, key)
+        return _StreamSink(self, name, key)
+
+    def _add_result(
+        self, name: str, found: set, key: Optional[Tuple[str, int, int]] = None, digest: Optional[str] = None
+    ) -> None:
+        if self.cache is not None and key is not None and digest is not None:
+            self.cache.store(*key, digest, self.matcher.pattern_ids(found))
+        self.results.append((name, self.matcher.indices_for_patterns(found)))
 
 
 def load_rules_from_yaml(path: Path) -> List[Dict[str, Any]]:
@@ -76,54 +621,53 @@ def merge_rules(default_rules: List[Dict[str, Any]], override_rules: List[Dict[s
     合并兜底规则与本地覆盖规则：后出现的同 rule_id 覆盖前者，支持 disabled。
     """
     combined = list(default_rules or []) + list(override_rules or [])
-    return _normalize_rules(combined)
+    return compile_ruleset(combined).rules
 
 
 def scan_sdk_api(
     inputs: List[Path],
-    rules: List[Dict[str, Any]],
+    rules: Union[RuleSet, List[Dict[str, Any]]],
     source_flags: Optional[Dict[str, str]] = None,
     report_dir: Optional[Path] = None,
     report_name: str = "sdk_scan",
+    workers: int = 1,
+    cache_dir: Optional[Path] = None,
+    excludes: Optional[List[str]] = None,
+    max_file_size: Optional[int] = DEFAULT_MAX_FILE_SIZE,
 ) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
     """
     扫描输入（APK/源码路径），返回 (findings, stats)。
-    规则支持 type=sdk/api/string，均基于模式子串匹配。
+    规则支持 type=sdk/api/string，均基于模式子串匹配；规则集预编译为多模式匹配器，每个文件只扫描一遍。
+    workers>1 时按批次分发到进程池并行匹配，结果按文件枚举顺序合并，与单线程输出一致。
+    cache_dir 指定时启用持久化扫描缓存，未变化文件直接复用上次的命中结果。
+    目录输入遵循 .gitignore/.minosignore 与默认排除规则，excludes 追加排除模式，max_file_size 限制单文件大小。
     """
-    active_rules = _normalize_rules(rules)
+    ruleset = as_ruleset(rules)
+    matcher = compile_rules(ruleset)
+    for rule in matcher.skipped:
+        print(f"[sdk] skip rule {rule.get('rule_id')} unsupported type={rule.get('type')}")
     source_flags = source_flags or {}
 
+    cache: Optional[ScanCache] = None
+    if cache_dir is not None:
+        try:
+            cache = ScanCache(cache_dir, matcher.fingerprint)
+        except ScanCacheError as exc:
+            print(f"[sdk] cache disabled: {exc}")
+
     findings: List[Dict[str, Any]] = []
     stats: Dict[str, Any] = {"count_by_regulation": {}, "count_by_severity": {}}
 
-    for input_path in inputs:
-        print(f"[sdk] scanning input={input_path}")
+    batches = _iter_batches(inputs, BATCH_SIZE, excludes=excludes, max_file_size=max_file_size)
+    for results in _run_batches(batches, matcher, ruleset, workers, cache=cache):
+        findings.extend(build_findings(matcher, results, source_flags))
+
+    if cache is not None:
+        print(f"[sdk] cache hits={cache.hits} misses={cache.misses}")
         try:
-            for fpath, content in _iter_file_contents(input_path):
-                print(f"[sdk] parsing file={fpath}")
-                for rule in active_rules:
-                    rtype = rule.get("type")
-                    if rtype not in {"sdk", "api", "string"}:
-                        print(f"[sdk] skip rule {rule.get('rule_id')} unsupported type={rtype}")
-                        continue
-                    if _match_rule(content, rule):
-                        finding = {
-                            "rule_id": rule.get("rule_id"),
-                            "regulation": rule.get("regulation"),
-                            "severity": rule.get("severity", "medium"),
-                            "source": source_flags.get(rule.get("rule_id")) or rule.get("source") or "region",
-                            "location": str(fpath),
-                            "evidence": f"pattern matched: {rule.get('pattern')}",
-                            "recommendation": rule.get("recommendation", ""),
-                        }
-                        print(
-                            f"[sdk] hit rule_id={finding['rule_id']} regulation={finding['regulation']} "
-                            f"source={finding['source']} location={finding['location']}"
-                        )
-                        findings.append(finding)
-        except FileNotFoundError as exc:
-            print(f"[sdk] error: {exc}")
-            continue
+            cache.close()
+        except ScanCacheError as exc:
+            print(f"[sdk] cache error: {exc}")
 
     for f in findings:
         reg = f.get("regulation")
@@ -0,0 +1,121 @@
+"""
+多法规并行同步：有界线程池 + 按主机的连接数上限 + 单法规独立重试退避。
+- 每个法规是一个独立任务（下载 → 转换/解压 → 激活），线程池内已下载完成的法规在转换时，
+  其余法规的下载照常进行；网络阶段通过 host_slot 按主机限流（CCPA/CPRA 同主机不会同时占满连接），
+  限流器由调用方传给 run_parallel，只作用于该次并行同步
+- 某个法规失败重试时只占用自身的工作线程，退避等待不阻塞其它法规
+- 全部任务结束后统一返回各法规的结果或异常，由调用方决定报错方式
+"""
+
+import contextvars
+import threading
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, Optional, Tuple, TypeVar
+
+DEFAULT_JOBS = 4
+DEFAULT_PER_HOST = 2
+DEFAULT_BACKOFF = 0.5
+# 单次退避等待上限（秒）
+_MAX_BACKOFF = 30.0
+
+T = TypeVar("T")
+
+
+class HostLimiter:
+    """按主机名限制同时进行的网络连接数。"""
+
+    def __init__(self, per_host: int = DEFAULT_PER_HOST):
+        self.per_host = max(per_host, 1)
+        self._lock = threading.Lock()
+        self._slots: Dict[str, threading.BoundedSemaphore] = {}
+
+    def _semaphore(self, host: str) -> threading.BoundedSemaphore:
+        with self._lock:
+            sem = self._slots.get(host)
+            if sem is None:
+                sem = self._slots[host] = threading.BoundedSemaphore(self.per_host)
+            return sem
+
+    @contextmanager
+    def slot(self, url: str) -> Iterator[None]:
+        host = (urllib.parse.urlsplit(url).hostname or "").lower()
+        if not host:
+            # file:// 与本地路径不占用连接
+            yield
+            return
+        sem = self._semaphore(host)
+        with sem:
+            yield
+
+
+# rulesync/rulesync_convert 的下载函数均经 host_slot 限流：run_parallel 传入的限流器优先，否则使用进程内默认值
+host_limiter = HostLimiter()
+_current_limiter: contextvars.ContextVar[Optional[HostLimiter]] = contextvars.ContextVar("host_limiter", default=None)
+
+
+def host_slot(url: str):
+    """占用 url 所在主机的一个连接名额（上下文管理器）。"""
+    return (_current_limiter.get() or host_limiter).slot(url)
+
+
+def backoff_delay(attempt: int, backoff: float) -> float:
+    """第 attempt 次重试前的等待时长：backoff * 2^(attempt-1)，封顶 _MAX_BACKOFF。"""
+    return min(backoff * (2 ** (attempt - 1)), _MAX_BACKOFF) if backoff > 0 else 0.0
+
+
+def call_with_retries(
+    fn: Callable[[], T],
+    label: str,
+    retries: int = 0,
+    backoff: float = DEFAULT_BACKOFF,
+    retry_on: Tuple[type, ...] = (Exception,),
+) -> T:
+    """执行 fn，失败时按指数退避重试 retries 次；最后一次的异常原样抛出。"""
+    attempts = 0
+    while True:
+        try:
+            return fn()
+        except retry_on as exc:
+            attempts += 1
+            if attempts > retries:
+                raise
+            print(f"[rulesync] download failed for {label}, retry {attempts}/{retries}: {exc}")
+            time.sleep(backoff_delay(attempts, backoff))
+
+
+def run_parallel(
+    items: Iterable[str],
+    task: Callable[[str], T],
+    jobs: int = DEFAULT_JOBS,
+    limiter: Optional[HostLimiter] = None,
+) -> Dict[str, Tuple[Optional[T], Optional[BaseException]]]:
+    """
+    以至多 jobs 个线程并发执行 task(item)，返回 item → (结果, 异常)，顺序与 items 一致。
+    jobs <= 1 时在当前线程顺序执行（便于调试）。limiter 非空时 task 内的 host_slot 使用该限流器。
+    """
+
+    def _call(key: str) -> T:
+        token = _current_limiter.set(limiter)
+        try:
+            return task(key)
+        finally:
+            _current_limiter.reset(token)
+
+    keys = list(items)
+    results: Dict[str, Tuple[Optional[T], Optional[BaseException]]] = {}
+    if jobs <= 1 or len(keys) <= 1:
+        for key in keys:
+            try:
+                results[key] = (_call(key), None)
+            except Exception as exc:
+                results[key] = (None, exc)
+        return results
+    with ThreadPoolExecutor(max_workers=min(jobs, len(keys)), thread_name_prefix="minos-sync") as pool:
+        futures = {key: pool.submit(_call, key) for key in keys}
+        for key in keys:
+            exc = futures[key].exception()
+            results[key] = (None, exc) if exc is not None else (futures[key].result(), None)
+    return results
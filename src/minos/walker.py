@@ -0,0 +1,213 @@
+"""
+源码目录遍历：基于 os.scandir 的剪枝遍历，支持忽略规则与文件大小上限。
+- 读取各级目录下的 .gitignore / .minosignore（gitignore 语法子集：注释、!取反、/锚定、目录后缀 /、*、?、**、[]）
+- 内置默认排除（VCS/构建产物/依赖目录、图片/字体/音视频等二进制资源）；build/ 只在 Gradle 模块目录
+  （含 build.gradle(.kts)/settings.gradle(.kts)）下视为构建产物，源码中名为 build 的包照常扫描
+- 文件大小上限默认关闭（流式扫描不受文件大小影响），显式设置后跳过的文件逐个打印
+- 被排除的目录在进入前即剪枝，不再 stat/打开其中任何文件
+"""
+
+import os
+import re
+from pathlib import Path
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+IGNORE_FILES = (".gitignore", ".minosignore")
+
+DEFAULT_EXCLUDES = [
+    # 版本控制/IDE
+    ".git/",
+    ".svn/",
+    ".hg/",
+    ".idea/",
+    ".vscode/",
+    # Android/Gradle 构建产物与缓存（模块 build/ 目录见 GRADLE_BUILD_SCRIPTS）
+    ".gradle/",
+    ".cxx/",
+    ".externalNativeBuild/",
+    "captures/",
+    # 依赖/语言缓存
+    "node_modules/",
+    "__pycache__/",
+    ".venv/",
+    # 图片/字体/音视频等资源
+    "*.png",
+    "*.jpg",
+    "*.jpeg",
+    "*.gif",
+    "*.webp",
+    "*.bmp",
+    "*.ico",
+    "*.svg",
+    "*.ttf",
+    "*.otf",
+    "*.woff",
+    "*.woff2",
+    "*.mp3",
+    "*.mp4",
+    "*.ogg",
+    "*.wav",
+    "*.webm",
+]
+
+# 目录中存在这些文件时为 Gradle 模块，其下的 build/ 为构建产物，随默认排除一并剪枝
+GRADLE_BUILD_SCRIPTS = frozenset({"build.gradle", "build.gradle.kts", "settings.gradle", "settings.gradle.kts"})
+
+# 单文件大小上限（字节），超过则跳过；None 或 0 表示不限制（默认）
+DEFAULT_MAX_FILE_SIZE: Optional[int] = None
+
+# (正则, 是否取反, 是否仅匹配目录)
+_IgnoreRule = Tuple["re.Pattern[str]", bool, bool]
+
+
+def _translate_glob(pattern: str) -> str:
+    """将 gitignore 风格 glob 转换为正则（路径分隔符为 /）。"""
+    out: List[str] = []
+    i, n = 0, len(pattern)
+    while i < n:
+        c = pattern[i]
+        if c == "*":
+            if pattern.startswith("**/", i):
+                out.append("(?:.*/)?")
+                i += 3
+                continue
+            if pattern.startswith("**", i):
+                out.append(".*")
+                i += 2
+                continue
+            out.append("[^/]*")
+        elif c == "?":
+            out.append("[^/]")
+        elif c == "[":
+            j = pattern.find("]", i + 1)
+            if j == -1:
+                out.append(re.escape(c))
+            else:
+                body = pattern[i + 1 : j]
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                out.append(f"[{body}]")
+                i = j
+        elif c == "\\" and i + 1 < n:
+            i += 1
+            out.append(re.escape(pattern[i]))
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return "".join(out)
+
+
+def compile_ignore_patterns(lines: Sequence[str]) -> List[_IgnoreRule]:
+    """解析 gitignore 语法的模式行，返回编译后的规则列表（按出现顺序，后者优先）。"""
+    rules: List[_IgnoreRule] = []
+    for raw in lines:
+        line = raw.rstrip("\n").rstrip()
+        if not line or line.startswith("#"):
+            continue
+        negate = line.startswith("!")
+        if negate:
+            line = line[1:]
+        elif line.startswith("\\"):
+            line = line[1:]
+        dir_only = line.endswith("/")
+        line = line.rstrip("/")
+        if not line:
+            continue
+        # 含中间 / 的模式相对忽略文件所在目录锚定，否则匹配任意层级的名称
+        anchored = "/" in line
+        line = line.lstrip("/")
+        regex = _translate_glob(line)
+        if not anchored:
+            regex = "(?:.*/)?" + regex
+        rules.append((re.compile(f"^{regex}$"), negate, dir_only))
+    return rules
+
+
+def _read_ignore_file(path: str) -> List[_IgnoreRule]:
+    try:
+        with open(path, "r", encoding="utf-8", errors="ignore") as f:
+            return compile_ignore_patterns(f.readlines())
+    except OSError:
+        return []
+
+
+def _is_ignored(layers: List[Tuple[str, List[_IgnoreRule]]], rel_path: str, is_dir: bool) -> bool:
+    """
+    按层（根→子目录）依次匹配，后出现的规则覆盖前者，与 git 语义一致。
+    rel_path 为相对扫描根目录的路径，每层规则使用相对该层目录的路径匹配。
+    """
+    ignored = False
+    for base, rules in layers:
+        if base:
+            if not rel_path.startswith(base + "/"):
+                continue
+            sub = rel_path[len(base) + 1 :]
+        else:
+            sub = rel_path
+        for regex, negate, dir_only in rules:
+            if dir_only and not is_dir:
+                continue
+            if regex.match(sub):
+                ignored = not negate
+    return ignored
+
+
+def walk_files(
+    root: Path,
+    excludes: Optional[Sequence[str]] = None,
+    max_file_size: Optional[int] = DEFAULT_MAX_FILE_SIZE,
+    use_default_excludes: bool = True,
+    use_ignore_files: bool = True,
+) -> Iterator[Path]:
+    """
+    剪枝遍历 root 下的文件，按名称排序输出（结果稳定，便于报告比对）。
+    - excludes：额外排除模式（gitignore 语法，相对 root）
+    - max_file_size：超过该字节数的文件跳过
+    - use_ignore_files：是否读取各级 .gitignore / .minosignore
+    """
+    base_rules: List[_IgnoreRule] = []
+    if use_default_excludes:
+        base_rules.extend(compile_ignore_patterns(DEFAULT_EXCLUDES))
+    if excludes:
+        base_rules.extend(compile_ignore_patterns(excludes))
+
+    def _walk(dir_path: str, rel_dir: str, layers: List[Tuple[str, List[_IgnoreRule]]]) -> Iterator[Path]:
+        if use_ignore_files:
+            local: List[_IgnoreRule] = []
+            for name in IGNORE_FILES:
+                local.extend(_read_ignore_file(os.path.join(dir_path, name)))
+            if local:
+                layers = layers + [(rel_dir, local)]
+        try:
+            with os.scandir(dir_path) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except OSError as exc:
+            print(f"[walker] skip unreadable dir={dir_path}: {exc}")
+            return
+        gradle_module = use_default_excludes and any(e.name in GRADLE_BUILD_SCRIPTS for e in entries)
+        for entry in entries:
+            rel = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+            try:
+                is_dir = entry.is_dir(follow_symlinks=False)
+                is_file = not is_dir and entry.is_file()
+            except OSError:
+                continue
+            if not is_dir and not is_file:
+                continue
+            if _is_ignored(layers, rel, is_dir):
+                continue
+            if is_dir:
+                if gradle_module and entry.name == "build":
+                    continue
+                yield from _walk(entry.path, rel, layers)
+                continue
+            if max_file_size:
+                try:
+                    if entry.stat().st_size > max_file_size:
+                        print(f"[walker] skip large file={entry.path} size>{max_file_size}")
+                        continue
+                except OSError:
+                    continue
+            yield Path(entry.path)
+
+    yield from _walk(str(root), "", [("", base_rules)] if base_rules else [])
@@ -0,0 +1,96 @@
+import zipfile
+from pathlib import Path
+
+import pytest
+
+from minos import apk_scanner, archive, sdk_scanner
+
+MANIFEST = b"""<manifest xmlns:android="http://schemas.android.com/apk/res/android" package="com.example">
+  <uses-permission android:name="android.permission.ACCESS_FINE_LOCATION"/>
+</manifest>"""
+
+RULES = [
+    {"rule_id": "PERM_LOCATION", "type": "permission", "pattern": "android.permission.ACCESS_FINE_LOCATION", "regulation": "PIPL", "severity": "high"},
+    {"rule_id": "SDK_TRACKING", "type": "sdk", "pattern": "com.example.tracker", "regulation": "GDPR"},
+]
+
+
+def _make_apk(path: Path) -> Path:
+    with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("AndroidManifest.xml", MANIFEST)
+        zf.writestr("classes.dex", b"...com.example.tracker...")
+        zf.writestr("res/raw/a.txt", b"nothing")
+    return path
+
+
+def test_scan_apk_single_pass_feeds_manifest_and_sdk(tmp_path: Path, monkeypatch):
+    apk = _make_apk(tmp_path / "app.apk")
+    opened = []
+    real_open = zipfile.ZipFile.open
+
+    def _counting_open(self, name, *args, **kwargs):
+        opened.append(getattr(name, "filename", name))
+        return real_open(self, name, *args, **kwargs)
+
+    monkeypatch.setattr(zipfile.ZipFile, "open", _counting_open)
+
+    findings, stats = apk_scanner.scan_apk(apk, RULES, source_flags={})
+
+    assert sorted(f["rule_id"] for f in findings) == ["PERM_LOCATION", "SDK_TRACKING"]
+    assert stats["count_by_regulation"] == {"PIPL": 1, "GDPR": 1}
+    # 每个条目只解压一次
+    assert sorted(opened) == ["AndroidManifest.xml", "classes.dex", "res/raw/a.txt"]
+
+
+def test_manifest_collector_skips_other_entries(tmp_path: Path):
+    apk = _make_apk(tmp_path / "app.apk")
+    session = archive.ApkSession(apk)
+    collector = session.register(apk_scanner.manifest_scanner.ManifestCollector())
+    session.run()
+    assert collector.contents == [MANIFEST]
+
+
+def test_scan_apk_matches_sdk_scanner(tmp_path: Path):
+    apk = _make_apk(tmp_path / "app.apk")
+    findings, _ = apk_scanner.scan_apk(apk, RULES, source_flags={})
+    expected, _ = sdk_scanner.scan_sdk_api([apk], RULES, source_flags={})
+    assert [f for f in findings if f["rule_id"] == "SDK_TRACKING"] == expected
+
+
+def test_scan_apk_reuses_scan_cache(tmp_path: Path, monkeypatch, capsys):
+    apk = _make_apk(tmp_path / "app.apk")
+    cache_dir = tmp_path / "scan-cache"
+    first, _ = apk_scanner.scan_apk(apk, RULES, source_flags={}, cache_dir=cache_dir)
+    assert "[apk] cache hits=0 misses=3" in capsys.readouterr().out
+
+    opened = []
+    real_open = zipfile.ZipFile.open
+
+    def _counting_open(self, name, *args, **kwargs):
+        opened.append(getattr(name, "filename", name))
+        return real_open(self, name, *args, **kwargs)
+
+    monkeypatch.setattr(zipfile.ZipFile, "open", _counting_open)
+    second, _ = apk_scanner.scan_apk(apk, RULES, source_flags={}, cache_dir=cache_dir)
+    assert "[apk] cache hits=3 misses=0" in capsys.readouterr().out
+    assert second == first
+    # 命中缓存的条目不再解压，Manifest 仍需读取
+    assert opened == ["AndroidManifest.xml"]
+
+    # 与源码扫描路径共用同一 APK 的条目缓存
+    sdk_scanner.scan_sdk_api([apk], RULES, source_flags={}, cache_dir=cache_dir)
+    assert "[sdk] cache hits=3 misses=0" in capsys.readouterr().out
+
+
+def test_scan_apks_parallel_matches_serial_and_reports_failures(tmp_path: Path):
+    apks = [_make_apk(tmp_path / f"app{i}.apk") for i in range(3)]
+    serial = list(apk_scanner.scan_apks(apks, RULES, workers=1))
+    parallel = list(apk_scanner.scan_apks(apks, RULES, workers=3))
+    assert parallel == serial
+    assert len(serial) == 3
+
+    corrupt = tmp_path / "corrupt.apk"
+    corrupt.write_bytes(b"not a zip")
+    for workers in (1, 2):
+        with pytest.raises(apk_scanner.ApkScanError, match="corrupt.apk"):
+            list(apk_scanner.scan_apks(apks[:1] + [corrupt], RULES, workers=workers))
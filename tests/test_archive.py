@@ -0,0 +1,105 @@
+import io
+import zipfile
+from pathlib import Path
+
+from minos import archive, sdk_scanner
+
+
+def _zip_bytes(entries: dict, compression: int = zipfile.ZIP_DEFLATED) -> bytes:
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", compression=compression) as zf:
+        for name, data in entries.items():
+            zf.writestr(name, data)
+    return buf.getvalue()
+
+
+RULES = [
+    {"rule_id": "SDK_TRACKING", "type": "sdk", "pattern": "com.example.tracker", "regulation": "GDPR"},
+    {"rule_id": "API_ID_ACCESS", "type": "api", "pattern": "getDeviceId", "regulation": "PIPL"},
+]
+
+
+def test_xapk_nested_apks_reported_with_chain(tmp_path: Path):
+    base_apk = _zip_bytes({"classes.dex": b"...com.example.tracker...", "res/raw/a.txt": b"nothing"})
+    split_apk = _zip_bytes({"lib/arm64-v8a/libx.so": b"\0getDeviceId\0"})
+    xapk = tmp_path / "outer.xapk"
+    with zipfile.ZipFile(xapk, "w") as zf:
+        # base.apk 以 STORED 存放（窗口读取），split 以 DEFLATED 存放（内存解压）
+        zf.writestr(zipfile.ZipInfo("base.apk"), base_apk)
+        zf.writestr("config.arm64_v8a.apk", split_apk, compress_type=zipfile.ZIP_DEFLATED)
+        zf.writestr("manifest.json", b"{}")
+
+    findings, _ = sdk_scanner.scan_sdk_api([xapk], RULES, source_flags={})
+
+    assert [(f["rule_id"], f["location"]) for f in findings] == [
+        ("SDK_TRACKING", f"{xapk}!/base.apk!/classes.dex"),
+        ("API_ID_ACCESS", f"{xapk}!/config.arm64_v8a.apk!/lib/arm64-v8a/libx.so"),
+    ]
+    assert not list(tmp_path.glob("**/*.dex"))
+
+
+def test_large_compressed_inner_archive_spills_to_temp_file(tmp_path: Path, monkeypatch):
+    import os
+
+    payload = os.urandom(64 * 1024) + b"getDeviceId"
+    split_apk = _zip_bytes({"lib/arm64-v8a/libx.so": payload}, compression=zipfile.ZIP_STORED)
+    xapk = tmp_path / "outer.xapk"
+    xapk.write_bytes(_zip_bytes({"split.apk": split_apk}))
+    monkeypatch.setattr(archive, "NESTED_ARCHIVE_MEMORY_BYTES", 4096)
+
+    with zipfile.ZipFile(xapk) as zf:
+        inner = archive.open_nested_zip(zf, "split.apk")
+        # 超过内存上限的内层归档已落到临时文件
+        assert inner._spool._rolled
+        with inner:
+            assert inner.namelist() == ["lib/arm64-v8a/libx.so"]
+        assert inner._spool.closed
+
+    findings, _ = sdk_scanner.scan_sdk_api([xapk], RULES, source_flags={})
+    assert [f["location"] for f in findings] == [f"{xapk}!/split.apk!/lib/arm64-v8a/libx.so"]
+
+
+def test_aar_and_jar_in_source_tree(tmp_path: Path):
+    classes_jar = _zip_bytes({"com/example/tracker/Agent.class": b"\xca\xfe\xba\xbecom/example/tracker getDeviceId"})
+    libs = tmp_path / "app" / "libs"
+    libs.mkdir(parents=True)
+    (libs / "tracker.aar").write_bytes(_zip_bytes({"classes.jar": classes_jar, "AndroidManifest.xml": b"<manifest/>"}))
+
+    findings, _ = sdk_scanner.scan_sdk_api([tmp_path], RULES, source_flags={})
+
+    assert [(f["rule_id"], f["location"]) for f in findings] == [
+        ("API_ID_ACCESS", f"{libs / 'tracker.aar'}!/classes.jar!/com/example/tracker/Agent.class"),
+    ]
+
+
+def test_depth_limit_treats_deep_archive_as_plain(tmp_path: Path, monkeypatch):
+    inner = _zip_bytes({"deep.txt": b"getDeviceId"}, compression=zipfile.ZIP_STORED)
+    middle = _zip_bytes({"inner.jar": inner}, compression=zipfile.ZIP_STORED)
+    outer = tmp_path / "outer.apks"
+    outer.write_bytes(_zip_bytes({"middle.apk": middle}, compression=zipfile.ZIP_STORED))
+    monkeypatch.setattr(archive, "MAX_ARCHIVE_DEPTH", 2)
+
+    with zipfile.ZipFile(outer) as zf:
+        assert list(archive.iter_archive_members(zf)) == ["middle.apk!/inner.jar"]
+
+    findings, _ = sdk_scanner.scan_sdk_api([outer], RULES, source_flags={})
+    # STORED 的内层归档按普通文件扫描时仍能匹配到明文内容
+    assert [f["location"] for f in findings] == [f"{outer}!/middle.apk!/inner.jar"]
+
+
+def test_archive_reader_reuses_open_chain(tmp_path: Path, monkeypatch):
+    base_apk = _zip_bytes({"a.txt": b"a", "b.txt": b"b"})
+    xapk = tmp_path / "app.xapk"
+    xapk.write_bytes(_zip_bytes({"base.apk": base_apk}, compression=zipfile.ZIP_STORED))
+    opened = []
+    real_open = archive.open_nested_zip
+
+    def spy(zf, name):
+        opened.append(name)
+        return real_open(zf, name)
+
+    monkeypatch.setattr(archive, "open_nested_zip", spy)
+    with archive.ArchiveReader() as reader:
+        assert reader.open(xapk, "base.apk!/a.txt").read() == b"a"
+        assert reader.open(xapk, "base.apk!/b.txt").read() == b"b"
+    assert opened == ["base.apk"]
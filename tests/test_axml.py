@@ -0,0 +1,135 @@
+import struct
+import xml.etree.ElementTree as ET
+import zipfile
+from pathlib import Path
+
+import pytest
+
+from minos import axml, manifest_scanner
+
+ANDROID = axml.ANDROID_NS_URI
+RES_IDS = {"name": 0x01010003, "exported": 0x01010010}
+
+
+def _string_pool(strings, utf8=False) -> bytes:
+    offsets, body = [], b""
+    for s in strings:
+        offsets.append(len(body))
+        if utf8:
+            raw = s.encode("utf-8")
+            body += bytes([len(s), len(raw)]) + raw + b"\0"
+        else:
+            body += struct.pack("<H", len(s)) + s.encode("utf-16-le") + b"\0\0"
+    body += b"\0" * (-len(body) % 4)
+    header_size = 28
+    strings_start = header_size + 4 * len(strings)
+    flags = 1 << 8 if utf8 else 0
+    size = strings_start + len(body)
+    header = struct.pack("<HHIIIIII", 0x0001, header_size, size, len(strings), 0, flags, strings_start, 0)
+    return header + struct.pack(f"<{len(strings)}I", *offsets) + body
+
+
+def encode_axml(root: ET.Element, utf8=False, obfuscate=False) -> bytes:
+    """测试用 AXML 编码器：android 属性名排在字符串池前部并写入资源 ID 表，与 aapt 输出一致。"""
+    strings, index = [], {}
+
+    def sid(s):
+        if s not in index:
+            index[s] = len(strings)
+            strings.append(s)
+        return index[s]
+
+    attr_names = sorted({k.split("}")[-1] for e in root.iter() for k in e.attrib if k.startswith("{")})
+    for name in attr_names:
+        sid(name)
+    sid(ANDROID)
+    sid("android")
+    body = b""
+    for event, elem in _walk(root):
+        name_idx = sid(elem.tag)
+        if event == "end":
+            body += struct.pack("<HHIII", 0x0103, 16, 24, 1, 0xFFFFFFFF) + struct.pack("<II", 0xFFFFFFFF, name_idx)
+            continue
+        attrs = b""
+        for key, value in elem.attrib.items():
+            if key.startswith("{"):
+                ns, local = key[1:].split("}")
+                ns_idx, a_name = sid(ns), index[local]
+            else:
+                ns_idx, a_name = 0xFFFFFFFF, sid(key)
+            if value in ("true", "false"):
+                attrs += struct.pack("<IIIHBBI", ns_idx, a_name, 0xFFFFFFFF, 8, 0, 0x12, 0xFFFFFFFF if value == "true" else 0)
+            else:
+                v = sid(value)
+                attrs += struct.pack("<IIIHBBI", ns_idx, a_name, v, 8, 0, 0x03, v)
+        count = len(elem.attrib)
+        ext = struct.pack("<IIHHHHHH", 0xFFFFFFFF, name_idx, 20, 20, count, 0, 0, 0)
+        size = 16 + len(ext) + len(attrs)
+        body += struct.pack("<HHIII", 0x0102, 16, size, 1, 0xFFFFFFFF) + ext + attrs
+    ns_start = struct.pack("<HHIIIII", 0x0100, 16, 24, 1, 0xFFFFFFFF, index["android"], index[ANDROID])
+    ns_end = struct.pack("<HHIIIII", 0x0101, 16, 24, 1, 0xFFFFFFFF, index["android"], index[ANDROID])
+    pool_strings = ["" if obfuscate and i < len(attr_names) else s for i, s in enumerate(strings)]
+    pool = _string_pool(pool_strings, utf8=utf8)
+    ids = [RES_IDS.get(n, 0x01010000) for n in attr_names]
+    res_map = struct.pack("<HHI", 0x0180, 8, 8 + 4 * len(ids)) + struct.pack(f"<{len(ids)}I", *ids)
+    payload = pool + res_map + ns_start + body + ns_end
+    return struct.pack("<HHI", 0x0003, 8, 8 + len(payload)) + payload
+
+
+def _walk(elem):
+    yield "start", elem
+    for child in elem:
+        yield from _walk(child)
+    yield "end", elem
+
+
+MANIFEST = f"""<manifest xmlns:android="{ANDROID}" package="com.example">
+  <uses-permission android:name="android.permission.ACCESS_FINE_LOCATION"/>
+  <application>
+    <activity android:name=".MainActivity" android:exported="true"/>
+    <service android:name=".SyncService" android:exported="false"/>
+  </application>
+</manifest>"""
+
+RULES = [
+    {"rule_id": "PERM_LOCATION", "type": "permission", "pattern": "android.permission.ACCESS_FINE_LOCATION", "regulation": "PIPL"},
+    {"rule_id": "EXPORTED_ACTIVITY", "type": "component", "component": "activity", "regulation": "GDPR"},
+    {"rule_id": "EXPORTED_SERVICE", "type": "component", "component": "service", "regulation": "GDPR"},
+]
+
+
+def _canon(elem):
+    return (elem.tag, dict(elem.attrib), [_canon(c) for c in elem])
+
+
+@pytest.mark.parametrize("utf8", [False, True])
+def test_parse_matches_text_xml(utf8):
+    text_root = ET.fromstring(MANIFEST)
+    data = encode_axml(text_root, utf8=utf8)
+    assert axml.is_axml(data)
+    assert _canon(axml.parse(data)) == _canon(text_root)
+
+
+def test_obfuscated_attribute_names_restored_from_resource_ids():
+    data = encode_axml(ET.fromstring(MANIFEST), obfuscate=True)
+    root = axml.parse(data)
+    activity = root.find("application/activity")
+    assert activity.attrib[f"{{{ANDROID}}}name"] == ".MainActivity"
+    assert activity.attrib[f"{{{ANDROID}}}exported"] == "true"
+
+
+def test_truncated_axml_raises():
+    data = encode_axml(ET.fromstring(MANIFEST))
+    with pytest.raises(axml.AxmlError):
+        axml.parse(data[:-30] + b"\xff" * 30)
+
+
+def test_scan_manifest_from_apk_with_binary_manifest(tmp_path: Path):
+    apk = tmp_path / "app.apk"
+    with zipfile.ZipFile(apk, "w") as zf:
+        zf.writestr("AndroidManifest.xml", encode_axml(ET.fromstring(MANIFEST)))
+        zf.writestr("classes.dex", b"dex")
+
+    findings, _ = manifest_scanner.scan_manifest(apk, RULES, source_flags={})
+
+    assert sorted(f["rule_id"] for f in findings) == ["EXPORTED_ACTIVITY", "PERM_LOCATION"]
@@ -0,0 +1,169 @@
+import hashlib
+import io
+import tarfile
+import threading
+from pathlib import Path
+
+import pytest
+
+from minos import blobstore, rulesync
+
+
+def _make_pkg(path: Path, files: dict) -> Path:
+    with tarfile.open(path, "w:gz") as tar:
+        for name, data in files.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data))
+    return path
+
+
+def _blobs(cache_root: Path) -> list:
+    store = blobstore.store_dir(cache_root)
+    return sorted(p.name for p in store.glob("*/*") if not p.name.startswith("."))
+
+
+def test_versions_share_unchanged_files(tmp_path: Path):
+    reg_dir = tmp_path / "rules" / "gdpr"
+    shared = b"- rule_id: GDPR-001\n" * 100
+    pkg1 = _make_pkg(tmp_path / "v1.tar.gz", {"rules/rules.yaml": shared, "rules/extra.txt": b"v1"})
+    pkg2 = _make_pkg(tmp_path / "v2.tar.gz", {"rules/rules.yaml": shared, "rules/extra.txt": b"v2"})
+
+    rulesync.sync_rules(str(pkg1), "v1", reg_dir, cache_root=reg_dir.parent)
+    rulesync.sync_rules(str(pkg2), "v2", reg_dir, cache_root=reg_dir.parent)
+
+    a = reg_dir / "v1" / "rules" / "rules.yaml"
+    b = reg_dir / "v2" / "rules" / "rules.yaml"
+    assert a.read_bytes() == shared
+    # 未变化的文件指向同一个 blob
+    assert a.stat().st_ino == b.stat().st_ino
+    assert (reg_dir / "v2" / "rules" / "extra.txt").read_bytes() == b"v2"
+    assert len(_blobs(tmp_path / "rules")) == 3
+
+
+def test_cleanup_collects_unreferenced_blobs(tmp_path: Path):
+    cache_root = tmp_path / "rules"
+    shared = b"shared"
+    pkg1 = _make_pkg(tmp_path / "v1.tar.gz", {"rules/a.txt": shared, "rules/b.txt": b"only-v1"})
+    pkg2 = _make_pkg(tmp_path / "v2.tar.gz", {"rules/a.txt": shared, "rules/b.txt": b"only-v2"})
+    # 另一法规引用同一内容，回收时不受影响
+    pkg_other = _make_pkg(tmp_path / "o.tar.gz", {"rules/b.txt": b"only-v1"})
+
+    rulesync.sync_rules(str(pkg1), "v1", cache_root / "gdpr", cache_root=cache_root)
+    rulesync.sync_rules(str(pkg2), "v2", cache_root / "gdpr", cache_root=cache_root)
+    rulesync.sync_rules(str(pkg_other), "v1", cache_root / "pipl", cache_root=cache_root)
+    assert len(_blobs(cache_root)) == 3
+
+    rulesync.cleanup(cache_root / "gdpr", keep=1, cache_root=cache_root)
+    assert not (cache_root / "gdpr" / "v1").exists()
+    assert len(_blobs(cache_root)) == 3
+
+    rulesync.cleanup(cache_root / "pipl", keep=0)  # keep<=0 不清理
+    (cache_root / "pipl" / "v1" / "rules" / "b.txt").unlink()
+    assert blobstore.gc(blobstore.store_dir(cache_root))["removed"] == 1
+    assert len(_blobs(cache_root)) == 2
+
+
+def test_state_stays_inside_cache_dir_without_cache_root(tmp_path: Path):
+    reg_dir = tmp_path / "rules" / "gdpr"
+    pkg = _make_pkg(tmp_path / "v1.tar.gz", {"rules/rules.yaml": b"- rule_id: GDPR-001\n"})
+
+    rulesync.sync_rules(str(pkg), "v1", reg_dir)
+    rulesync.sync_rules(str(pkg), "v2", reg_dir)
+    rulesync.cleanup(reg_dir, keep=1)
+
+    # 未传 cache_root 时 blob 存储在 cache_dir 内，上级目录中不写任何文件
+    assert [p.name for p in (tmp_path / "rules").iterdir()] == ["gdpr"]
+    assert len(_blobs(reg_dir)) == 1
+    assert rulesync.list_versions(reg_dir) == ["v2"]
+
+
+def test_install_rejects_path_traversal(tmp_path: Path):
+    pkg = _make_pkg(tmp_path / "evil.tar.gz", {"../escape.txt": b"x"})
+    with pytest.raises(rulesync.RulesyncError):
+        rulesync.sync_rules(str(pkg), "v1", tmp_path / "rules" / "gdpr")
+    assert not (tmp_path / "rules" / "escape.txt").exists()
+
+
+def test_reinstall_swaps_version_dir_and_sweeps_leftovers(tmp_path: Path):
+    reg_dir = tmp_path / "rules" / "gdpr"
+    nested = {"rules/a/b/c.txt": b"deep", "rules/top.txt": b"old"}
+    rulesync.sync_rules(str(_make_pkg(tmp_path / "v1.tar.gz", nested)), "v1", reg_dir, cache_root=reg_dir.parent)
+    old_inode = (reg_dir / "v1").stat().st_ino
+
+    # 多层目录的已有版本整体换出，新目录一次 rename 换入
+    rulesync.sync_rules(
+        str(_make_pkg(tmp_path / "v1b.tar.gz", {"rules/top.txt": b"new"})), "v1", reg_dir, cache_root=reg_dir.parent
+    )
+    assert (reg_dir / "v1").stat().st_ino != old_inode
+    assert (reg_dir / "v1" / "rules" / "top.txt").read_bytes() == b"new"
+    assert not (reg_dir / "v1" / "rules" / "a").exists()
+    assert [p.name for p in reg_dir.iterdir() if p.is_dir()] == ["v1"]
+
+    # 崩溃遗留的 trash/staging 目录不算版本，cleanup 时回收
+    (reg_dir / ".v0.trash.1.deadbeef" / "x").mkdir(parents=True)
+    (reg_dir / ".v2.staging.999999999.deadbeef").mkdir()
+    assert rulesync.list_versions(reg_dir) == ["v1"]
+    rulesync.cleanup(reg_dir, keep=1, cache_root=reg_dir.parent)
+    assert [p.name for p in reg_dir.iterdir() if p.is_dir()] == ["v1"]
+
+
+def test_import_yaml_does_not_write_through_shared_blobs(tmp_path: Path):
+    pytest.importorskip("yaml")
+    from minos import cli
+
+    cache_root = tmp_path / "rules"
+    shared = b"- rule_id: GDPR-001\n  type: permission\n  pattern: android.permission.CAMERA\n"
+    for version in ("v1", "v3"):
+        pkg = _make_pkg(tmp_path / f"{version}.tar.gz", {"rules.yaml": shared, "metadata.json": b"{}"})
+        rulesync.sync_rules(str(pkg), version, cache_root / "gdpr", cache_root=cache_root)
+    assert (cache_root / "gdpr" / "v1" / "rules.yaml").stat().st_ino == (cache_root / "gdpr" / "v3" / "rules.yaml").stat().st_ino
+
+    imported = tmp_path / "import.yaml"
+    imported.write_text("- rule_id: GDPR-999\n  type: permission\n  pattern: x\n", encoding="utf-8")
+    code = cli.main(
+        [
+            "rulesync",
+            "local-import",
+            "--import-yaml",
+            str(imported),
+            "--regulation",
+            "gdpr",
+            "--version",
+            "v1",
+            "--cache-dir",
+            str(cache_root),
+            "--allow-local-sources",
+        ]
+    )
+    assert code == 0
+    assert b"GDPR-999" in (cache_root / "gdpr" / "v1" / "rules.yaml").read_bytes()
+    # 共享同一 blob 的其它版本不受影响，blob 内容仍与其名称（sha256）一致
+    assert (cache_root / "gdpr" / "v3" / "rules.yaml").read_bytes() == shared
+    for blob in blobstore.store_dir(cache_root).glob("*/*"):
+        if not blob.name.startswith("."):
+            assert hashlib.sha256(blob.read_bytes()).hexdigest() == blob.name
+
+
+def test_concurrent_streams_into_shared_store(tmp_path: Path):
+    store = blobstore.store_dir(tmp_path / "rules")
+    payloads = [bytes([i]) * (8 * 1024 * 1024) for i in range(4)]
+    errors = []
+
+    def _add(i: int) -> None:
+        try:
+            blobstore.add_stream(store, io.BytesIO(payloads[i]), tmp_path / "out" / f"{i}.bin")
+        except Exception as exc:  # pragma: no cover - 失败时由断言报告
+            errors.append(exc)
+
+    threads = [threading.Thread(target=_add, args=(i,)) for i in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert errors == []
+    for i, data in enumerate(payloads):
+        assert (tmp_path / "out" / f"{i}.bin").read_bytes() == data
+    for blob in store.glob("*/*"):
+        assert hashlib.sha256(blob.read_bytes()).hexdigest() == blob.name
+    assert len(_blobs(tmp_path / "rules")) == 4
@@ -0,0 +1,71 @@
+import os
+import time
+from pathlib import Path
+
+from minos import cachegc, cli, rulesync
+from test_blobstore import _make_pkg
+
+
+def _install(tmp_path: Path, reg_dir: Path, version: str, size: int, age_days: float) -> None:
+    pkg = _make_pkg(tmp_path / f"{reg_dir.name}-{version}.tar.gz", {"rules.yaml": f"{reg_dir.name}-{version};".encode() * size})
+    rulesync.sync_rules(str(pkg), version, reg_dir, cache_root=reg_dir.parent)
+    marker = reg_dir / version / cachegc.ACCESS_FILE
+    marker.touch()
+    used = time.time() - age_days * 86400
+    os.utime(marker, (used, used))
+
+
+def test_gc_budget_evicts_least_recently_used_but_keeps_active_and_pinned(tmp_path: Path):
+    cache_root = tmp_path / "rules"
+    gdpr = cache_root / "gdpr"
+    _install(tmp_path, gdpr, "v1", 4000, age_days=30)  # 最久未使用，但被固定
+    _install(tmp_path, gdpr, "v2", 4000, age_days=20)
+    _install(tmp_path, gdpr, "v3", 4000, age_days=10)
+    _install(tmp_path, cache_root / "pipl", "v1", 4000, age_days=40)  # 激活版本
+    rulesync.activate_version(gdpr, "v1")
+    rulesync.activate_version(gdpr, "v3")
+    rulesync.pin_version(gdpr, "v1")
+
+    stats = rulesync.gc_cache(cache_root, max_bytes=120000)
+    # 总占用约 4 × 32KB：淘汰最久未使用且未受保护的 v2 即满足预算
+    assert stats["evicted"] == ["gdpr/v2"]
+    assert stats["freed"] >= 32000
+    assert sorted(rulesync.list_versions(gdpr)) == ["v1", "v3"]
+    assert rulesync.list_versions(cache_root / "pipl") == ["v1"]
+
+    rulesync.unpin_version(gdpr, "v1")
+    assert rulesync.gc_cache(cache_root, max_bytes=0)["evicted"] == ["gdpr/v1"]
+    assert rulesync.list_versions(gdpr) == ["v3"]
+
+
+def test_gc_max_age_and_scan_records_access(tmp_path: Path):
+    cache_root = tmp_path / "rules"
+    gdpr = cache_root / "gdpr"
+    _install(tmp_path, gdpr, "old", 10, age_days=90)
+    _install(tmp_path, gdpr, "recent", 10, age_days=90)
+    _install(tmp_path, gdpr, "active", 10, age_days=90)
+    # 不在缓存管理范围内的目录不受影响
+    (cache_root / "notes").mkdir()
+
+    # scan 解析到的版本刷新访问时间；ACCESS_RESOLUTION 内的重复访问不再写盘
+    cachegc.touch(gdpr / "recent")
+    assert time.time() - cachegc.last_used(gdpr / "recent") < 5
+    marker = gdpr / "recent" / cachegc.ACCESS_FILE
+    os.utime(marker, (time.time() - 30, time.time() - 30))
+    cachegc.touch(gdpr / "recent")
+    assert time.time() - cachegc.last_used(gdpr / "recent") >= 30
+
+    rulesync.gc_cache(cache_root, max_age=30 * 86400)
+    assert sorted(rulesync.list_versions(gdpr)) == ["active", "recent"]
+    assert (cache_root / "notes").is_dir()
+
+
+def test_cli_gc_mode(tmp_path: Path):
+    cache_root = tmp_path / "rules"
+    gdpr = cache_root / "gdpr"
+    _install(tmp_path, gdpr, "v1", 10, age_days=10)
+    _install(tmp_path, gdpr, "v2", 10, age_days=0)
+
+    assert cli.main(["rulesync", "--gc", "--cache-dir", str(cache_root)]) == 1
+    assert cli.main(["rulesync", "--gc", "--cache-dir", str(cache_root), "--cache-max-age", "5"]) == 0
+    assert rulesync.list_versions(gdpr) == ["v2"]
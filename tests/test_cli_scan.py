@@ -1,9 +1,16 @@
 from pathlib import Path
 import json
+import zipfile
 
 from minos import cli
 
 
+def _make_apk(path: Path, payload: bytes = b"class Main {}") -> Path:
+    with zipfile.ZipFile(path, "w") as zf:
+        zf.writestr("classes.dex", payload)
+    return path
+
+
 def test_scan_cli_requires_input(capsys):
     exit_code = cli.main(["scan"])
     captured = capsys.readouterr()
@@ -45,8 +52,7 @@ def test_scan_cli_source_mode_and_format(tmp_path: Path):
 
 
 def test_scan_cli_apk_mode(tmp_path: Path):
-    apk = tmp_path / "app-release.apk"
-    apk.write_bytes(b"dummy apk content")
+    apk = _make_apk(tmp_path / "app-release.apk")
     out_dir = tmp_path / "out"
 
     exit_code = cli.main(
@@ -84,6 +90,32 @@ def test_scan_cli_missing_apk_file(capsys):
     assert "APK 不存在" in captured.err
 
 
+def test_scan_cli_corrupt_apk_fails(tmp_path: Path, capsys):
+    good = _make_apk(tmp_path / "good.apk")
+    corrupt = tmp_path / "corrupt.apk"
+    corrupt.write_bytes(b"not a zip archive")
+    exit_code = cli.main(
+        [
+            "scan",
+            "--mode",
+            "apk",
+            "--apk-path",
+            str(good),
+            "--apk-path",
+            str(corrupt),
+            "--output-dir",
+            str(tmp_path / "out"),
+            "--format",
+            "json",
+            "--no-cache",
+        ]
+    )
+    captured = capsys.readouterr()
+    assert exit_code == 2
+    assert f"APK 扫描失败: {corrupt}" in captured.err
+    assert not (tmp_path / "out" / "scan.json").exists()
+
+
 def test_scan_cli_missing_src_in_source_mode(capsys):
     exit_code = cli.main(["scan", "--mode", "source", "--format", "json"])
     captured = capsys.readouterr()
@@ -96,8 +128,7 @@ def test_scan_cli_stdout_summary(tmp_path: Path, capsys):
     src_dir.mkdir()
     (src_dir / "Main.java").write_text("class Main {}")
     out_dir = tmp_path / "out"
-    dummy_apk = src_dir / "dummy.apk"
-    dummy_apk.write_bytes(b"apk")
+    dummy_apk = _make_apk(src_dir / "dummy.apk")
 
     exit_code = cli.main(
         [
@@ -217,10 +248,8 @@ def test_scan_cli_multi_inputs_and_apks(tmp_path: Path):
     src_dir2 = tmp_path / "src2"
     src_dir2.mkdir()
     (src_dir2 / "Main2.java").write_text("class Main2 {}")
-    apk1 = tmp_path / "a.apk"
-    apk2 = tmp_path / "b.apk"
-    apk1.write_bytes(b"dummy1")
-    apk2.write_bytes(b"dummy2")
+    apk1 = _make_apk(tmp_path / "a.apk", b"dummy1")
+    apk2 = _make_apk(tmp_path / "b.apk", b"dummy2")
     out_dir = tmp_path / "out"
 
     exit_code = cli.main(
@@ -246,3 +275,17 @@ def test_scan_cli_multi_inputs_and_apks(tmp_path: Path):
     data = json.loads((out_dir / "scan.json").read_text())
     # four inputs merged
     assert len(data["meta"]["inputs"]) == 4
+
+
+def test_scan_cli_scan_cache_and_no_cache(tmp_path: Path):
+    src_dir = tmp_path / "src"
+    src_dir.mkdir()
+    (src_dir / "Main.java").write_text("class Main {}")
+    cache_dir = tmp_path / "scan-cache"
+    base = ["scan", "--mode", "source", "--input", str(src_dir), "--output-dir", str(tmp_path / "out"), "--format", "json"]
+
+    assert cli.main(base + ["--scan-cache-dir", str(cache_dir), "--no-cache"]) == 0
+    assert not cache_dir.exists()
+
+    assert cli.main(base + ["--scan-cache-dir", str(cache_dir)]) == 0
+    assert (cache_dir / "scan-cache.sqlite3").exists()
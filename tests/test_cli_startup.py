@@ -0,0 +1,37 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+SRC = str(Path(__file__).resolve().parents[1] / "src")
+
+HEAVY_MODULES = [
+    "minos.manifest_scanner",
+    "minos.sdk_scanner",
+    "minos.rulesync",
+    "minos.rulesync_convert",
+    "tarfile",
+    "subprocess",
+    "urllib.request",
+    "xml.etree.ElementTree",
+    "zipfile",
+    "logging",
+]
+
+
+@pytest.mark.parametrize("argv", [["--help"], ["scan", "--help"], ["rulesync", "--help"]])
+def test_help_does_not_import_heavy_modules(argv):
+    code = (
+        "import sys\n"
+        "from minos.cli import main\n"
+        "try:\n"
+        f"    main({argv!r})\n"
+        "except SystemExit:\n"
+        "    pass\n"
+        f"print('loaded=' + ','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))\n"
+    )
+    env = dict(os.environ, PYTHONPATH=SRC)
+    proc = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, env=env, check=True)
+    assert proc.stdout.splitlines()[-1] == "loaded="
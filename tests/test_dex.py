@@ -0,0 +1,83 @@
+import struct
+from pathlib import Path
+
+import pytest
+
+from minos import dex, sdk_scanner
+
+
+def _uleb128(value: int) -> bytes:
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def _build_dex(strings: list, code: bytes = b"") -> bytes:
+    """构造最小 DEX：header + string_ids + string_data，code 段模拟字节码数据。"""
+    header_size = 0x70
+    ids_off = header_size
+    data_off = ids_off + 4 * len(strings)
+    data = bytearray()
+    offsets = []
+    for raw, utf16_len in strings:
+        offsets.append(data_off + len(data))
+        data += _uleb128(utf16_len) + raw + b"\0"
+    header = bytearray(header_size)
+    header[:8] = b"dex\n035\0"
+    struct.pack_into("<II", header, 0x38, len(strings), ids_off)
+    return bytes(header) + struct.pack(f"<{len(strings)}I", *offsets) + bytes(data) + code
+
+
+def test_read_string_pool_decodes_mutf8():
+    emoji_mutf8 = b"\xed\xa0\xbd\xed\xb8\x80"  # U+1F600 按代理对分别编码
+    data = _build_dex([(b"getDeviceId", 11), (b"a\xc0\x80b", 3), (b"x" + emoji_mutf8, 3)])
+    assert dex.read_string_pool(data) == [b"getDeviceId", b"a\0b", "x\U0001F600".encode("utf-8")]
+
+
+def test_read_string_pool_rejects_non_dex():
+    with pytest.raises(dex.DexFormatError):
+        dex.read_string_pool(b"...com.example.tracker...")
+
+
+def test_dex_scan_uses_string_pool_and_class_names(tmp_path: Path):
+    strings = [(b"Lcom/example/tracker/Agent;", 27), (b"https://tracker.example.com/collect", 35)]
+    # 字节码区域中出现的模式字节不应命中
+    payload = _build_dex(strings, code=b"\x6e\x20getAdvertisingId\x00")
+    apk_path = tmp_path / "app.apk"
+    with sdk_scanner.zipfile.ZipFile(apk_path, "w") as zf:
+        zf.writestr("classes.dex", payload)
+        zf.writestr("classes2.dex", _build_dex([(b"getDeviceId", 11)]))
+
+    rules = sdk_scanner.load_default_rules()
+    findings, _ = sdk_scanner.scan_sdk_api([apk_path], rules, source_flags={})
+
+    hits = {(f["rule_id"], f["location"]) for f in findings}
+    assert hits == {
+        ("SDK_TRACKING", "classes.dex"),
+        ("STRING_SUSPICIOUS_DOMAIN", "classes.dex"),
+        ("API_ID_ACCESS", "classes2.dex"),
+    }
+
+
+def test_large_dex_is_mapped_instead_of_read_into_memory(tmp_path: Path, monkeypatch):
+    payload = _build_dex([(b"Lcom/example/tracker/Agent;", 27)], code=b"\x6e\x20getDeviceId\x00")
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "classes.dex").write_bytes(payload)
+    apk_path = tmp_path / "app.apk"
+    with sdk_scanner.zipfile.ZipFile(apk_path, "w") as zf:
+        zf.writestr("classes.dex", payload)
+        zf.writestr("classes2.dex", b"not a dex getDeviceId")
+    monkeypatch.setattr(sdk_scanner, "DEX_MEMORY_MAX_BYTES", 16)
+
+    rules = sdk_scanner.load_default_rules()
+    findings, _ = sdk_scanner.scan_sdk_api([tmp_path / "src", apk_path], rules, source_flags={})
+
+    # 与整块读取的结果一致：只匹配字符串池，解析失败的条目退回整块匹配
+    hits = {(f["rule_id"], Path(f["location"]).name) for f in findings}
+    assert hits == {("SDK_TRACKING", "classes.dex"), ("API_ID_ACCESS", "classes2.dex")}
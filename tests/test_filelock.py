@@ -0,0 +1,136 @@
+import errno
+import multiprocessing
+import os
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from minos import rules_index, rulesync
+from minos.filelock import FileLock, LockTimeout
+from test_rulesync import _create_rules_pkg
+
+
+def test_shared_locks_coexist_and_exclude_writer(tmp_path: Path):
+    lock_path = tmp_path / ".lock"
+    with FileLock(lock_path, shared=True), FileLock(lock_path, shared=True):
+        with pytest.raises(LockTimeout):
+            FileLock(lock_path, timeout=0.1).acquire()
+    with FileLock(lock_path):
+        with pytest.raises(LockTimeout):
+            FileLock(lock_path, shared=True, timeout=0.1).acquire()
+    # 释放后可再次获取写锁
+    with FileLock(lock_path, timeout=0.1):
+        pass
+
+
+def _sync_worker(barrier, pkg: str, sha: str, reg_dir: str, log: str) -> None:
+    original = rulesync._calc_sha256
+
+    def slow_calc(path):
+        # 记录实际安装次数，并放慢安装让其余进程在锁上排队
+        with open(log, "a", encoding="utf-8") as f:
+            f.write("install\n")
+        time.sleep(0.3)
+        return original(path)
+
+    rulesync._calc_sha256 = slow_calc
+    barrier.wait()
+    rulesync.sync_rules(pkg, "v1.0.0", Path(reg_dir), expected_sha256=sha)
+
+
+@pytest.mark.skipif("fork" not in multiprocessing.get_all_start_methods(), reason="需要 fork 启动方式")
+def test_concurrent_sync_same_version_installs_once(tmp_path: Path):
+    pkg, sha = _create_rules_pkg(tmp_path, "v1.0.0")
+    reg_dir = tmp_path / "cache" / "gdpr"
+    log = tmp_path / "installs.log"
+    ctx = multiprocessing.get_context("fork")
+    barrier = ctx.Barrier(4)
+    procs = [ctx.Process(target=_sync_worker, args=(barrier, str(pkg), sha, str(reg_dir), str(log))) for _ in range(4)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join(timeout=30)
+    assert [p.exitcode for p in procs] == [0, 0, 0, 0]
+    assert log.read_text(encoding="utf-8").count("install") == 1
+    assert rules_index.read_active(reg_dir) == "v1.0.0"
+    assert (reg_dir / "v1.0.0" / "rules" / "rules.txt").exists()
+
+
+def test_cleanup_waits_for_reader(tmp_path: Path):
+    reg_dir = tmp_path / "cache" / "gdpr"
+    for version in ("v1.0.0", "v1.1.0"):
+        pkg, sha = _create_rules_pkg(tmp_path, version)
+        rulesync.sync_rules(str(pkg), version, reg_dir, expected_sha256=sha)
+
+    ctx = multiprocessing.get_context()
+    with rules_index.cache_lock(reg_dir, shared=True):
+        proc = ctx.Process(target=rulesync.cleanup, args=(reg_dir, 1))
+        proc.start()
+        time.sleep(0.3)
+        # 读锁持有期间清理被阻塞，旧版本仍在
+        assert (reg_dir / "v1.0.0").exists()
+    proc.join(timeout=30)
+    assert proc.exitcode == 0
+    assert not (reg_dir / "v1.0.0").exists()
+    assert rulesync.list_versions(reg_dir) == ["v1.1.0"]
+
+
+def test_shared_lock_on_read_only_dir(tmp_path: Path, monkeypatch):
+    existing = tmp_path / "existing.lock"
+    existing.touch()
+    real_open = os.open
+
+    def readonly_open(path, flags, *args):
+        if flags & (os.O_WRONLY | os.O_RDWR | os.O_CREAT):
+            raise OSError(errno.EROFS, "Read-only file system", path)
+        return real_open(path, flags, *args)
+
+    monkeypatch.setattr(os, "open", readonly_open)
+    # 锁文件已存在：只读打开仍加读锁；不存在且无法创建：跳过加锁
+    with FileLock(existing, shared=True) as lock:
+        assert lock._fd is not None
+    with FileLock(tmp_path / "missing" / ".lock", shared=True) as lock:
+        assert lock._fd is None
+    with pytest.raises(OSError):
+        FileLock(existing).acquire()
+
+
+def test_removed_lock_file_is_reopened_by_waiters(tmp_path: Path):
+    lock_path = tmp_path / ".v1.sync.lock"
+    with FileLock(lock_path, shared=True) as reader:
+        with pytest.raises(RuntimeError):
+            reader.remove()
+
+    holder = FileLock(lock_path, timeout=0.1).acquire()
+    waiter = FileLock(lock_path, timeout=5)
+    thread = threading.Thread(target=waiter.acquire)
+    thread.start()
+    time.sleep(0.2)
+    holder.remove()
+    thread.join(timeout=5)
+    # 等待者锁住的是已删除的旧文件，需重新打开新建的锁文件，与其它新加锁者互斥
+    assert lock_path.exists()
+    with pytest.raises(LockTimeout):
+        FileLock(lock_path, timeout=0.1).acquire()
+    waiter.release()
+
+
+def test_eviction_removes_version_sync_locks(tmp_path: Path):
+    reg_dir = tmp_path / "cache" / "gdpr"
+    for version in ("v1.0.0", "v1.1.0", "v1.2.0"):
+        pkg, sha = _create_rules_pkg(tmp_path, version)
+        rulesync.sync_rules(str(pkg), version, reg_dir, expected_sha256=sha)
+    assert (reg_dir / ".v1.0.0.sync.lock").exists()
+
+    # 正在同步（持有下载锁）的版本保留锁文件
+    with rules_index.version_lock(reg_dir, "v1.1.0"):
+        rulesync.cleanup(reg_dir, keep=1)
+    assert rulesync.list_versions(reg_dir) == ["v1.2.0"]
+    assert not (reg_dir / ".v1.0.0.sync.lock").exists()
+    assert (reg_dir / ".v1.1.0.sync.lock").exists()
+
+    rulesync.activate_version(reg_dir, "v1.2.0")
+    assert rulesync.gc_cache(reg_dir.parent, max_bytes=0)["evicted"] == []
+    assert sorted(p.name for p in reg_dir.glob(".*.sync.lock")) == [".v1.1.0.sync.lock", ".v1.2.0.sync.lock"]
@@ -0,0 +1,79 @@
+import shutil
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from minos import gitmirror, rulesync
+
+pytestmark = pytest.mark.skipif(shutil.which("git") is None, reason="需要 git")
+
+
+def _git(cwd: Path, *args: str) -> str:
+    return subprocess.run(["git", *args], cwd=cwd, check=True, capture_output=True, text=True).stdout
+
+
+def _make_repo(root: Path) -> Path:
+    repo = root / "origin"
+    (repo / "packs" / "gdpr").mkdir(parents=True)
+    (repo / "assets").mkdir()
+    _git(root, "init", "-q", str(repo))
+    _git(repo, "config", "user.email", "ci@example.com")
+    _git(repo, "config", "user.name", "ci")
+    _git(repo, "config", "uploadpack.allowFilter", "true")
+    (repo / "packs" / "gdpr" / "rules.yaml").write_text("- rule_id: GDPR-001\n", encoding="utf-8")
+    (repo / "assets" / "large.bin").write_bytes(b"\0" * 65536)
+    _git(repo, "add", "-A")
+    _git(repo, "commit", "-qm", "init")
+    return repo
+
+
+def test_git_sync_uses_persistent_sparse_mirror(tmp_path: Path):
+    repo = _make_repo(tmp_path)
+    source = f"git+{repo.as_uri()}#path=packs/gdpr"
+    cache_root = tmp_path / "cache"
+    reg_dir = cache_root / "gdpr"
+
+    rulesync.sync_rules(source, "v1", reg_dir, cache_root=cache_root)
+    assert (reg_dir / "v1" / "rules" / "rules.yaml").exists()
+    mirror = gitmirror.mirror_path(cache_root, repo.as_uri())
+    assert (mirror / "HEAD").exists()
+
+    # 稀疏检出只拉取子路径下的文件内容，其它 blob 仍缺失
+    large_blob = _git(repo, "rev-parse", "HEAD:assets/large.bin").strip()
+    missing = _git(mirror, "rev-list", "--objects", "--missing=print", "--all")
+    assert f"?{large_blob}" in missing.split()
+
+    # 上游新提交：复用镜像增量 fetch
+    (repo / "packs" / "gdpr" / "rules.yaml").write_text("- rule_id: GDPR-002\n", encoding="utf-8")
+    _git(repo, "commit", "-qam", "update")
+    rulesync.sync_rules(source, "v2", reg_dir, cache_root=cache_root)
+    assert "GDPR-002" in (reg_dir / "v2" / "rules" / "rules.yaml").read_text(encoding="utf-8")
+    assert not _git(mirror, "worktree", "list").strip().count("\n")
+
+
+def test_git_sync_ref_and_missing_path(tmp_path: Path):
+    repo = _make_repo(tmp_path)
+    first = _git(repo, "rev-parse", "HEAD").strip()
+    (repo / "packs" / "gdpr" / "rules.yaml").write_text("- rule_id: GDPR-009\n", encoding="utf-8")
+    _git(repo, "commit", "-qam", "update")
+    reg_dir = tmp_path / "cache" / "gdpr"
+
+    rulesync.sync_rules(f"git+{repo.as_uri()}#path=packs/gdpr&ref={first}", "v1", reg_dir)
+    assert "GDPR-001" in (reg_dir / "v1" / "rules" / "rules.yaml").read_text(encoding="utf-8")
+
+    with pytest.raises(rulesync.RulesyncError, match="未找到路径"):
+        rulesync.sync_rules(f"git+{repo.as_uri()}#path=packs/none", "v2", reg_dir)
+
+
+def test_git_sync_rejects_option_like_ref_and_url(tmp_path: Path):
+    repo = _make_repo(tmp_path)
+    reg_dir = tmp_path / "cache" / "gdpr"
+    marker = tmp_path / "pwned"
+
+    with pytest.raises(rulesync.RulesyncError, match="非法的 git 引用"):
+        rulesync.sync_rules(f"git+{repo.as_uri()}#path=packs/gdpr&ref=--orphan=x", "v1", reg_dir)
+    with pytest.raises(rulesync.RulesyncError, match="非法的 git 仓库地址"):
+        rulesync.sync_rules(f"git+--upload-pack=touch {marker}#path=packs/gdpr", "v1", reg_dir)
+    assert not marker.exists()
+    assert rulesync.list_versions(reg_dir) == []
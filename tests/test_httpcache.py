@@ -0,0 +1,200 @@
+import gzip
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+from minos import httpcache, rulesync, rulesync_convert
+from test_rulesync import _create_rules_pkg
+
+
+class _Origin:
+    """本地 HTTP 源：支持 ETag/If-None-Match 与 gzip 传输编码，记录请求与正文字节数。"""
+
+    def __init__(self):
+        self.files = {}
+        self.requests = []
+        self.ranges = []
+        self.body_bytes = 0
+        self.gzip = False
+        # 首个完整 GET 只发送一半正文后断开，模拟不稳定链路
+        self.drop_first = False
+        # 206 响应的 Content-Range 起点与请求不符
+        self.bad_range = False
+        origin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = origin.files[self.path]
+                etag = '"%s"' % hashlib.sha256(body).hexdigest()[:16]
+                origin.requests.append((self.path, self.headers.get("If-None-Match")))
+                origin.ranges.append(self.headers.get("Range"))
+                rng = self.headers.get("Range")
+                if rng and self.headers.get("If-Range") == etag:
+                    start = int(rng.split("=")[1].rstrip("-"))
+                    if origin.bad_range:
+                        start += 1
+                    self.send_response(206)
+                    self.send_header("ETag", etag)
+                    self.send_header("Content-Range", f"bytes {start}-{len(body) - 1}/{len(body)}")
+                    self.send_header("Content-Length", str(len(body) - start))
+                    self.end_headers()
+                    self.wfile.write(body[start:])
+                    origin.body_bytes += len(body) - start
+                    return
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("ETag", etag)
+                self.send_header("Last-Modified", "Mon, 01 Jun 2026 00:00:00 GMT")
+                if origin.gzip and "gzip" in (self.headers.get("Accept-Encoding") or ""):
+                    body = gzip.compress(body)
+                    self.send_header("Content-Encoding", "gzip")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                if origin.drop_first:
+                    origin.drop_first = False
+                    body = body[: len(body) // 2]
+                    self.close_connection = True
+                self.wfile.write(body)
+                origin.body_bytes += len(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def url(self, path: str) -> str:
+        return f"http://127.0.0.1:{self.server.server_port}{path}"
+
+
+@pytest.fixture()
+def origin():
+    srv = _Origin()
+    yield srv
+    srv.server.shutdown()
+    srv.server.server_close()
+
+
+def test_convert_url_revalidates_and_skips_conversion_on_304(tmp_path: Path, origin, monkeypatch):
+    origin.files["/gdpr"] = b"<h1>Article 1 Title</h1><p>Clause one.</p>"
+    url = origin.url("/gdpr")
+    cache_dir = tmp_path / "cache"
+    out = tmp_path / "gdpr" / "v1" / "rules.yaml"
+    converted = []
+    real_convert = rulesync_convert.convert_files_to_yaml
+
+    def counting_convert(*args, **kwargs):
+        converted.append(kwargs["out_path"])
+        return real_convert(*args, **kwargs)
+
+    monkeypatch.setattr(rulesync_convert, "convert_files_to_yaml", counting_convert)
+
+    rulesync_convert.convert_url_to_yaml(url, cache_dir, out, regulation="gdpr", version="v1")
+    assert "GDPR-001" in out.read_text(encoding="utf-8")
+    assert httpcache.ValidatorStore(cache_dir).get(url)["etag"]
+
+    rulesync_convert.convert_url_to_yaml(url, cache_dir, out, regulation="gdpr", version="v1")
+    # 第二次为条件请求，304 后不再转换
+    assert origin.requests[-1][1] is not None
+    assert len(converted) == 1
+
+    # 上游变化：200 后重新转换
+    origin.files["/gdpr"] = b"<h1>Article 1 Title</h1><p>Clause one.</p><h2>Article 2 Second</h2><p>Two.</p>"
+    rulesync_convert.convert_url_to_yaml(url, cache_dir, out, regulation="gdpr", version="v1")
+    assert len(converted) == 2
+    assert "GDPR-002" in out.read_text(encoding="utf-8")
+
+
+def test_sync_rules_http_gzip_and_not_modified(tmp_path: Path, origin):
+    pkg, sha = _create_rules_pkg(tmp_path, "v1.0.0")
+    origin.files["/rules.tar.gz"] = pkg.read_bytes()
+    origin.gzip = True
+    url = origin.url("/rules.tar.gz")
+    reg_dir = tmp_path / "cache" / "gdpr"
+
+    rulesync.sync_rules(url, "v1.0.0", reg_dir, expected_sha256=sha)
+    # gzip 传输编码解压后校验和与原始包一致
+    assert (reg_dir / "v1.0.0" / "rules" / "rules.txt").exists()
+    first_bytes = origin.body_bytes
+
+    installed_at = (reg_dir / "v1.0.0" / "metadata.json").stat().st_mtime_ns
+    rulesync.sync_rules(url, "v1.0.0", reg_dir, expected_sha256=sha)
+    assert origin.requests[-1][1] is not None
+    assert origin.body_bytes == first_bytes
+    # 304 跳过解压与元数据重写
+    assert (reg_dir / "v1.0.0" / "metadata.json").stat().st_mtime_ns == installed_at
+    assert rulesync.get_active_path(reg_dir) == reg_dir / "v1.0.0"
+
+
+def test_not_modified_redownloads_when_version_removed_meanwhile(tmp_path: Path, origin, monkeypatch):
+    import shutil
+
+    pkg, sha = _create_rules_pkg(tmp_path, "v1.0.0")
+    origin.files["/rules.tar.gz"] = pkg.read_bytes()
+    url = origin.url("/rules.tar.gz")
+    reg_dir = tmp_path / "cache" / "gdpr"
+    rulesync.sync_rules(url, "v1.0.0", reg_dir, expected_sha256=sha)
+
+    # 条件请求返回 304 之前，该版本被其它进程清理
+    prepare = rulesync._prepare_remote_source
+
+    def prepare_then_remove(*args, **kwargs):
+        shutil.rmtree(reg_dir / "v1.0.0", ignore_errors=True)
+        return prepare(*args, **kwargs)
+
+    monkeypatch.setattr(rulesync, "_prepare_remote_source", prepare_then_remove)
+    rulesync.sync_rules(url, "v1.0.0", reg_dir, expected_sha256=sha)
+    assert [r[1] is not None for r in origin.requests] == [False, True, False]
+    assert (reg_dir / "v1.0.0" / "rules" / "rules.txt").exists()
+    assert rulesync.get_active_path(reg_dir) == reg_dir / "v1.0.0"
+
+
+def test_fetch_resumes_dropped_download_with_range(tmp_path: Path, origin):
+    payload = bytes(range(256)) * 8192  # 2 MiB，跨越多个读缓冲区
+    origin.files["/big.bin"] = payload
+    origin.drop_first = True
+    dest = tmp_path / "big.bin"
+
+    validator = httpcache.fetch(origin.url("/big.bin"), dest)
+    assert dest.read_bytes() == payload
+    assert validator["sha256"] == hashlib.sha256(payload).hexdigest()
+    # 续传只请求缺失的后半段
+    assert origin.ranges == [None, f"bytes={len(payload) // 2}-"]
+    assert origin.body_bytes == len(payload)
+    assert not list(tmp_path.glob("*.part"))
+
+
+def test_fetch_restarts_when_range_response_starts_elsewhere(tmp_path: Path, origin):
+    payload = bytes(range(256)) * 8192
+    origin.files["/big.bin"] = payload
+    origin.drop_first = True
+    origin.bad_range = True
+    dest = tmp_path / "big.bin"
+
+    validator = httpcache.fetch(origin.url("/big.bin"), dest)
+    # 206 起点不符时不把部分正文当作完整文件，而是不带 Range 重新下载
+    assert origin.ranges == [None, f"bytes={len(payload) // 2}-", None]
+    assert dest.read_bytes() == payload
+    assert validator["sha256"] == hashlib.sha256(payload).hexdigest()
+
+
+def test_sync_rules_http_checksum_mismatch_fails_before_extract(tmp_path: Path, origin, monkeypatch):
+    pkg, _ = _create_rules_pkg(tmp_path, "v1.0.0")
+    origin.files["/rules.tar.gz"] = pkg.read_bytes()
+    reg_dir = tmp_path / "cache" / "gdpr"
+
+    def no_extract(*args, **kwargs):
+        raise AssertionError("校验失败前不应打开规则包")
+
+    monkeypatch.setattr(rulesync.tarfile, "open", no_extract)
+    monkeypatch.setattr(rulesync, "_calc_sha256", no_extract)
+    with pytest.raises(rulesync.RulesyncChecksumError):
+        rulesync.sync_rules(origin.url("/rules.tar.gz"), "v1.0.0", reg_dir, expected_sha256="0" * 64)
+    assert not (reg_dir / "v1.0.0").exists()
@@ -203,3 +203,60 @@ def test_rule_override_by_rule_id(tmp_path: Path):
     findings, _ = manifest_scanner.scan_manifest(manifest_path, rules, source_flags={"PERM_SENSITIVE_LOCATION": "region"})
     assert len(findings) == 1
     assert findings[0]["severity"] == "low"
+
+
+def test_manifest_index_model():
+    main = b"""
+    <manifest xmlns:android="http://schemas.android.com/apk/res/android" package="com.example">
+      <uses-permission android:name="android.permission.CAMERA"/>
+      <application>
+        <meta-data android:name="com.example.API_KEY" android:value="abc"/>
+        <activity android:name=".Main" android:exported="true">
+          <intent-filter>
+            <action android:name="android.intent.action.VIEW"/>
+            <category android:name="android.intent.category.BROWSABLE"/>
+            <data android:scheme="https"/>
+          </intent-filter>
+        </activity>
+        <receiver android:name=".Boot" android:exported="false">
+          <meta-data android:name="boot" android:resource="@xml/boot"/>
+        </receiver>
+      </application>
+    </manifest>
+    """
+    lib = b"""
+    <manifest xmlns:android="http://schemas.android.com/apk/res/android" package="com.example.lib">
+      <uses-permission android:name="android.permission.CAMERA"/>
+      <application><service android:name=".Sync" android:exported="true"/></application>
+    </manifest>
+    """
+    index = manifest_scanner.ManifestIndex.from_contents([main, lib])
+
+    assert index.permissions == {"android.permission.CAMERA": 2}
+    assert index.exported["activity"] == [".Main"]
+    assert index.exported["service"] == [".Sync"]
+    assert index.exported["receiver"] == []
+    assert index.meta_data == {"com.example.API_KEY": "abc"}
+    activity = index.components["activity"][0]
+    assert activity.intent_filters == [
+        {"actions": ["android.intent.action.VIEW"], "categories": ["android.intent.category.BROWSABLE"], "schemes": ["https"]}
+    ]
+    assert index.components["receiver"][0].meta_data == {"boot": "@xml/boot"}
+
+
+def test_manifest_parsed_once_for_many_rules(tmp_path: Path, monkeypatch):
+    manifest = """
+    <manifest xmlns:android="http://schemas.android.com/apk/res/android" package="com.example">
+      <uses-permission android:name="android.permission.P7"/>
+    </manifest>
+    """
+    manifest_path = _write_manifest(tmp_path, manifest)
+    rules = [_make_rule(f"PERM_{i}", "permission", pattern=f"android.permission.P{i}") for i in range(500)]
+    calls = []
+    real_parse = manifest_scanner._parse_manifest_content
+    monkeypatch.setattr(manifest_scanner, "_parse_manifest_content", lambda c: calls.append(c) or real_parse(c))
+
+    findings, _ = manifest_scanner.scan_manifest(manifest_path, rules, source_flags={})
+
+    assert [f["rule_id"] for f in findings] == ["PERM_7"]
+    assert len(calls) == 1
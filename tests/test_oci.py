@@ -0,0 +1,207 @@
+import hashlib
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+from minos import oci, rulesync
+from test_rulesync import _create_rules_pkg
+
+_MANIFEST_TYPE = "application/vnd.oci.image.manifest.v1+json"
+
+
+class _Registry:
+    """本地 OCI registry 替身：/v2/<repo>/manifests/<ref> 与 /v2/<repo>/blobs/<digest>，可选 Bearer 认证。"""
+
+    def __init__(self, require_token: bool = False, blob_redirect: str = "", manifest_redirect: str = ""):
+        self.blobs = {}
+        self.manifests = {}
+        self.requests = []
+        self.authorization = []
+        self.require_token = require_token
+        self.blob_redirect = blob_redirect
+        self.manifest_redirect = manifest_redirect
+        # 首个 blob 请求按 token 已过期返回 401
+        self.expire_token_once = False
+        reg = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                reg.requests.append(self.path)
+                reg.authorization.append(self.headers.get("Authorization"))
+                if self.path.startswith("/token"):
+                    return self._send(200, json.dumps({"token": "t0k"}).encode(), "application/json")
+                expired = reg.expire_token_once and "/blobs/" in self.path
+                if expired:
+                    reg.expire_token_once = False
+                if expired or (reg.require_token and self.headers.get("Authorization") != "Bearer t0k"):
+                    self.send_response(401)
+                    realm = f"http://127.0.0.1:{reg.port}/token"
+                    self.send_header("WWW-Authenticate", f'Bearer realm="{realm}",service="test"')
+                    self.end_headers()
+                    return
+                _, _, repo_and_rest = self.path.partition("/v2/")
+                if "/manifests/" in repo_and_rest and reg.manifest_redirect:
+                    self.send_response(307)
+                    self.send_header("Location", reg.manifest_redirect + self.path)
+                    self.end_headers()
+                    return
+                if "/manifests/" in repo_and_rest:
+                    repo, ref = repo_and_rest.split("/manifests/")
+                    body = reg.manifests.get((repo, ref))
+                    if body is None:
+                        return self._send(404, b"{}", "application/json")
+                    return self._send(200, body, _MANIFEST_TYPE)
+                if reg.blob_redirect:
+                    self.send_response(307)
+                    self.send_header("Location", reg.blob_redirect + self.path)
+                    self.end_headers()
+                    return
+                repo, digest = repo_and_rest.split("/blobs/")
+                body = reg.blobs.get(digest)
+                if body is None:
+                    return self._send(404, b"", "application/octet-stream")
+                return self._send(200, body, "application/octet-stream")
+
+            def _send(self, code, body, ctype):
+                self.send_response(code)
+                self.send_header("Content-Type", ctype)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.port = self.server.server_port
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def push(self, repo: str, tag: str, files: dict) -> None:
+        layers = []
+        for title, data in files.items():
+            digest = "sha256:" + hashlib.sha256(data).hexdigest()
+            self.blobs[digest] = data
+            layers.append(
+                {
+                    "mediaType": "application/vnd.oci.image.layer.v1.tar+gzip",
+                    "digest": digest,
+                    "size": len(data),
+                    "annotations": {"org.opencontainers.image.title": title},
+                }
+            )
+        manifest = {"schemaVersion": 2, "mediaType": _MANIFEST_TYPE, "layers": layers}
+        self.manifests[(repo, tag)] = json.dumps(manifest).encode()
+
+    def ref(self, repo: str, tag: str) -> str:
+        return f"oci+http://127.0.0.1:{self.port}/{repo}:{tag}"
+
+    def blob_requests(self) -> list:
+        return [p for p in self.requests if "/blobs/" in p]
+
+
+@pytest.fixture()
+def registry():
+    reg = _Registry()
+    yield reg
+    reg.server.shutdown()
+    reg.server.server_close()
+
+
+def test_parse_reference():
+    assert oci.parse_reference("oci://ghcr.io/org/rules/gdpr:v1") == ("https://ghcr.io", "org/rules/gdpr", "v1")
+    assert oci.parse_reference("oci+http://localhost:5000/rules") == ("http://localhost:5000", "rules", "latest")
+    digest = "sha256:" + "a" * 64
+    assert oci.parse_reference(f"oci://r.io/rules@{digest}") == ("https://r.io", "rules", digest)
+
+
+def test_oci_sync_caches_layers_and_unchanged_is_metadata_only(tmp_path: Path, registry):
+    pkg, sha = _create_rules_pkg(tmp_path, "v1")
+    registry.push("rules/gdpr", "v1", {"rules.tar.gz": pkg.read_bytes()})
+    registry.push("rules/gdpr", "v1-copy", {"rules.tar.gz": pkg.read_bytes()})
+    reg_dir = tmp_path / "cache" / "gdpr"
+
+    rulesync.sync_rules(registry.ref("rules/gdpr", "v1"), "v1", reg_dir, expected_sha256=sha)
+    assert (reg_dir / "v1" / "rules" / "rules.txt").exists()
+    assert len(registry.blob_requests()) == 1
+
+    # 未变化的镜像：只请求 manifest
+    installed = (reg_dir / "v1" / "metadata.json").stat().st_mtime_ns
+    rulesync.sync_rules(registry.ref("rules/gdpr", "v1"), "v1", reg_dir, expected_sha256=sha)
+    assert len(registry.blob_requests()) == 1
+    assert (reg_dir / "v1" / "metadata.json").stat().st_mtime_ns == installed
+
+    # 新版本引用同一层：命中按 digest 的层缓存，不再下载 blob
+    rulesync.sync_rules(registry.ref("rules/gdpr", "v1-copy"), "v2", reg_dir, expected_sha256=sha)
+    assert len(registry.blob_requests()) == 1
+    assert rulesync.get_active_path(reg_dir) == reg_dir / "v2"
+
+
+def test_oci_path_selection_and_bearer_auth(tmp_path: Path):
+    reg = _Registry(require_token=True)
+    try:
+        pkg, sha = _create_rules_pkg(tmp_path, "v1")
+        reg.push("rules/all", "v1", {"gdpr.tar.gz": pkg.read_bytes(), "pipl.tar.gz": b"other"})
+        reg_dir = tmp_path / "cache" / "gdpr"
+
+        with pytest.raises(rulesync.RulesyncError, match="多个 tar.gz"):
+            rulesync.sync_rules(reg.ref("rules/all", "v1"), "v1", reg_dir)
+
+        rulesync.sync_rules(reg.ref("rules/all", "v1") + "#path=gdpr.tar.gz", "v1", reg_dir, expected_sha256=sha)
+        assert (reg_dir / "v1" / "rules" / "rules.txt").exists()
+        assert any(p.startswith("/token") for p in reg.requests)
+    finally:
+        reg.server.shutdown()
+        reg.server.server_close()
+
+
+def test_oci_blob_redirect_to_other_host_drops_authorization(tmp_path: Path):
+    storage = _Registry()
+    reg = _Registry(require_token=True, blob_redirect=f"http://127.0.0.1:{storage.port}")
+    try:
+        pkg, sha = _create_rules_pkg(tmp_path, "v1")
+        reg.push("rules/gdpr", "v1", {"rules.tar.gz": pkg.read_bytes()})
+        storage.blobs.update(reg.blobs)
+
+        rulesync.sync_rules(reg.ref("rules/gdpr", "v1"), "v1", tmp_path / "cache" / "gdpr", expected_sha256=sha)
+        # registry 收到 token，重定向后的对象存储不会收到
+        assert "Bearer t0k" in reg.authorization
+        assert storage.blob_requests() and storage.authorization == [None]
+    finally:
+        for server in (reg, storage):
+            server.server.shutdown()
+            server.server.server_close()
+
+
+def test_oci_manifest_redirect_to_other_host_drops_authorization(tmp_path: Path):
+    mirror = _Registry()
+    reg = _Registry(require_token=True, manifest_redirect=f"http://127.0.0.1:{mirror.port}")
+    try:
+        pkg, sha = _create_rules_pkg(tmp_path, "v1")
+        reg.push("rules/gdpr", "v1", {"rules.tar.gz": pkg.read_bytes()})
+        mirror.manifests.update(reg.manifests)
+
+        rulesync.sync_rules(reg.ref("rules/gdpr", "v1"), "v1", tmp_path / "cache" / "gdpr", expected_sha256=sha)
+        assert any(p.endswith("/manifests/v1") for p in mirror.requests)
+        assert mirror.authorization == [None]
+    finally:
+        for server in (reg, mirror):
+            server.server.shutdown()
+            server.server.server_close()
+
+
+def test_oci_blob_refreshes_expired_token(tmp_path: Path):
+    reg = _Registry(require_token=True)
+    try:
+        pkg, sha = _create_rules_pkg(tmp_path, "v1")
+        reg.push("rules/gdpr", "v1", {"rules.tar.gz": pkg.read_bytes()})
+        reg.expire_token_once = True
+
+        rulesync.sync_rules(reg.ref("rules/gdpr", "v1"), "v1", tmp_path / "cache" / "gdpr", expected_sha256=sha)
+        assert len(reg.blob_requests()) == 2
+        assert len([p for p in reg.requests if p.startswith("/token")]) == 2
+    finally:
+        reg.server.shutdown()
+        reg.server.server_close()
@@ -0,0 +1,53 @@
+import zipfile
+from pathlib import Path
+
+import pytest
+
+from minos import rulepack, rules_index, rulesync
+from minos.ruleset import compiled_path, load_ruleset
+from test_blobstore import _make_pkg
+
+RULES_YAML = b"- rule_id: GDPR-001\n  type: permission\n  pattern: android.permission.CAMERA\n"
+
+
+def test_no_extract_reads_rules_from_tarball(tmp_path: Path):
+    pytest.importorskip("yaml")
+    cache_root = tmp_path / "rules"
+    pkg = _make_pkg(tmp_path / "v1.tar.gz", {"rules.yaml": RULES_YAML, "docs/notes.txt": b"notes"})
+
+    rulesync.sync_rules(str(pkg), "v1", cache_root / "gdpr", extract=False)
+    version_dir = cache_root / "gdpr" / "v1"
+    # 不解压文件树：只有规则包、成员索引与元数据
+    assert not (version_dir / "rules.yaml").exists()
+    assert (version_dir / "package.tar").exists()
+    assert rulepack.read_member(version_dir, "docs/notes.txt") == b"notes"
+
+    version, rules_path = rules_index.resolve_rules(rules_index.load_index(cache_root), cache_root, "gdpr")
+    assert version == "v1" and rulepack.exists(rules_path)
+    ruleset = load_ruleset(rules_path)
+    assert [r["rule_id"] for r in ruleset] == ["GDPR-001"]
+    # 编译缓存照常写在版本目录中
+    assert compiled_path(rules_path).exists()
+
+
+def test_zip_package_stored_and_deflated_members(tmp_path: Path):
+    pkg = tmp_path / "v1.zip"
+    with zipfile.ZipFile(pkg, "w") as zf:
+        zf.writestr("rules.yaml", RULES_YAML, compress_type=zipfile.ZIP_STORED)
+        zf.writestr("extra/big.txt", b"x" * 10000, compress_type=zipfile.ZIP_DEFLATED)
+    reg_dir = tmp_path / "rules" / "gdpr"
+
+    rulesync.sync_rules(str(pkg), "v1", reg_dir, extract=False)
+    assert rulepack.read_bytes(reg_dir / "v1" / "rules.yaml") == RULES_YAML
+    assert rulepack.read_bytes(reg_dir / "v1" / "extra" / "big.txt") == b"x" * 10000
+    assert not rulepack.exists(reg_dir / "v1" / "missing.yaml")
+    with pytest.raises(FileNotFoundError):
+        rulepack.read_bytes(reg_dir / "v1" / "missing.yaml")
+
+
+def test_no_extract_rejects_path_traversal(tmp_path: Path):
+    pkg = _make_pkg(tmp_path / "evil.tar.gz", {"../escape.txt": b"x"})
+    reg_dir = tmp_path / "rules" / "gdpr"
+    with pytest.raises(rulesync.RulesyncError):
+        rulesync.sync_rules(str(pkg), "v1", reg_dir, extract=False)
+    assert rulesync.list_versions(reg_dir) == []
@@ -0,0 +1,164 @@
+import json
+from pathlib import Path
+
+import yaml
+
+from minos import cli, rules_index, rulesync
+from test_rulesync import _create_rules_pkg
+
+
+def _read_index(cache_root: Path) -> dict:
+    return json.loads((cache_root / rules_index.INDEX_FILE).read_text(encoding="utf-8"))
+
+
+def test_rulesync_maintains_index(tmp_path: Path):
+    reg_dir = tmp_path / "cache" / "gdpr"
+    pkg1, sha1 = _create_rules_pkg(tmp_path, "v1.0.0")
+    pkg2, sha2 = _create_rules_pkg(tmp_path, "v1.1.0")
+
+    cache_root = reg_dir.parent
+    rulesync.sync_rules(str(pkg1), "v1.0.0", reg_dir, expected_sha256=sha1, cache_root=cache_root)
+    rulesync.sync_rules(str(pkg2), "v1.1.0", reg_dir, expected_sha256=sha2, cache_root=cache_root)
+    entry = _read_index(reg_dir.parent)["regulations"]["gdpr"]
+    assert entry["active"] == "v1.1.0"
+    assert entry["versions"]["v1.0.0"]["sha256"] == sha1
+    assert entry["versions"]["v1.1.0"]["rules_path"] == "gdpr/v1.1.0/rules.yaml"
+    assert entry["versions"]["v1.1.0"]["compiled_path"] == "gdpr/v1.1.0/rules.compiled"
+
+    rulesync.activate_version(reg_dir, "v1.0.0", cache_root=cache_root)
+    assert _read_index(reg_dir.parent)["regulations"]["gdpr"]["active"] == "v1.0.0"
+    assert rulesync.get_active_path(reg_dir) == reg_dir / "v1.0.0"
+
+    # 激活版本不会被清理
+    rulesync.cleanup(reg_dir, keep=1, cache_root=cache_root)
+    assert sorted(_read_index(reg_dir.parent)["regulations"]["gdpr"]["versions"]) == ["v1.0.0", "v1.1.0"]
+
+    rulesync.activate_version(reg_dir, "v1.1.0", cache_root=cache_root)
+    rulesync.cleanup(reg_dir, keep=1, cache_root=cache_root)
+    entry = _read_index(reg_dir.parent)["regulations"]["gdpr"]
+    assert list(entry["versions"]) == ["v1.1.0"]
+    assert entry["active"] == "v1.1.0"
+
+
+def _write_version(cache_root: Path, reg: str, version: str, active: bool) -> None:
+    target = cache_root / reg / version
+    target.mkdir(parents=True)
+    (target / "rules.yaml").write_text(
+        yaml.safe_dump([{"rule_id": f"{reg}-{version}", "type": "sdk", "pattern": f"{reg}.{version}"}]), encoding="utf-8"
+    )
+    (target / "metadata.json").write_text(json.dumps({"version": version, "active": active}), encoding="utf-8")
+
+
+def test_legacy_cache_migrated_then_resolved_from_index(tmp_path: Path, monkeypatch):
+    cache_root = tmp_path / "rules"
+    for i in range(20):
+        _write_version(cache_root, "gdpr", f"v{i:02d}", active=(i == 5))
+
+    index = rules_index.load_index(cache_root)
+    assert rules_index.resolve_rules(index, cache_root, "gdpr") == ("v05", cache_root / "gdpr/v05/rules.yaml")
+    assert (cache_root / rules_index.INDEX_FILE).exists()
+
+    # 之后的解析只读索引，不再读取任何 metadata.json
+    monkeypatch.setattr(rules_index, "_read_metadata", lambda *_: (_ for _ in ()).throw(AssertionError("scanned")))
+    index = rules_index.load_index(cache_root)
+    assert rules_index.resolve_rules(index, cache_root, "gdpr")[0] == "v05"
+    assert rules_index.resolve_rules(index, cache_root, "gdpr", preferred="v07")[0] == "v07"
+
+
+def test_stale_index_self_heals(tmp_path: Path):
+    cache_root = tmp_path / "rules"
+    _write_version(cache_root, "pipl", "v1", active=True)
+    rules_index.resolve_rules(rules_index.load_index(cache_root), cache_root, "pipl")
+    for f in (cache_root / "pipl" / "v1").iterdir():
+        f.unlink()
+    (cache_root / "pipl" / "v1").rmdir()
+    _write_version(cache_root, "pipl", "v2", active=False)
+
+    version, path = rules_index.resolve_rules(rules_index.load_index(cache_root), cache_root, "pipl")
+    assert (version, path) == ("v2", cache_root / "pipl/v2/rules.yaml")
+
+
+def test_scan_resolves_active_versions_via_index(tmp_path: Path):
+    cache_root = tmp_path / "rules"
+    for reg in ("gdpr", "pipl"):
+        _write_version(cache_root, reg, "v1", active=False)
+        _write_version(cache_root, reg, "v2", active=False)
+        rulesync.activate_version(cache_root / reg, "v1", cache_root=cache_root)
+    src = tmp_path / "src"
+    src.mkdir()
+    (src / "Main.java").write_text("gdpr.v1 pipl.v2", encoding="utf-8")
+    out = tmp_path / "out"
+
+    code = cli.main(
+        ["scan", "--mode", "source", "--input", str(src), "--rules-dir", str(cache_root), "--regulations", "gdpr",
+         "--regulations", "pipl", "--output-dir", str(out), "--format", "json", "--no-cache"]
+    )
+
+    assert code == 0
+    report = json.loads((out / "scan.json").read_text(encoding="utf-8"))
+    assert [f["rule_id"] for f in report["findings"]] == ["gdpr-v1"]
+
+
+def _metadata_active(reg_dir: Path) -> dict:
+    return {
+        p.parent.name: json.loads(p.read_text(encoding="utf-8")).get("active") for p in sorted(reg_dir.glob("*/metadata.json"))
+    }
+
+
+def test_activate_flips_pointer_without_rewriting_metadata(tmp_path: Path):
+    reg_dir = tmp_path / "cache" / "gdpr"
+    for i in range(5):
+        pkg, sha = _create_rules_pkg(tmp_path, f"v{i}")
+        rulesync.sync_rules(str(pkg), f"v{i}", reg_dir, expected_sha256=sha, cache_root=reg_dir.parent)
+    assert _metadata_active(reg_dir) == {"v0": False, "v1": False, "v2": False, "v3": False, "v4": True}
+    mtimes = {p: p.stat().st_mtime_ns for p in reg_dir.glob("*/metadata.json")}
+
+    rulesync.activate_version(reg_dir, "v1", cache_root=reg_dir.parent)
+
+    assert (reg_dir / rules_index.ACTIVE_FILE).read_text(encoding="utf-8").strip() == "v1"
+    # 只改写切换前后两个版本的 metadata.json（active 镜像字段），且保留其 mtime（安装时间）
+    assert {p: p.stat().st_mtime_ns for p in reg_dir.glob("*/metadata.json")} == mtimes
+    assert _metadata_active(reg_dir) == {"v0": False, "v1": True, "v2": False, "v3": False, "v4": False}
+    assert rulesync.get_active_path(reg_dir) == reg_dir / "v1"
+    assert _read_index(reg_dir.parent)["regulations"]["gdpr"]["active"] == "v1"
+    assert not list(reg_dir.glob(".*.tmp"))
+
+    rulesync.rollback(reg_dir, "v1")
+    assert rulesync.get_active_path(reg_dir) == reg_dir / "v0"
+
+
+def test_legacy_active_field_still_read(tmp_path: Path):
+    reg_dir = tmp_path / "rules" / "gdpr"
+    _write_version(reg_dir.parent, "gdpr", "v1", active=False)
+    _write_version(reg_dir.parent, "gdpr", "v2", active=True)
+
+    assert rulesync.get_active_path(reg_dir) == reg_dir / "v2"
+    assert not (reg_dir / rules_index.ACTIVE_FILE).exists()
+
+
+def test_cli_rulesync_with_regulation_uses_cache_root(tmp_path: Path):
+    cache_root = tmp_path / "rules"
+    pkg, sha = _create_rules_pkg(tmp_path, "v1.0.0")
+
+    code = cli.main(
+        ["rulesync", str(pkg), "v1.0.0", "--sha256", sha, "--cache-dir", str(cache_root), "--regulation", "GDPR",
+         "--allow-local-sources"]
+    )
+
+    assert code == 0
+    assert rulesync.get_active_path(cache_root / "gdpr") == cache_root / "gdpr" / "v1.0.0"
+    assert _read_index(cache_root)["regulations"]["gdpr"]["active"] == "v1.0.0"
+
+
+def test_resolve_follows_active_pointer_when_index_is_stale(tmp_path: Path):
+    cache_root = tmp_path / "rules"
+    reg_dir = cache_root / "gdpr"
+    _write_version(cache_root, "gdpr", "v1", active=False)
+    _write_version(cache_root, "gdpr", "v2", active=False)
+    rulesync.activate_version(reg_dir, "v2", cache_root=cache_root)
+    # 模拟切换 ACTIVE 后、写索引前崩溃：索引仍记录 v2
+    rules_index.write_active(reg_dir, "v1")
+    assert _read_index(cache_root)["regulations"]["gdpr"]["active"] == "v2"
+
+    version, path = rules_index.resolve_rules(rules_index.load_index(cache_root), cache_root, "gdpr")
+    assert (version, path) == ("v1", reg_dir / "v1" / "rules.yaml")
@@ -0,0 +1,101 @@
+from pathlib import Path
+
+import pytest
+import yaml
+
+from minos import ruleset, sdk_scanner
+
+
+def _write_rules(path: Path, rules) -> Path:
+    path.write_text(yaml.safe_dump(rules, allow_unicode=True), encoding="utf-8")
+    return path
+
+
+RULES = [
+    {"rule_id": "PERM_LOCATION", "type": "permission", "pattern": "android.permission.ACCESS_FINE_LOCATION"},
+    {"rule_id": "SDK_TRACKING", "type": "sdk", "pattern": "com.example.tracker"},
+    {"rule_id": "API_ID", "type": "api", "pattern": "getDeviceId"},
+]
+
+
+def test_sidecar_written_and_reused(tmp_path: Path, monkeypatch):
+    rules_path = _write_rules(tmp_path / "rules.yaml", RULES)
+    first = ruleset.load_ruleset(rules_path)
+    assert (tmp_path / "rules.compiled").exists()
+
+    monkeypatch.setattr(yaml, "safe_load", lambda *_: pytest.fail("YAML should not be parsed"))
+    second = ruleset.load_ruleset(rules_path)
+
+    assert second.rules == first.rules
+    assert second.patterns == [b"android.permission.ACCESS_FINE_LOCATION", b"com.example.tracker", b"getDeviceId"]
+    assert [r["rule_id"] for r in second.of_type("sdk")] == ["SDK_TRACKING"]
+
+
+def test_sidecar_invalidated_by_content_hash(tmp_path: Path):
+    rules_path = _write_rules(tmp_path / "rules.yaml", RULES)
+    ruleset.load_ruleset(rules_path)
+    _write_rules(rules_path, RULES[:1])
+
+    assert [r["rule_id"] for r in ruleset.load_ruleset(rules_path)] == ["PERM_LOCATION"]
+
+
+def test_corrupt_sidecar_falls_back_to_yaml(tmp_path: Path):
+    rules_path = _write_rules(tmp_path / "rules.yaml", RULES)
+    ruleset.load_ruleset(rules_path)
+    sidecar = tmp_path / "rules.compiled"
+    sidecar.write_bytes(sidecar.read_bytes()[:-10])
+
+    assert len(ruleset.load_ruleset(rules_path)) == 3
+
+
+def test_merge_matches_concatenated_normalization():
+    base = RULES + [{"rule_id": "STR_EMAIL", "type": "string", "pattern": "@"}]
+    override = [
+        {"rule_id": "SDK_TRACKING", "disabled": True},
+        {"rule_id": "API_ID", "type": "api", "pattern": "getImei", "severity": "low"},
+        {"type": "api", "pattern": "no-id"},
+    ]
+    merged = ruleset.RuleSet.merge([ruleset.compile_ruleset(base), ruleset.compile_ruleset(override)])
+
+    assert merged.rules == sdk_scanner.merge_rules(base, override)
+    assert [r["rule_id"] for r in merged] == ["PERM_LOCATION", "API_ID", "STR_EMAIL"]
+    assert merged.patterns[1] == b"getImei"
+
+
+def test_non_list_yaml_raises(tmp_path: Path):
+    rules_path = tmp_path / "rules.yaml"
+    rules_path.write_text("rule_id: x\n", encoding="utf-8")
+    with pytest.raises(ruleset.RuleSetError):
+        ruleset.load_ruleset(rules_path)
+
+
+class _Exploit:
+    def __init__(self, marker: Path):
+        self.marker = marker
+
+    def __reduce__(self):
+        return (Path.touch, (self.marker,))
+
+
+def test_sidecar_never_unpickled(tmp_path: Path):
+    import hashlib
+    import pickle
+
+    rules_path = _write_rules(tmp_path / "rules.yaml", RULES)
+    digest = hashlib.sha256(rules_path.read_bytes()).hexdigest().encode()
+    marker = tmp_path / "pwned"
+    payload = pickle.dumps(_Exploit(marker))
+    # 共享缓存中被篡改的 sidecar（旧 pickle 格式或新魔数 + pickle 负载）都不会被反序列化执行
+    for magic in (b"MINOS-RULESET-1\n", ruleset._MAGIC):
+        (tmp_path / "rules.compiled").write_bytes(magic + digest + payload)
+        assert len(ruleset.load_ruleset(rules_path)) == 3
+        assert not marker.exists()
+
+
+def test_rules_not_json_round_trippable_skip_sidecar(tmp_path: Path):
+    rules_path = _write_rules(tmp_path / "rules.yaml", RULES)
+    rules_path.write_text(rules_path.read_text(encoding="utf-8") + "- rule_id: DATED\n  type: api\n  pattern: x\n  since: 2024-01-01\n", encoding="utf-8")
+
+    loaded = ruleset.load_ruleset(rules_path)
+    assert [r["rule_id"] for r in loaded][-1] == "DATED"
+    assert not (tmp_path / "rules.compiled").exists()
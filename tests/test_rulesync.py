@@ -224,7 +224,7 @@ def test_cli_rulesync_remote_source_http(monkeypatch, tmp_path: Path):
     cache_dir.mkdir()
     pkg_path, sha256 = _create_rules_pkg(tmp_path, "v1.0.0")
 
-    def fake_download_http(source: str, dest: Path, timeout: int = 30) -> None:
+    def fake_download_http(source: str, dest: Path, timeout: int = 30, validator=None) -> None:
         shutil.copyfile(pkg_path, dest)
 
     monkeypatch.setattr(rulesync, "_download_http", fake_download_http)
@@ -312,7 +312,7 @@ def test_sync_rules_http_timeout_passthrough(monkeypatch, tmp_path: Path):
     pkg_path, sha256 = _create_rules_pkg(tmp_path, "v1.0.0")
     seen = {}
 
-    def fake_download_http(source: str, dest: Path, timeout: int = 30) -> None:
+    def fake_download_http(source: str, dest: Path, timeout: int = 30, validator=None) -> None:
         seen["timeout"] = timeout
         shutil.copyfile(pkg_path, dest)
 
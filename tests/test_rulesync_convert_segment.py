@@ -1,3 +1,7 @@
+import importlib.util
+import random
+from pathlib import Path
+
 from minos import rulesync_convert
 import pytest
 
@@ -36,3 +40,48 @@ def test_segment_text_raise_when_no_clause():
     text = "No clauses here"
     with pytest.raises(rulesync_convert.RulesyncConvertError):
         rulesync_convert.segment_text(text)
+
+
+def _load_bench():
+    # 逐模式的旧实现只在基准脚本中保留一份，测试直接复用
+    path = Path(__file__).resolve().parents[1] / "scripts" / "bench_clause_regex.py"
+    spec = importlib.util.spec_from_file_location("bench_clause_regex", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+_legacy_extract = _load_bench()._legacy_extract
+
+
+def test_combined_clause_header_matches_legacy_patterns():
+    lines = [
+        "Article 5 Principles relating to processing",
+        "ARTICLE 12",
+        "Art. 7 Conditions for consent",
+        "Art.7: Conditions",
+        "Art 9.",
+        "Article 5:",
+        "Section 1798.100 General Duties",
+        "ſection 3 long s",
+        "  Article 17º Right to erasure",
+        "第一条 为了保护个人信息权益",
+        "第二十一条：委托处理",
+        "第十条",
+        "第5条（目的）",
+        "第２７条 第三者提供の制限",
+        "12条 定義",
+        "1. The controller shall be responsible",
+        "Annex I",
+        "Articles of association",
+        "Sections 1 and 2",
+        "第一章 总则",
+        "",
+        "   ",
+        "个人信息处理者应当",
+    ]
+    random.seed(0)
+    alphabet = "ArticleSsection. 0123456789第一十条：:（）()、º-ſ\t"
+    lines += ["".join(random.choice(alphabet) for _ in range(random.randint(1, 16))) for _ in range(5000)]
+    for line in lines:
+        assert rulesync_convert._extract_clause_title(line) == _legacy_extract(line), line
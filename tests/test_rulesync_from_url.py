@@ -123,3 +123,23 @@ def test_rulesync_from_url_allow_custom_sources(tmp_path: Path, monkeypatch):
     meta = _read_metadata(cache_dir, "custom", "v1")
     assert meta is not None
     assert meta["source"].startswith("https://example.com/custom")
+
+
+def test_rulesync_from_url_parallel_partial_failure(tmp_path: Path, monkeypatch, capsys):
+    cache_dir = tmp_path / "cache"
+
+    def fake_convert(url: str, cache_dir: Path, out_path: Path, regulation: str, version: str):
+        if regulation == "pipl":
+            raise RuntimeError("network down")
+        out_path.parent.mkdir(parents=True, exist_ok=True)
+        out_path.write_text("[]", encoding="utf-8")
+        return out_path
+
+    monkeypatch.setattr("minos.rulesync_convert.convert_url_to_yaml", fake_convert)
+    exit_code = cli.main(["rulesync", "--from-url", "--version", "v1", "--jobs", "3", "--cache-dir", str(cache_dir)])
+    assert exit_code == 1
+    assert "pipl 同步失败" in capsys.readouterr().err
+    # 其余法规不受单个法规失败影响
+    for reg in ["gdpr", "ccpa", "cpra", "lgpd", "appi"]:
+        assert _read_metadata(cache_dir, reg, "v1") is not None
+    assert _read_metadata(cache_dir, "pipl", "v1") is None
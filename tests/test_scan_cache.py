@@ -0,0 +1,121 @@
+import os
+from pathlib import Path
+
+from minos import scan_cache, sdk_scanner
+
+
+RULES = [
+    {"rule_id": "API_ID_ACCESS", "type": "api", "pattern": "getDeviceId", "regulation": "PIPL", "severity": "high"},
+    {"rule_id": "SDK_TRACKING", "type": "sdk", "pattern": "com.example.tracker", "regulation": "GDPR"},
+]
+
+
+def _make_src(tmp_path: Path) -> Path:
+    src_dir = tmp_path / "src"
+    src_dir.mkdir()
+    (src_dir / "A.java").write_text("getDeviceId();")
+    (src_dir / "B.java").write_text("com.example.tracker")
+    (src_dir / "C.java").write_text("class C {}")
+    return src_dir
+
+
+def test_rescan_reuses_cached_results(tmp_path: Path, capsys):
+    src_dir = _make_src(tmp_path)
+    cache_dir = tmp_path / "scan-cache"
+
+    first, _ = sdk_scanner.scan_sdk_api([src_dir], RULES, cache_dir=cache_dir)
+    assert "[sdk] cache hits=0 misses=3" in capsys.readouterr().out
+
+    second, _ = sdk_scanner.scan_sdk_api([src_dir], RULES, cache_dir=cache_dir)
+    assert "[sdk] cache hits=3 misses=0" in capsys.readouterr().out
+    assert second == first
+
+
+def test_changed_file_is_rescanned(tmp_path: Path, capsys):
+    src_dir = _make_src(tmp_path)
+    cache_dir = tmp_path / "scan-cache"
+    sdk_scanner.scan_sdk_api([src_dir], RULES, cache_dir=cache_dir)
+    capsys.readouterr()
+
+    target = src_dir / "C.java"
+    target.write_text("getDeviceId(); // now sensitive")
+    st = target.stat()
+    os.utime(target, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+
+    findings, _ = sdk_scanner.scan_sdk_api([src_dir], RULES, cache_dir=cache_dir)
+    assert "[sdk] cache hits=2 misses=1" in capsys.readouterr().out
+    assert any(f["location"].endswith("C.java") and f["rule_id"] == "API_ID_ACCESS" for f in findings)
+
+
+def test_rule_change_invalidates_cache(tmp_path: Path, capsys):
+    src_dir = _make_src(tmp_path)
+    cache_dir = tmp_path / "scan-cache"
+    sdk_scanner.scan_sdk_api([src_dir], RULES, cache_dir=cache_dir)
+    capsys.readouterr()
+
+    rules = RULES + [{"rule_id": "CLASS_C", "type": "string", "pattern": "class C", "regulation": "GDPR"}]
+    findings, _ = sdk_scanner.scan_sdk_api([src_dir], rules, cache_dir=cache_dir)
+    assert "[sdk] cache hits=0 misses=3" in capsys.readouterr().out
+    assert any(f["rule_id"] == "CLASS_C" for f in findings)
+
+
+def test_cached_apk_entries(tmp_path: Path, capsys):
+    apk_path = tmp_path / "app.apk"
+    with sdk_scanner.zipfile.ZipFile(apk_path, "w") as zf:
+        zf.writestr("classes.dex", b"...com.example.tracker...")
+        zf.writestr("assets/a.txt", b"nothing")
+    cache_dir = tmp_path / "scan-cache"
+
+    first, _ = sdk_scanner.scan_sdk_api([apk_path], RULES, cache_dir=cache_dir)
+    second, _ = sdk_scanner.scan_sdk_api([apk_path], RULES, cache_dir=cache_dir)
+    assert "[sdk] cache hits=2 misses=0" in capsys.readouterr().out
+    assert second == first
+    assert [f["location"] for f in second] == ["classes.dex"]
+
+
+def test_lru_eviction_bounds_size(tmp_path: Path):
+    cache_dir = tmp_path / "scan-cache"
+    cache = scan_cache.ScanCache(cache_dir, "fp", max_bytes=64 * 1024)
+    for i in range(5000):
+        cache.store(f"/src/file{i}.java", 10, i, f"{i:064x}", [0, 1])
+    cache.close()
+
+    cache = scan_cache.ScanCache(cache_dir, "fp", max_bytes=64 * 1024)
+    assert cache._used_bytes() <= 64 * 1024
+    # 最近写入的条目保留，最早的被淘汰
+    assert cache.lookup("/src/file4999.java", 10, 4999) == [0, 1]
+    assert cache.lookup("/src/file0.java", 10, 0) is None
+    cache.close()
+
+
+def test_corrupted_cache_degrades_to_miss(tmp_path: Path, capsys, monkeypatch):
+    src_dir = _make_src(tmp_path)
+    cache_dir = tmp_path / "scan-cache"
+    expected, _ = sdk_scanner.scan_sdk_api([src_dir], RULES, cache_dir=cache_dir)
+    capsys.readouterr()
+
+    # 打开后数据库文件被破坏：查询失败按未命中处理并停用缓存，扫描结果不受影响
+    real_init = scan_cache.ScanCache.__init__
+
+    def corrupt_after_open(self, *args, **kwargs):
+        real_init(self, *args, **kwargs)
+        (cache_dir / "scan-cache.sqlite3").write_bytes(b"not a database" * 1024)
+
+    monkeypatch.setattr(scan_cache.ScanCache, "__init__", corrupt_after_open)
+    findings, _ = sdk_scanner.scan_sdk_api([src_dir], RULES, cache_dir=cache_dir)
+    out = capsys.readouterr().out
+    assert findings == expected
+    assert "[sdk] cache hits=0 misses=3" in out
+    assert "[sdk] cache error: 查询扫描缓存失败" in out
+
+
+def test_matcher_version_invalidates_cache(tmp_path: Path, capsys, monkeypatch):
+    src_dir = _make_src(tmp_path)
+    cache_dir = tmp_path / "scan-cache"
+    sdk_scanner.scan_sdk_api([src_dir], RULES, cache_dir=cache_dir)
+    capsys.readouterr()
+
+    # 匹配语义变化后，同一规则集按旧语义缓存的结果不再复用
+    monkeypatch.setattr(sdk_scanner, "MATCHER_VERSION", sdk_scanner.MATCHER_VERSION + 1)
+    sdk_scanner.scan_sdk_api([src_dir], RULES, cache_dir=cache_dir)
+    assert "[sdk] cache hits=0 misses=3" in capsys.readouterr().out
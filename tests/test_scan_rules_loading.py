@@ -107,3 +107,43 @@ def test_scan_missing_rules_file_error(tmp_path: Path):
     exit_code = cli.main(args)
     assert exit_code != 0
     assert not (out_dir / "scan.json").exists()
+
+
+def test_scan_from_read_only_rules_cache(tmp_path: Path):
+    rules_dir = tmp_path / "rules"
+    out_dir = tmp_path / "out"
+    _write_yaml(
+        rules_dir / "gdpr" / "v1" / "rules.yaml",
+        [{"rule_id": "TEST_SDK", "type": "sdk", "pattern": "com.example.tracker", "regulation": "GDPR"}],
+    )
+    src_dir = tmp_path / "src"
+    src_dir.mkdir()
+    (src_dir / "Main.java").write_text("com.example.tracker", encoding="utf-8")
+
+    # 只读缓存（如只读挂载的共享规则目录）：无法创建锁文件、索引与编译缓存，扫描照常进行
+    dirs = [rules_dir, rules_dir / "gdpr", rules_dir / "gdpr" / "v1"]
+    for d in dirs:
+        d.chmod(0o555)
+    try:
+        exit_code = cli.main(
+            [
+                "scan",
+                "--mode",
+                "source",
+                "--input",
+                str(src_dir),
+                "--regulations",
+                "GDPR",
+                "--rules-dir",
+                str(rules_dir),
+                "--output-dir",
+                str(out_dir),
+                "--format",
+                "json",
+            ]
+        )
+    finally:
+        for d in dirs:
+            d.chmod(0o755)
+    assert exit_code == 0
+    assert {f["rule_id"] for f in _read_report(out_dir)["findings"]} == {"TEST_SDK"}
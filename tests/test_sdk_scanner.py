@@ -116,3 +116,96 @@ def test_report_outputs(tmp_path: Path):
     assert data["meta"]["finding_count"] == 1
     assert data["findings"][0]["rule_id"] == "API_ID_ACCESS"
     assert "PIPL" in html_path.read_text()
+
+
+def test_pattern_matcher_equivalent_to_substring_match(monkeypatch):
+    # 覆盖前缀/子串/重叠模式，结果应与逐条子串匹配一致
+    patterns = ["com.example", "com.example.tracker", "example", "tracker.io", "ker.i", "getDeviceId", "absent.sdk"]
+    rules = [
+        {"rule_id": f"R{i}", "type": "string", "pattern": p, "regulation": "GDPR"} for i, p in enumerate(patterns)
+    ]
+    rules.append({"rule_id": "PERM", "type": "permission", "pattern": "com.example"})
+    content = b"xx com.example.tracker.io yy getDeviceId"
+
+    expected = [r for r in rules if r["type"] != "permission" and r["pattern"].encode() in content]
+    # 少量模式走子串查找，降低阈值后同一规则集走 trie 正则，两者结果一致
+    monkeypatch.setattr(sdk_scanner, "SUBSTRING_SCAN_MAX_PATTERNS", 1)
+    trie_matcher = sdk_scanner.compile_rules(rules)
+    assert trie_matcher._regex is not None
+    monkeypatch.undo()
+    matcher = sdk_scanner.compile_rules(rules)
+    assert matcher._regex is None
+    assert matcher.match(content) == trie_matcher.match(content) == expected
+    assert [r["rule_id"] for r in matcher.skipped] == ["PERM"]
+
+
+@pytest.mark.parametrize("length", [1000, 5000])
+def test_pattern_matcher_long_and_deeply_nested_patterns(length: int):
+    # 超长模式不受递归深度限制；大量前缀模式使分组嵌套过深时退回并列正则，结果不变
+    patterns = ["a" * length, "b" * length + "c"] + ["x" * i for i in range(1, 300)]
+    rules = [{"rule_id": f"R{i}", "type": "string", "pattern": p} for i, p in enumerate(patterns)]
+    content = b"zz" + b"a" * length + b"x" * 150
+
+    matcher = sdk_scanner.compile_rules(rules)
+    assert [r["rule_id"] for r in matcher.match(content)] == ["R0"] + [f"R{i}" for i in range(2, 152)]
+
+
+def test_pattern_matcher_many_rules_single_pass(tmp_path: Path):
+    src_dir = tmp_path / "src"
+    src_dir.mkdir()
+    (src_dir / "Main.java").write_text("import com.vendor.sdk42.Tracker; getDeviceId();")
+    rules = [
+        {"rule_id": f"SDK_{i}", "type": "sdk", "pattern": f"com.vendor.sdk{i}", "regulation": "GDPR"} for i in range(2000)
+    ]
+    findings, _ = sdk_scanner.scan_sdk_api([src_dir], rules, source_flags={})
+    # sdk4 与 sdk42 均为内容子串
+    assert {f["rule_id"] for f in findings} == {"SDK_4", "SDK_42"}
+
+
+def test_parallel_scan_matches_serial_order(tmp_path: Path, monkeypatch):
+    src_dir = tmp_path / "src"
+    src_dir.mkdir()
+    for i in range(40):
+        content = "getDeviceId()" if i % 3 == 0 else "plain"
+        (src_dir / f"F{i:02d}.java").write_text(content + (" com.example.tracker" if i % 5 == 0 else ""))
+    rules = [
+        {"rule_id": "API_ID_ACCESS", "type": "api", "pattern": "getDeviceId", "regulation": "PIPL", "severity": "high"},
+        {"rule_id": "SDK_TRACKING", "type": "sdk", "pattern": "com.example.tracker", "regulation": "GDPR"},
+    ]
+    # 小批次以确保多个批次分发到 worker
+    monkeypatch.setattr(sdk_scanner, "BATCH_SIZE", 4)
+
+    serial, serial_stats = sdk_scanner.scan_sdk_api([src_dir], rules, source_flags={}, workers=1)
+    parallel, parallel_stats = sdk_scanner.scan_sdk_api([src_dir], rules, source_flags={}, workers=4)
+
+    assert parallel == serial
+    assert parallel_stats == serial_stats
+    assert len(serial) == 14 + 8
+
+
+@pytest.mark.parametrize("substring_max", [1, 64])
+@pytest.mark.parametrize("chunk_size", [1, 3, 7, 16, 1 << 20])
+def test_stream_scan_matches_whole_buffer(chunk_size: int, substring_max: int, monkeypatch):
+    import io
+
+    monkeypatch.setattr(sdk_scanner, "SUBSTRING_SCAN_MAX_PATTERNS", substring_max)
+
+    patterns = ["com.example.tracker", "example", "tracker.example.com", "getDeviceId", "facebook.com/tr", "missing"]
+    rules = [{"rule_id": f"R{i}", "type": "string", "pattern": p} for i, p in enumerate(patterns)]
+    matcher = sdk_scanner.compile_rules(rules)
+    content = b"..com.example.tra" + b"cker..tracker.example.c" + b"om;getDevic" + b"eId()" + b"x" * 50 + b"facebook.com/tr"
+
+    assert matcher.match_stream_indices(io.BytesIO(content), chunk_size) == matcher.match_indices(content)
+
+
+def test_large_apk_entry_streamed(tmp_path: Path, monkeypatch):
+    apk_path = tmp_path / "big.apk"
+    payload = b"\0" * 5000 + b"com.example.tracker" + b"\0" * 5000
+    with sdk_scanner.zipfile.ZipFile(apk_path, "w", compression=sdk_scanner.zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("assets/bundle.bin", payload)
+    monkeypatch.setattr(sdk_scanner, "STREAM_CHUNK_SIZE", 4096)
+
+    rules = [{"rule_id": "SDK_TRACKING", "type": "sdk", "pattern": "com.example.tracker", "regulation": "GDPR"}]
+    findings, _ = sdk_scanner.scan_sdk_api([apk_path], rules, source_flags={})
+
+    assert [(f["rule_id"], f["location"]) for f in findings] == [("SDK_TRACKING", "assets/bundle.bin")]
@@ -0,0 +1,108 @@
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from minos import rulesync, syncpool
+from test_rulesync_online import _create_pkg
+
+
+def test_host_limiter_caps_connections_per_host():
+    limiter = syncpool.HostLimiter(per_host=2)
+    lock = threading.Lock()
+    active = {"a.example": 0, "b.example": 0}
+    peak = {"a.example": 0, "b.example": 0}
+
+    def fetch(url: str) -> None:
+        host = url.split("/")[2]
+        with limiter.slot(url):
+            with lock:
+                active[host] += 1
+                peak[host] = max(peak[host], active[host])
+            time.sleep(0.05)
+            with lock:
+                active[host] -= 1
+
+    urls = [f"https://a.example/{i}" for i in range(6)] + [f"https://b.example/{i}" for i in range(3)]
+    syncpool.run_parallel(urls, fetch, jobs=9)
+    assert peak == {"a.example": 2, "b.example": 2}
+
+
+def test_run_parallel_uses_passed_limiter_only_for_its_tasks():
+    lock = threading.Lock()
+    active = {"n": 0, "peak": 0}
+
+    def fetch(url: str) -> None:
+        with syncpool.host_slot(url):
+            with lock:
+                active["n"] += 1
+                active["peak"] = max(active["peak"], active["n"])
+            time.sleep(0.05)
+            with lock:
+                active["n"] -= 1
+
+    urls = [f"https://a.example/{i}" for i in range(4)]
+    syncpool.run_parallel(urls, fetch, jobs=4, limiter=syncpool.HostLimiter(per_host=1))
+    assert active["peak"] == 1
+    # 进程内默认限流器不受影响
+    assert syncpool.host_limiter.per_host == syncpool.DEFAULT_PER_HOST
+
+
+def test_run_parallel_collects_errors_in_order():
+    def task(key: str) -> str:
+        if key == "bad":
+            raise ValueError("boom")
+        return key.upper()
+
+    results = syncpool.run_parallel(["a", "bad", "c"], task, jobs=3)
+    assert list(results) == ["a", "bad", "c"]
+    assert results["a"] == ("A", None)
+    assert isinstance(results["bad"][1], ValueError)
+
+
+def test_sync_regulations_overlaps_and_retries_independently(tmp_path: Path):
+    cache_root = tmp_path / "rules"
+    regs = ["gdpr", "ccpa", "pipl", "appi"]
+    sources = {reg: _create_pkg(tmp_path, reg, "v1") for reg in regs}
+    calls = {reg: 0 for reg in regs}
+    finished: dict = {}
+
+    def download(regulation: str, version: str, target_dir: Path) -> str:
+        calls[regulation] += 1
+        time.sleep(0.2)
+        if regulation == "gdpr" and calls[regulation] == 1:
+            raise rulesync.RulesyncError("timeout")
+        pkg, sha = sources[regulation]
+        rulesync.sync_rules(str(pkg), version, cache_dir=target_dir, expected_sha256=sha)
+        finished[regulation] = time.monotonic()
+        return sha
+
+    start = time.monotonic()
+    rulesync.sync_regulations(regs, "v1", cache_root, downloader=download, retries=1, jobs=4, backoff=0.3)
+    elapsed = time.monotonic() - start
+    # 顺序执行至少 5 × 0.2s + 退避；并发时约为 gdpr 自身的 0.2 + 0.3 + 0.2
+    assert elapsed < 1.0
+    assert calls["gdpr"] == 2
+    # gdpr 的退避不阻塞其它法规
+    assert max(finished[r] for r in regs if r != "gdpr") < finished["gdpr"]
+    for reg in regs:
+        assert (cache_root / reg / "v1").exists()
+
+
+def test_sync_regulations_reports_all_failures(tmp_path: Path):
+    cache_root = tmp_path / "rules"
+    pkg, sha = _create_pkg(tmp_path, "pipl", "v1")
+
+    def download(regulation: str, version: str, target_dir: Path) -> str:
+        if regulation == "pipl":
+            rulesync.sync_rules(str(pkg), version, cache_dir=target_dir, expected_sha256=sha)
+            return sha
+        raise rulesync.RulesyncError(f"{regulation} down")
+
+    with pytest.raises(rulesync.RulesyncError) as excinfo:
+        rulesync.sync_regulations(["gdpr", "pipl", "appi"], "v1", cache_root, downloader=download, backoff=0)
+    assert "2 个法规同步失败" in str(excinfo.value)
+    assert "gdpr" in str(excinfo.value) and "appi" in str(excinfo.value)
+    # 其它法规失败不影响成功的法规落地
+    assert (cache_root / "pipl" / "v1").exists()
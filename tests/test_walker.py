@@ -0,0 +1,95 @@
+from pathlib import Path
+
+from minos import sdk_scanner, walker
+
+
+def _touch(root: Path, rel: str, content: str = "x") -> Path:
+    path = root / rel
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content, encoding="utf-8")
+    return path
+
+
+def _rel(root: Path, paths) -> list:
+    return [p.relative_to(root).as_posix() for p in paths]
+
+
+def test_default_excludes_prune_build_outputs(tmp_path: Path):
+    _touch(tmp_path, "app/build.gradle")
+    _touch(tmp_path, "app/src/main/java/Main.java")
+    _touch(tmp_path, "app/build/intermediates/R.java")
+    _touch(tmp_path, ".git/objects/ab")
+    _touch(tmp_path, "node_modules/pkg/index.js")
+    _touch(tmp_path, "app/src/main/res/drawable/logo.png")
+    _touch(tmp_path, "app/src/main/assets/fonts/a.ttf")
+
+    assert _rel(tmp_path, walker.walk_files(tmp_path)) == ["app/build.gradle", "app/src/main/java/Main.java"]
+
+
+def test_build_source_package_not_pruned(tmp_path: Path):
+    # 只有 Gradle 模块下的 build/ 是构建产物；源码中名为 build 的包照常扫描
+    _touch(tmp_path, "settings.gradle.kts")
+    _touch(tmp_path, "build/tmp/Gen.java")
+    _touch(tmp_path, "lib/src/main/java/com/example/build/Config.java")
+    _touch(tmp_path, "tools/build/release.py")
+
+    assert _rel(tmp_path, walker.walk_files(tmp_path)) == [
+        "lib/src/main/java/com/example/build/Config.java",
+        "settings.gradle.kts",
+        "tools/build/release.py",
+    ]
+
+
+def test_gitignore_and_minosignore(tmp_path: Path):
+    _touch(tmp_path, ".gitignore", "*.log\n/generated/\n!keep.log\n")
+    _touch(tmp_path, "lib/.minosignore", "fixtures/\n")
+    _touch(tmp_path, "a.log")
+    _touch(tmp_path, "keep.log")
+    _touch(tmp_path, "generated/Gen.java")
+    _touch(tmp_path, "lib/generated/Lib.java")
+    _touch(tmp_path, "lib/fixtures/data.txt")
+    _touch(tmp_path, "lib/Lib.java")
+
+    files = _rel(tmp_path, walker.walk_files(tmp_path))
+    assert files == [".gitignore", "keep.log", "lib/.minosignore", "lib/Lib.java", "lib/generated/Lib.java"]
+
+
+def test_pruned_dirs_are_not_entered(tmp_path: Path, monkeypatch):
+    _touch(tmp_path, "build.gradle")
+    _touch(tmp_path, "src/Main.java")
+    _touch(tmp_path, "build/out/Gen.java")
+    seen = []
+    real_scandir = walker.os.scandir
+
+    def spy(path):
+        seen.append(Path(path).name)
+        return real_scandir(path)
+
+    monkeypatch.setattr(walker.os, "scandir", spy)
+    list(walker.walk_files(tmp_path))
+    assert "build" not in seen
+    assert "out" not in seen
+
+
+def test_excludes_and_max_file_size(tmp_path: Path):
+    _touch(tmp_path, "src/Main.java", "small")
+    _touch(tmp_path, "src/Big.java", "x" * 2048)
+    _touch(tmp_path, "docs/README.md")
+    _touch(tmp_path, "src/deep/a/b/Skip.kt")
+
+    files = _rel(tmp_path, walker.walk_files(tmp_path, excludes=["docs/", "src/**/*.kt"], max_file_size=1024))
+    assert files == ["src/Main.java"]
+    # 默认不限制文件大小
+    assert "src/Big.java" in _rel(tmp_path, walker.walk_files(tmp_path))
+
+
+def test_sdk_scan_skips_ignored_paths(tmp_path: Path):
+    _touch(tmp_path, ".minosignore", "third_party/\n")
+    _touch(tmp_path, "src/Main.java", "getDeviceId();")
+    _touch(tmp_path, "third_party/Vendor.java", "getDeviceId();")
+    _touch(tmp_path, "build.gradle.kts")
+    _touch(tmp_path, "build/Gen.java", "getDeviceId();")
+
+    rules = [{"rule_id": "API_ID_ACCESS", "type": "api", "pattern": "getDeviceId", "regulation": "PIPL"}]
+    findings, _ = sdk_scanner.scan_sdk_api([tmp_path], rules, source_flags={})
+    assert [Path(f["location"]).name for f in findings] == ["Main.java"]